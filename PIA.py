@@ -1,101 +1,1023 @@
 import os
 import sys
 import csv
+import gzip
 import json
+import re
+import time
+import atexit
+import argparse
+import random
+import bisect
+import cProfile
+import difflib
+import hashlib
+import functools
+import contextlib
+import shutil
 import sqlite3
 import datetime
+import tempfile
+import threading
+import tracemalloc
+import unicodedata
 from sqlite3 import Error
+from concurrent.futures import ThreadPoolExecutor
 from tabulate import tabulate
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, Border, Side
 
 
-if not os.path.exists("ReservasCoworking.db"):
-    print("\nNo se encontró base de datos anterior. Se inicia con estado vacío.")
-else:
-    print("\nSe ha recuperado el estado anterior.")
+RUTA_BD = os.environ.get("PIA_BD", "ReservasCoworking.db")
 
-try:
-    with sqlite3.connect("ReservasCoworking.db") as conn:
-        cursor = conn.cursor()
-        
-        cursor.execute("""CREATE TABLE IF NOT EXISTS clientes (
-            clave INTEGER PRIMARY KEY,
-            nombre TEXT NOT NULL,
-            apellido TEXT NOT NULL
-        )""")
-        
-        cursor.execute("""CREATE TABLE IF NOT EXISTS salas (
-            clave INTEGER PRIMARY KEY,
-            nombre TEXT NOT NULL,
-            cupo INTEGER NOT NULL
-        )""")
-        
-        cursor.execute("""CREATE TABLE IF NOT EXISTS turno (
-            clave_horario INTEGER PRIMARY KEY,
-            tipo_turno TEXT NOT NULL
-        )""")
-        
-        cursor.execute("SELECT COUNT(*) FROM turno")
-        if cursor.fetchone()[0] == 0:
-            cursor.executemany(
-                "INSERT INTO turno (tipo_turno) VALUES (?)",
-                [("Matutino",), ("Vespertino",), ("Nocturno",)]
+CONFIGURACION_BD = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+}
+
+_hilo_local = threading.local()
+_generacion_conexion = 0
+_base_inicializada = False
+
+DIAS_ANTICIPACION = 2
+
+
+def configurar_base_de_datos(ruta=None, **pragmas):
+    """Cambia la ruta y/o los PRAGMAs de la base de datos. Las conexiones abiertas se renuevan en su siguiente uso."""
+    global RUTA_BD, _generacion_conexion, _base_inicializada
+
+    for nombre in pragmas:
+        if nombre not in CONFIGURACION_BD:
+            raise ValueError(f"PRAGMA no soportado: {nombre}")
+
+    if ruta is not None:
+        RUTA_BD = ruta
+        _base_inicializada = False
+    CONFIGURACION_BD.update(pragmas)
+    _generacion_conexion += 1
+    cerrar_conexion()
+
+
+def abrir_conexion(ruta=None):
+    """Abre una conexión nueva a la base de datos aplicando los PRAGMAs configurados."""
+    busy_timeout = CONFIGURACION_BD.get("busy_timeout") or 0
+    fabrica = ConexionInstrumentada if INSTRUMENTACION["activa"] else sqlite3.Connection
+    conn = sqlite3.connect(ruta or RUTA_BD, timeout=busy_timeout / 1000, factory=fabrica)
+
+    for nombre, valor in CONFIGURACION_BD.items():
+        if valor is not None:
+            conn.execute(f"PRAGMA {nombre} = {valor}")
+    return conn
+
+
+def obtener_conexion():
+    """Devuelve la conexión compartida del hilo actual, abriéndola solo la primera vez."""
+    conn = getattr(_hilo_local, "conexion", None)
+    if conn is None or _hilo_local.generacion != _generacion_conexion:
+        cerrar_conexion()
+        conn = abrir_conexion()
+        _hilo_local.conexion = conn
+        _hilo_local.generacion = _generacion_conexion
+    return conn
+
+
+def cerrar_conexion():
+    """Cierra la conexión compartida del hilo actual, si existe."""
+    conn = getattr(_hilo_local, "conexion", None)
+    if conn is not None:
+        conn.close()
+        _hilo_local.conexion = None
+        _hilo_local.cache = None
+
+
+atexit.register(cerrar_conexion)
+
+
+@contextlib.contextmanager
+def transaccion(conn=None):
+    """Agrupa las operaciones en una transacción BEGIN IMMEDIATE; si ya hay una abierta, usa un SAVEPOINT."""
+    conn = conn or obtener_conexion()
+
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT transaccion_anidada")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO transaccion_anidada")
+            conn.execute("RELEASE transaccion_anidada")
+            raise
+        conn.execute("RELEASE transaccion_anidada")
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+REINTENTOS_ESCRITURA = {"intentos": 6, "espera_inicial": 0.02, "espera_maxima": 0.5}
+
+ESTADISTICAS_REINTENTOS = {"reintentos": 0, "agotados": 0}
+
+
+def _base_ocupada(error):
+    """Indica si el error de SQLite se debe a que otra conexión tiene bloqueada la base."""
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+
+def con_reintentos(funcion):
+    """Repite la escritura completa con espera exponencial acotada mientras la base siga bloqueada por otro proceso.
+
+    Solo reintenta en el nivel más externo: dentro de una transacción ya abierta el error sube a quien la abrió,
+    que es quien puede repetirla completa.
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if obtener_conexion().in_transaction:
+            return funcion(*args, **kwargs)
+
+        espera = REINTENTOS_ESCRITURA["espera_inicial"]
+        for intento in range(1, REINTENTOS_ESCRITURA["intentos"] + 1):
+            try:
+                return funcion(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _base_ocupada(e):
+                    raise
+                if intento == REINTENTOS_ESCRITURA["intentos"]:
+                    ESTADISTICAS_REINTENTOS["agotados"] += 1
+                    raise
+                ESTADISTICAS_REINTENTOS["reintentos"] += 1
+                time.sleep(espera * random.uniform(0.5, 1.0))
+                espera = min(espera * 2, REINTENTOS_ESCRITURA["espera_maxima"])
+    return envoltura
+
+
+# Instrumentación: apagada por omisión. Se enciende con PIA_INSTRUMENTACION=1, con la opción --instrumentar
+# o con activar_instrumentacion(). Apagada, las conexiones son sqlite3.Connection normales y las funciones
+# instrumentadas solo consultan este diccionario antes de ejecutarse.
+INSTRUMENTACION = {
+    "activa": os.environ.get("PIA_INSTRUMENTACION", "") not in ("", "0"),
+    "umbral_lenta_ms": float(os.environ.get("PIA_CONSULTA_LENTA_MS", 100)),
+    "registro_lentas": os.environ.get("PIA_REGISTRO_LENTAS", "consultas_lentas.log"),
+    "metricas": os.environ.get("PIA_METRICAS", "metricas_pia.json"),
+    "perfilar": os.environ.get("PIA_PERFILAR"),
+    "perfilador": os.environ.get("PIA_PERFILADOR", "cprofile"),
+}
+
+LIMITES_HISTOGRAMA_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_metricas = {"sentencias": {}, "operaciones": {}}
+_candado_metricas = threading.Lock()
+
+
+def activar_instrumentacion(umbral_lenta_ms=None, registro_lentas=None):
+    """Enciende la instrumentación; las conexiones se reabren instrumentadas en su siguiente uso."""
+    INSTRUMENTACION["activa"] = True
+    if umbral_lenta_ms is not None:
+        INSTRUMENTACION["umbral_lenta_ms"] = umbral_lenta_ms
+    if registro_lentas is not None:
+        INSTRUMENTACION["registro_lentas"] = registro_lentas
+    configurar_base_de_datos()
+
+
+def _registrar_tiempo(tipo, nombre, duracion_ms, sentencias=0):
+    """Acumula una medición en el histograma de la sentencia u operación indicada."""
+    with _candado_metricas:
+        metrica = _metricas[tipo].get(nombre)
+        if metrica is None:
+            metrica = _metricas[tipo][nombre] = {
+                "conteo": 0, "total_ms": 0.0, "max_ms": 0.0, "sentencias": 0,
+                "histograma": [0] * len(LIMITES_HISTOGRAMA_MS),
+            }
+        metrica["conteo"] += 1
+        metrica["total_ms"] += duracion_ms
+        metrica["max_ms"] = max(metrica["max_ms"], duracion_ms)
+        metrica["sentencias"] += sentencias
+        metrica["histograma"][bisect.bisect_left(LIMITES_HISTOGRAMA_MS, duracion_ms)] += 1
+
+
+def _percentil_histograma(metrica, fraccion):
+    """Devuelve el límite superior (ms) de la cubeta donde cae el percentil pedido."""
+    objetivo = metrica["conteo"] * fraccion
+    acumulado = 0
+    for limite, conteo in zip(LIMITES_HISTOGRAMA_MS, metrica["histograma"]):
+        acumulado += conteo
+        if acumulado >= objetivo:
+            return limite if limite != float("inf") else metrica["max_ms"]
+    return metrica["max_ms"]
+
+
+def _contar_sentencia(sql):
+    """Callback de rastreo de SQLite: cuenta cada sentencia (incluidas las de triggers) y guarda la última expandida."""
+    _hilo_local.sentencias = getattr(_hilo_local, "sentencias", 0) + 1
+    if not sql.startswith("--"):
+        _hilo_local.ultima_sentencia = sql
+
+
+def _medir_sentencia(conn, sql, parametros, duracion_ms, sql_expandida=None):
+    """Registra la duración de una sentencia y, si rebasa el umbral, la escribe en el registro de consultas lentas."""
+    _registrar_tiempo("sentencias", " ".join(sql.split()), duracion_ms)
+    if duracion_ms < INSTRUMENTACION["umbral_lenta_ms"]:
+        return
+
+    try:
+        plan = [fila[3] for fila in sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parametros)]
+    except Error:
+        plan = []
+    with open(INSTRUMENTACION["registro_lentas"], "a", encoding="utf-8") as registro:
+        registro.write(f"{datetime.datetime.now().isoformat(timespec='seconds')} {duracion_ms:.1f} ms\n")
+        registro.write(f"  {' '.join((sql_expandida or sql).split())}\n")
+        for paso in plan:
+            registro.write(f"    {paso}\n")
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mide cada sentencia desde execute hasta que se termina de leer su resultado."""
+
+    _sentencia = None
+
+    def _medir(self, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            if self._sentencia is not None:
+                self._sentencia[2] += time.perf_counter() - inicio
+
+    def _terminar(self):
+        if self._sentencia is not None:
+            sql, parametros, duracion, sql_expandida = self._sentencia
+            self._sentencia = None
+            _medir_sentencia(self.connection, sql, parametros, duracion * 1000, sql_expandida)
+
+    def execute(self, sql, parametros=()):
+        self._terminar()
+        self._sentencia = [sql, parametros, 0.0, None]
+        _hilo_local.ultima_sentencia = None
+        try:
+            resultado = self._medir(super().execute, sql, parametros)
+        except BaseException:
+            self._terminar()
+            raise
+        self._sentencia[3] = getattr(_hilo_local, "ultima_sentencia", None)
+        if self.description is None:
+            self._terminar()
+        return resultado
+
+    def executemany(self, sql, parametros):
+        self._terminar()
+        self._sentencia = [sql, (), 0.0, None]
+        try:
+            return self._medir(super().executemany, sql, parametros)
+        finally:
+            self._terminar()
+
+    def fetchone(self):
+        fila = self._medir(super().fetchone)
+        if fila is None:
+            self._terminar()
+        return fila
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        filas = self._medir(super().fetchmany, size)
+        if len(filas) < size:
+            self._terminar()
+        return filas
+
+    def fetchall(self):
+        filas = self._medir(super().fetchall)
+        self._terminar()
+        return filas
+
+    def __next__(self):
+        try:
+            return self._medir(super().__next__)
+        except StopIteration:
+            self._terminar()
+            raise
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        with contextlib.suppress(Exception):
+            self._terminar()
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """Conexión cuyos cursores miden cada sentencia y que cuenta las sentencias con el callback de rastreo."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_contar_sentencia)
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+
+def perfilar(funcion, *args, **kwargs):
+    """Ejecuta una sola llamada bajo cProfile o tracemalloc (según PIA_PERFILADOR) y guarda el perfil en disco."""
+    nombre = funcion.__name__
+    if INSTRUMENTACION["perfilador"] == "tracemalloc":
+        tracemalloc.start()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            captura = tracemalloc.take_snapshot()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            ruta = f"perfil_{nombre}.txt"
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(f"Pico de memoria: {pico / 1024:.1f} KiB\n\n")
+                for estadistica in captura.statistics("lineno")[:25]:
+                    archivo.write(f"{estadistica}\n")
+            print(f"\nPerfil de memoria de '{nombre}' guardado en '{ruta}'.")
+
+    perfilador = cProfile.Profile()
+    try:
+        return perfilador.runcall(funcion, *args, **kwargs)
+    finally:
+        ruta = f"perfil_{nombre}.prof"
+        perfilador.dump_stats(ruta)
+        print(f"\nPerfil de '{nombre}' guardado en '{ruta}' (ábralo con pstats o snakeviz).")
+
+
+def instrumentado(funcion):
+    """Mide el tiempo y las sentencias de cada llamada a la función cuando la instrumentación está activa."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if INSTRUMENTACION["perfilar"] == funcion.__name__:
+            INSTRUMENTACION["perfilar"] = None
+            return perfilar(funcion, *args, **kwargs)
+        if not INSTRUMENTACION["activa"]:
+            return funcion(*args, **kwargs)
+
+        sentencias = getattr(_hilo_local, "sentencias", 0)
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            _registrar_tiempo(
+                "operaciones", funcion.__name__, (time.perf_counter() - inicio) * 1000,
+                getattr(_hilo_local, "sentencias", 0) - sentencias
             )
-        
-        cursor.execute("""CREATE TABLE IF NOT EXISTS reserva (
-            folio INTEGER PRIMARY KEY,
-            fecha TIMESTAMP NOT NULL,
-            clave_sala INTEGER NOT NULL,
-            turno TEXT NOT NULL,
-            clave_cliente INTEGER NOT NULL,
-            evento TEXT NOT NULL,
-            creado TEXT NOT NULL,
-            estado TEXT NOT NULL DEFAULT 'ACTIVA',
-            FOREIGN KEY(clave_sala) REFERENCES salas(clave),
-            FOREIGN KEY(clave_cliente) REFERENCES clientes(clave)
-        )""")
-        
-        conn.commit()
+    return envoltura
+
+
+def resumen_instrumentacion(tipo="operaciones", limite=None):
+    """Devuelve filas (nombre, llamadas, total, promedio, p50, p95, máximo, sentencias/llamada) ordenadas por tiempo total."""
+    with _candado_metricas:
+        metricas = sorted(_metricas[tipo].items(), key=lambda par: par[1]["total_ms"], reverse=True)
+    return [
+        [
+            nombre if len(nombre) <= 70 else nombre[:67] + "...",
+            metrica["conteo"],
+            round(metrica["total_ms"], 2),
+            round(metrica["total_ms"] / metrica["conteo"], 3),
+            _percentil_histograma(metrica, 0.5),
+            _percentil_histograma(metrica, 0.95),
+            round(metrica["max_ms"], 3),
+            round(metrica["sentencias"] / metrica["conteo"], 1),
+        ]
+        for nombre, metrica in metricas[:limite]
+    ]
+
+
+def mostrar_resumen_instrumentacion():
+    """Imprime las operaciones y las sentencias más costosas y guarda los histogramas completos en JSON."""
+    encabezados = ["NOMBRE", "LLAMADAS", "TOTAL MS", "PROMEDIO MS", "P50 MS", "P95 MS", "MAX MS", "SENTENCIAS"]
+    print("\nOperaciones:")
+    print(tabulate(resumen_instrumentacion("operaciones"), headers=encabezados, tablefmt="grid"))
+    print("\nSentencias más costosas:")
+    print(tabulate(
+        [fila[:-1] for fila in resumen_instrumentacion("sentencias", 10)], headers=encabezados[:-1], tablefmt="grid"
+    ))
+
+    with _candado_metricas, open(INSTRUMENTACION["metricas"], "w", encoding="utf-8") as archivo_json:
+        json.dump({"limites_ms": [str(limite) for limite in LIMITES_HISTOGRAMA_MS], **_metricas},
+                  archivo_json, ensure_ascii=False, indent=2)
+    print(f"\nHistogramas guardados en '{INSTRUMENTACION['metricas']}'.")
+
+
+# Un acierto no es gratis: cada INTERVALO_VERSION_DATOS segundos el siguiente acceso consulta PRAGMA data_version
+# para saber si otra conexión escribió. "revisiones" cuenta esas consultas, que también aparecen en la
+# instrumentación de sentencias.
+ESTADISTICAS_CACHE = {"aciertos": 0, "fallos": 0, "invalidaciones": 0, "revisiones": 0}
+INTERVALO_VERSION_DATOS = 0.5
+
+
+def _cache_del_hilo():
+    """Devuelve el caché de datos de referencia del hilo, vaciándolo si otra conexión escribió en la base.
+
+    PRAGMA data_version solo cambia cuando otra conexión confirma cambios, así que las escrituras de otras
+    estaciones también invalidan el caché; las propias se invalidan explícitamente con invalidar_cache().
+    Para no pagar una sentencia en cada acierto, la versión se revisa a lo más una vez por
+    INTERVALO_VERSION_DATOS, así que lo escrito por otra estación puede tardar ese intervalo en notarse.
+    """
+    conn = obtener_conexion()
+    cache = getattr(_hilo_local, "cache", None)
+    ahora = time.monotonic()
+    if cache is not None and ahora - _hilo_local.revisado < INTERVALO_VERSION_DATOS:
+        return cache
+
+    ESTADISTICAS_CACHE["revisiones"] += 1
+    version_datos = conn.execute("PRAGMA data_version").fetchone()[0]
+    _hilo_local.revisado = ahora
+    if cache is None or _hilo_local.version_datos != version_datos:
+        if cache:
+            ESTADISTICAS_CACHE["invalidaciones"] += 1
+        cache = _hilo_local.cache = {}
+        _hilo_local.version_datos = version_datos
+    return cache
+
+
+def _consultar_con_cache(tabla, consulta):
+    """Ejecuta una consulta de datos de referencia o devuelve su resultado guardado."""
+    cache = _cache_del_hilo()
+    llave = (tabla, consulta)
+    if llave in cache:
+        ESTADISTICAS_CACHE["aciertos"] += 1
+        return cache[llave]
+    ESTADISTICAS_CACHE["fallos"] += 1
+    resultado = cache[llave] = obtener_conexion().execute(consulta).fetchall()
+    return resultado
+
+
+def invalidar_cache(*tablas):
+    """Descarta lo guardado de las tablas indicadas (clientes, salas, turno), o de todas si no se indica ninguna."""
+    cache = getattr(_hilo_local, "cache", None)
+    if not cache:
+        return
+    for llave in list(cache):
+        if not tablas or llave[0] in tablas:
+            del cache[llave]
+            ESTADISTICAS_CACHE["invalidaciones"] += 1
+
 
-except Error as e:
-    print(e)
-except Exception:
-    print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+def obtener_turnos():
+    """Devuelve los turnos (clave_horario, tipo_turno) en orden de clave."""
+    return _consultar_con_cache("turno", "SELECT clave_horario, tipo_turno FROM turno ORDER BY clave_horario")
+
+
+def obtener_salas():
+    """Devuelve las salas (clave, nombre, cupo) en orden de clave."""
+    return _consultar_con_cache("salas", "SELECT clave, nombre, cupo FROM salas ORDER BY clave")
+
+
+def obtener_clientes():
+    """Devuelve los clientes (clave, apellido, nombre) ordenados por apellido y nombre."""
+    return _consultar_con_cache("clientes", "SELECT clave, apellido, nombre FROM clientes ORDER BY apellido, nombre")
+
+
+# reserva guarda la fecha como número de día (date.toordinal()) y el turno como su clave_horario; la conversión
+# a fechas y nombres de turno se hace solo al recibir datos, al mostrarlos y al exportarlos.
+DIA_JULIANO_DEL_ORDINAL_CERO = 1721424.5
+
+
+def dia_de_fecha(fecha):
+    """Devuelve el número de día con el que se guarda la fecha en reserva."""
+    return fecha.toordinal()
+
+
+def fecha_de_dia(dia):
+    """Devuelve la fecha que corresponde a un número de día guardado en reserva."""
+    return datetime.date.fromordinal(dia)
+
+
+def clave_de_turno(turno):
+    """Devuelve la clave_horario del turno indicado por nombre. Lanza ValueError si no existe."""
+    for clave_horario, tipo_turno in obtener_turnos():
+        if tipo_turno.upper() == str(turno).upper():
+            return clave_horario
+    raise ValueError(f"El turno '{turno}' no existe.")
+
+
+def contar_clientes():
+    """Devuelve cuántos clientes hay registrados."""
+    return _consultar_con_cache("clientes", "SELECT COUNT(clave) FROM clientes")[0][0]
+
+
+def contar_salas():
+    """Devuelve cuántas salas hay registradas."""
+    return _consultar_con_cache("salas", "SELECT COUNT(clave) FROM salas")[0][0]
+
+
+# Folios que se listan, como máximo, en el error de una migración que encuentra datos inconsistentes.
+LIMITE_FOLIOS_EN_ERROR = 20
+
+
+def _migracion_tablas_base(cursor):
+    """Crea las tablas clientes, salas, turno y reserva, y carga los turnos."""
+    cursor.execute("""CREATE TABLE IF NOT EXISTS clientes (
+        clave INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL,
+        apellido TEXT NOT NULL
+    )""")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS salas (
+        clave INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL,
+        cupo INTEGER NOT NULL
+    )""")
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS turno (
+        clave_horario INTEGER PRIMARY KEY,
+        tipo_turno TEXT NOT NULL
+    )""")
+
+    cursor.execute("SELECT COUNT(*) FROM turno")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            "INSERT INTO turno (tipo_turno) VALUES (?)",
+            [("Matutino",), ("Vespertino",), ("Nocturno",)]
+        )
+
+    cursor.execute("""CREATE TABLE IF NOT EXISTS reserva (
+        folio INTEGER PRIMARY KEY,
+        fecha TIMESTAMP NOT NULL,
+        clave_sala INTEGER NOT NULL,
+        turno TEXT NOT NULL,
+        clave_cliente INTEGER NOT NULL,
+        evento TEXT NOT NULL,
+        creado TEXT NOT NULL,
+        estado TEXT NOT NULL DEFAULT 'ACTIVA',
+        FOREIGN KEY(clave_sala) REFERENCES salas(clave),
+        FOREIGN KEY(clave_cliente) REFERENCES clientes(clave)
+    )""")
+
+
+def _migracion_espacio_unico(cursor):
+    """Crea el índice único parcial por espacio. Si hay reservas activas duplicadas, no migra y las lista.
+
+    Las duplicadas son las que comparten fecha, turno y sala con otra activa de folio menor; el operador
+    decide cuáles cancelar antes de volver a abrir el programa.
+    """
+    duplicadas = [folio for (folio,) in cursor.execute("""SELECT folio FROM reserva
+        WHERE estado = 'ACTIVA' AND folio NOT IN (
+            SELECT MIN(folio) FROM reserva WHERE estado = 'ACTIVA'
+            GROUP BY fecha, turno, clave_sala
+        ) ORDER BY folio""").fetchall()]
+    if duplicadas:
+        listado = ", ".join(str(folio) for folio in duplicadas[:LIMITE_FOLIOS_EN_ERROR])
+        if len(duplicadas) > LIMITE_FOLIOS_EN_ERROR:
+            listado += ", ..."
+        raise Error(f"Hay {len(duplicadas)} reservas activas que repiten fecha, turno y sala de otra más antigua "
+                    f"(folios {listado}); cancélelas o corríjalas antes de migrar.")
+
+    cursor.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_reserva_espacio_activo
+        ON reserva (fecha, turno, clave_sala) WHERE estado = 'ACTIVA'""")
+
+
+def _migracion_indice_fecha(cursor):
+    """Crea el índice por fecha (y folio, implícito) que usan los listados por rango."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reserva_fecha ON reserva (fecha)")
+
+
+def _migracion_series(cursor):
+    """Agrega la columna serie para ligar las reservaciones recurrentes."""
+    cursor.execute("ALTER TABLE reserva ADD COLUMN serie INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reserva_serie ON reserva (serie)")
+
+
+def _crear_indices_busqueda_reserva(cursor):
+    """Crea el índice de búsqueda sobre reserva.evento y los disparadores que lo mantienen al día."""
+    cursor.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS reserva_fts USING fts5(
+        evento, content='reserva', content_rowid='folio',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""")
+    cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS reserva_fts_vocabulario USING fts5vocab(reserva_fts, 'row')")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS reserva_fts_insertar AFTER INSERT ON reserva BEGIN
+        INSERT INTO reserva_fts (rowid, evento) VALUES (new.folio, new.evento);
+    END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS reserva_fts_borrar AFTER DELETE ON reserva BEGIN
+        INSERT INTO reserva_fts (reserva_fts, rowid, evento) VALUES ('delete', old.folio, old.evento);
+    END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS reserva_fts_actualizar AFTER UPDATE OF evento ON reserva BEGIN
+        INSERT INTO reserva_fts (reserva_fts, rowid, evento) VALUES ('delete', old.folio, old.evento);
+        INSERT INTO reserva_fts (rowid, evento) VALUES (new.folio, new.evento);
+    END""")
+    cursor.execute("INSERT INTO reserva_fts (reserva_fts) VALUES ('rebuild')")
+
+
+def _migracion_busqueda_texto(cursor):
+    """Crea los índices FTS5 de clientes (nombre, apellido) y de eventos, mantenidos por disparadores."""
+    cursor.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+        nombre, apellido, content='clientes', content_rowid='clave',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""")
+    cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts_vocabulario USING fts5vocab(clientes_fts, 'row')")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS clientes_fts_insertar AFTER INSERT ON clientes BEGIN
+        INSERT INTO clientes_fts (rowid, nombre, apellido) VALUES (new.clave, new.nombre, new.apellido);
+    END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS clientes_fts_borrar AFTER DELETE ON clientes BEGIN
+        INSERT INTO clientes_fts (clientes_fts, rowid, nombre, apellido) VALUES ('delete', old.clave, old.nombre, old.apellido);
+    END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS clientes_fts_actualizar AFTER UPDATE ON clientes BEGIN
+        INSERT INTO clientes_fts (clientes_fts, rowid, nombre, apellido) VALUES ('delete', old.clave, old.nombre, old.apellido);
+        INSERT INTO clientes_fts (rowid, nombre, apellido) VALUES (new.clave, new.nombre, new.apellido);
+    END""")
+    cursor.execute("INSERT INTO clientes_fts (clientes_fts) VALUES ('rebuild')")
+
+    _crear_indices_busqueda_reserva(cursor)
+
+
+def _migracion_fechas_enteras(cursor):
+    """Reconstruye reserva con la fecha como número de día y el turno como clave de la tabla turno.
+
+    SQLite no cambia el tipo de una columna, así que se copia todo a una tabla nueva y se recrean sus
+    índices y los disparadores del índice de búsqueda. El espacio liberado se recupera con VACUUM.
+    """
+    cursor.execute("""SELECT COUNT(*) FROM reserva AS r
+        LEFT JOIN turno AS t ON UPPER(t.tipo_turno) = UPPER(r.turno)
+        WHERE t.clave_horario IS NULL OR julianday(r.fecha) IS NULL""")
+    invalidas = cursor.fetchone()[0]
+    if invalidas:
+        raise Error(f"Hay {invalidas} reservas con fecha o turno inválidos; corríjalas antes de migrar.")
+
+    cursor.execute("""CREATE TABLE reserva_nueva (
+        folio INTEGER PRIMARY KEY,
+        fecha INTEGER NOT NULL,
+        clave_sala INTEGER NOT NULL,
+        clave_turno INTEGER NOT NULL,
+        clave_cliente INTEGER NOT NULL,
+        evento TEXT NOT NULL,
+        creado TEXT NOT NULL,
+        estado TEXT NOT NULL DEFAULT 'ACTIVA',
+        serie INTEGER,
+        FOREIGN KEY(clave_sala) REFERENCES salas(clave),
+        FOREIGN KEY(clave_turno) REFERENCES turno(clave_horario),
+        FOREIGN KEY(clave_cliente) REFERENCES clientes(clave)
+    )""")
+    cursor.execute(f"""INSERT INTO reserva_nueva
+        (folio, fecha, clave_sala, clave_turno, clave_cliente, evento, creado, estado, serie)
+        SELECT r.folio, CAST(julianday(date(r.fecha)) - {DIA_JULIANO_DEL_ORDINAL_CERO} AS INTEGER), r.clave_sala,
+               t.clave_horario, r.clave_cliente, r.evento, r.creado, r.estado, r.serie
+        FROM reserva AS r JOIN turno AS t ON UPPER(t.tipo_turno) = UPPER(r.turno)""")
+    cursor.execute("DROP TABLE reserva")
+    cursor.execute("ALTER TABLE reserva_nueva RENAME TO reserva")
+
+    cursor.execute("""CREATE UNIQUE INDEX idx_reserva_espacio_activo
+        ON reserva (fecha, clave_turno, clave_sala) WHERE estado = 'ACTIVA'""")
+    cursor.execute("CREATE INDEX idx_reserva_fecha ON reserva (fecha)")
+    cursor.execute("CREATE INDEX idx_reserva_serie ON reserva (serie)")
+    _crear_indices_busqueda_reserva(cursor)
+
+
+def _migracion_archivo(cursor):
+    """Crea reserva_archivo, donde archivar_reservas mueve las reservas pasadas y las cancelaciones viejas."""
+    cursor.execute("""CREATE TABLE IF NOT EXISTS reserva_archivo (
+        folio INTEGER PRIMARY KEY,
+        fecha INTEGER NOT NULL,
+        clave_sala INTEGER NOT NULL,
+        clave_turno INTEGER NOT NULL,
+        clave_cliente INTEGER NOT NULL,
+        evento TEXT NOT NULL,
+        creado TEXT NOT NULL,
+        estado TEXT NOT NULL,
+        serie INTEGER,
+        archivado TEXT NOT NULL
+    )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reserva_archivo_fecha ON reserva_archivo (fecha, folio)")
+
+
+def _sumar_ocupacion(fila, signo):
+    """Devuelve las sentencias que suman (signo 1) o restan (signo -1) la reserva fila (new u old) a los acumulados."""
+    activas = f"{signo} * ({fila}.estado = 'ACTIVA')"
+    canceladas = f"{signo} * ({fila}.estado = 'CANCELADA')"
+    mes = f"strftime('%Y-%m', {fila}.fecha + {DIA_JULIANO_DEL_ORDINAL_CERO})"
+    return f"""
+        INSERT INTO ocupacion (mes, dia_semana, clave_sala, clave_turno, activas, canceladas)
+        VALUES ({mes}, ({fila}.fecha - 1) % 7, {fila}.clave_sala, {fila}.clave_turno, {activas}, {canceladas})
+        ON CONFLICT (mes, dia_semana, clave_sala, clave_turno) DO UPDATE
+        SET activas = activas + excluded.activas, canceladas = canceladas + excluded.canceladas;
+        INSERT INTO ocupacion_clientes (mes, clave_cliente, activas, canceladas)
+        VALUES ({mes}, {fila}.clave_cliente, {activas}, {canceladas})
+        ON CONFLICT (mes, clave_cliente) DO UPDATE
+        SET activas = activas + excluded.activas, canceladas = canceladas + excluded.canceladas;"""
+
+
+def _reconstruir_ocupacion(cursor):
+    """Vuelve a calcular los acumulados de ocupación a partir de reserva y reserva_archivo."""
+    mes = f"strftime('%Y-%m', fecha + {DIA_JULIANO_DEL_ORDINAL_CERO})"
+    cursor.execute("DELETE FROM ocupacion")
+    cursor.execute("DELETE FROM ocupacion_clientes")
+    cursor.execute(f"""INSERT INTO ocupacion (mes, dia_semana, clave_sala, clave_turno, activas, canceladas)
+        SELECT {mes}, (fecha - 1) % 7, clave_sala, clave_turno, SUM(estado = 'ACTIVA'), SUM(estado = 'CANCELADA')
+        FROM {FUENTE_CON_ARCHIVO} GROUP BY 1, 2, 3, 4""")
+    cursor.execute(f"""INSERT INTO ocupacion_clientes (mes, clave_cliente, activas, canceladas)
+        SELECT {mes}, clave_cliente, SUM(estado = 'ACTIVA'), SUM(estado = 'CANCELADA')
+        FROM {FUENTE_CON_ARCHIVO} GROUP BY 1, 2""")
+
+
+def _migracion_ocupacion(cursor):
+    """Crea los acumulados de ocupación por mes, día de la semana, sala, turno y cliente, y los disparadores que los mantienen.
+
+    Las reservas que se archivan salen de reserva y entran a reserva_archivo, así que los acumulados
+    no cambian al archivar. Editar solo el nombre del evento no toca los acumulados.
+    """
+    cursor.execute("""CREATE TABLE ocupacion (
+        mes TEXT NOT NULL,
+        dia_semana INTEGER NOT NULL,
+        clave_sala INTEGER NOT NULL,
+        clave_turno INTEGER NOT NULL,
+        activas INTEGER NOT NULL DEFAULT 0,
+        canceladas INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (mes, dia_semana, clave_sala, clave_turno)
+    ) WITHOUT ROWID""")
+    cursor.execute("""CREATE TABLE ocupacion_clientes (
+        mes TEXT NOT NULL,
+        clave_cliente INTEGER NOT NULL,
+        activas INTEGER NOT NULL DEFAULT 0,
+        canceladas INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (mes, clave_cliente)
+    ) WITHOUT ROWID""")
+
+    for tabla in ("reserva", "reserva_archivo"):
+        cursor.execute(f"""CREATE TRIGGER {tabla}_ocupacion_insertar AFTER INSERT ON {tabla} BEGIN
+            {_sumar_ocupacion("new", 1)}
+        END""")
+        cursor.execute(f"""CREATE TRIGGER {tabla}_ocupacion_borrar AFTER DELETE ON {tabla} BEGIN
+            {_sumar_ocupacion("old", -1)}
+        END""")
+    cursor.execute(f"""CREATE TRIGGER reserva_ocupacion_actualizar
+        AFTER UPDATE OF fecha, clave_sala, clave_turno, clave_cliente, estado ON reserva BEGIN
+            {_sumar_ocupacion("old", -1)}
+            {_sumar_ocupacion("new", 1)}
+        END""")
+
+    _reconstruir_ocupacion(cursor)
+
+
+def _migracion_indice_cupo(cursor):
+    """Índice por cupo para que la asignación de salas recorra las salas de menor a mayor cupo sin ordenar."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_salas_cupo ON salas (cupo, clave)")
+
+
+def _registrar_cambio(tabla, operacion, clave, datos):
+    """Devuelve la sentencia de disparador que agrega el cambio al registro de cambios."""
+    return f"INSERT INTO cambios (tabla, operacion, clave, datos) VALUES ('{tabla}', '{operacion}', {clave}, {datos});"
+
+
+def _migracion_cambios(cursor):
+    """Crea el registro de cambios (solo se agregan filas) y los disparadores que lo llenan en la misma transacción.
+
+    Se registran las reservas nuevas, sus cambios de evento, estado, fecha, sala, turno o cliente, y los
+    clientes y salas nuevos o modificados. Archivar no es un cambio: solo mueve la reserva de tabla.
+    consumidores_cambios guarda hasta qué cambio procesó cada sistema externo.
+    """
+    cursor.execute("""CREATE TABLE cambios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabla TEXT NOT NULL,
+        operacion TEXT NOT NULL,
+        clave INTEGER NOT NULL,
+        datos TEXT NOT NULL,
+        registrado TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    )""")
+    cursor.execute("""CREATE TABLE consumidores_cambios (
+        consumidor TEXT PRIMARY KEY,
+        ultimo_id INTEGER NOT NULL DEFAULT 0,
+        actualizado TEXT NOT NULL
+    )""")
+
+    datos_reserva = f"""json_object(
+        'folio', new.folio, 'fecha', date(new.fecha + {DIA_JULIANO_DEL_ORDINAL_CERO}), 'clave_sala', new.clave_sala,
+        'turno', (SELECT tipo_turno FROM turno WHERE clave_horario = new.clave_turno), 'clave_cliente', new.clave_cliente,
+        'evento', new.evento, 'estado', new.estado, 'serie', new.serie)"""
+    cursor.execute(f"""CREATE TRIGGER reserva_cambios_insertar AFTER INSERT ON reserva BEGIN
+        {_registrar_cambio("reserva", "INSERT", "new.folio", datos_reserva)}
+    END""")
+    cursor.execute(f"""CREATE TRIGGER reserva_cambios_actualizar
+        AFTER UPDATE OF fecha, clave_sala, clave_turno, clave_cliente, evento, estado ON reserva
+        WHEN (old.fecha, old.clave_sala, old.clave_turno, old.clave_cliente, old.evento, old.estado)
+            IS NOT (new.fecha, new.clave_sala, new.clave_turno, new.clave_cliente, new.evento, new.estado)
+    BEGIN
+        {_registrar_cambio("reserva", "UPDATE", "new.folio", datos_reserva)}
+    END""")
+
+    for tabla, datos in (
+        ("clientes", "json_object('clave', new.clave, 'nombre', new.nombre, 'apellido', new.apellido)"),
+        ("salas", "json_object('clave', new.clave, 'nombre', new.nombre, 'cupo', new.cupo)"),
+    ):
+        cursor.execute(f"""CREATE TRIGGER {tabla}_cambios_insertar AFTER INSERT ON {tabla} BEGIN
+            {_registrar_cambio(tabla, "INSERT", "new.clave", datos)}
+        END""")
+        cursor.execute(f"""CREATE TRIGGER {tabla}_cambios_actualizar AFTER UPDATE ON {tabla} BEGIN
+            {_registrar_cambio(tabla, "UPDATE", "new.clave", datos)}
+        END""")
+
+
+# Cada migración se aplica una sola vez; su posición (empezando en 1) es la versión que deja en PRAGMA user_version.
+MIGRACIONES = [
+    _migracion_tablas_base,
+    _migracion_espacio_unico,
+    _migracion_indice_fecha,
+    _migracion_series,
+    _migracion_busqueda_texto,
+    _migracion_fechas_enteras,
+    _migracion_archivo,
+    _migracion_ocupacion,
+    _migracion_indice_cupo,
+    _migracion_cambios,
+]
+
+
+def aplicar_migraciones(conn):
+    """Aplica, cada una en su propia transacción, las migraciones posteriores a la versión guardada en la base."""
+    cursor = conn.cursor()
+    version_actual = cursor.execute("PRAGMA user_version").fetchone()[0]
+
+    for version, migracion in enumerate(MIGRACIONES, start=1):
+        if version <= version_actual:
+            continue
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            migracion(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            invalidar_cache()
+    return len(MIGRACIONES)
+
+
+@instrumentado
+def inicializar_base_de_datos():
+    """Deja la base de datos en la versión de esquema más reciente. Solo trabaja la primera vez que se llama."""
+    global _base_inicializada
+    if _base_inicializada:
+        return
+    aplicar_migraciones(obtener_conexion())
+    _base_inicializada = True
+
+
+LIMITE_LISTA_CLIENTES = 30
 
 
 def mostrar_clientes_ordenados():
-    """Muestra los clientes de la base de datos ordenados alfabéticamente y permite seleccionar uno."""
+    """Muestra los clientes ordenados alfabéticamente (o permite buscarlos por nombre) y permite seleccionar uno."""
     try:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
+        with obtener_conexion() as conn:
             mi_cursor = conn.cursor()
+            mostrar_lista = True
 
             while True:
-                mi_cursor.execute("SELECT clave, apellido, nombre FROM clientes ORDER BY apellido, nombre")
-                clientes = mi_cursor.fetchall()
-                
-                if not clientes:
+                total_clientes = contar_clientes()
+
+                if total_clientes == 0:
                     print("\nNo hay clientes registrados aún.")
                     return None
 
-                print("\n" + "=" * 30)
-                print(f"{'LISTA DE CLIENTES':^28}")
-                print("=" * 30)
-                for clave, apellido, nombre in clientes:
-                    print(f"{clave} - {apellido}, {nombre}")
+                if mostrar_lista and total_clientes <= LIMITE_LISTA_CLIENTES:
+                    print("\n" + "=" * 30)
+                    print(f"{'LISTA DE CLIENTES':^28}")
+                    print("=" * 30)
+                    for clave, apellido, nombre in obtener_clientes():
+                        print(f"{clave} - {apellido}, {nombre}")
+                elif mostrar_lista:
+                    print(f"\nHay {total_clientes} clientes registrados. Escriba parte del nombre o apellido para buscarlo.")
+                mostrar_lista = True
 
-                respuesta_clave_cliente = input("\nIngrese la clave del cliente (o escriba 'EXIT' para cancelar): ").strip().upper()
+                respuesta_clave_cliente = input("\nIngrese la clave del cliente o parte de su nombre (o escriba 'EXIT' para cancelar): ").strip().upper()
 
                 if respuesta_clave_cliente == "EXIT":
                     print("\nOperación cancelada.")
                     return None
 
-                for clave, apellido, nombre in clientes:
-                    if str(clave) == respuesta_clave_cliente:
+                if respuesta_clave_cliente.isdigit():
+                    mi_cursor.execute("SELECT clave, apellido, nombre FROM clientes WHERE clave = ?", (int(respuesta_clave_cliente),))
+                    cliente = mi_cursor.fetchone()
+                    if cliente:
+                        clave, apellido, nombre = cliente
                         print(f"\nCliente seleccionado: {apellido.upper()}, {nombre.upper()}")
                         return clave, apellido, nombre
-          
-                print("\nNo existe esa clave. Se muestra la lista nuevamente:")
+                    print("\nNo existe esa clave. Intente de nuevo:")
+                    continue
+
+                coincidencias = buscar_clientes(respuesta_clave_cliente) if respuesta_clave_cliente else []
+                if not coincidencias:
+                    print("\nNo se encontraron clientes con ese nombre. Intente de nuevo:")
+                    continue
+
+                print("\n" + "=" * 30)
+                print(f"{'CLIENTES ENCONTRADOS':^28}")
+                print("=" * 30)
+                for clave, apellido, nombre in coincidencias:
+                    print(f"{clave} - {apellido}, {nombre}")
+                mostrar_lista = False
+
+    except Error as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+def _normalizar_termino(texto):
+    """Pasa el texto a minúsculas y sin acentos, igual que el tokenizador de los índices de búsqueda."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def _expresion_busqueda(texto, tabla_vocabulario=None):
+    """Arma la expresión MATCH de FTS5 con búsqueda por prefijo de cada palabra escrita.
+
+    Si se indica la tabla de vocabulario, cada palabra se reemplaza por los términos indexados más
+    parecidos, para tolerar errores de escritura.
+    """
+    terminos = re.findall(r"\w+", _normalizar_termino(texto))
+    if not terminos:
+        return None
+
+    grupos = []
+    for termino in terminos:
+        alternativas = [termino]
+        if tabla_vocabulario:
+            candidatos = [candidato for (candidato,) in obtener_conexion().execute(
+                f"SELECT term FROM {tabla_vocabulario} WHERE term >= ? AND term < ? AND length(term) BETWEEN ? AND ?",
+                (termino[0], termino[0] + "\uffff", len(termino) - 2, len(termino) + 2)
+            )]
+            alternativas = difflib.get_close_matches(termino, candidatos, n=3, cutoff=0.7)
+            if not alternativas:
+                return None
+        grupos.append("(" + " OR ".join(f'"{alternativa}"*' for alternativa in alternativas) + ")")
+    return " AND ".join(grupos)
+
+
+def _buscar_en_indice(consulta, texto, tabla_vocabulario, limite):
+    """Busca primero por prefijo y, si no hay resultados, con las correcciones del vocabulario."""
+    for vocabulario in (None, tabla_vocabulario):
+        expresion = _expresion_busqueda(texto, vocabulario)
+        if expresion is None:
+            continue
+        resultados = obtener_conexion().execute(consulta, (expresion, limite)).fetchall()
+        if resultados:
+            return resultados
+    return []
+
+
+@instrumentado
+def buscar_clientes(texto, limite=10):
+    """Devuelve hasta `limite` clientes (clave, apellido, nombre) cuyo nombre o apellido coincide con el texto."""
+    return _buscar_en_indice(
+        "SELECT c.clave, c.apellido, c.nombre FROM clientes_fts "
+        "JOIN clientes AS c ON c.clave = clientes_fts.rowid "
+        "WHERE clientes_fts MATCH ? ORDER BY rank LIMIT ?",
+        texto, "clientes_fts_vocabulario", limite
+    )
+
+
+@instrumentado
+def buscar_reservas_por_evento(texto, limite=10):
+    """Devuelve hasta `limite` reservas (folio, fecha, evento, estado, sala, cliente) cuyo evento coincide con el texto."""
+    reservas = _buscar_en_indice(
+        "SELECT r.folio, r.fecha, r.evento, r.estado, COALESCE(s.nombre, ''), "
+        "TRIM(COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, '')) "
+        "FROM reserva_fts "
+        "JOIN reserva AS r ON r.folio = reserva_fts.rowid "
+        "LEFT JOIN salas AS s ON s.clave = r.clave_sala "
+        "LEFT JOIN clientes AS c ON c.clave = r.clave_cliente "
+        "WHERE reserva_fts MATCH ? ORDER BY rank LIMIT ?",
+        texto, "reserva_fts_vocabulario", limite
+    )
+    return [(folio, fecha_de_dia(dia), *resto) for folio, dia, *resto in reservas]
+
+
+@instrumentado
+def buscar_reservas_por_nombre_de_evento():
+    """Busca reservaciones escribiendo parte del nombre del evento."""
+    texto = input("\nIngrese parte del nombre del evento (o escriba 'EXIT' para cancelar): ").strip()
+    if texto.upper() == "EXIT" or texto == "":
+        print("\nOperación cancelada.")
+        return
+
+    try:
+        reservas = buscar_reservas_por_evento(texto, limite=20)
+        if not reservas:
+            print("\nNo se encontraron reservaciones con ese nombre de evento.\n")
+            return
+
+        filas = [
+            [folio, fecha.strftime("%m-%d-%Y"), evento, estado, sala, cliente]
+            for folio, fecha, evento, estado, sala, cliente in reservas
+        ]
+        print(tabulate(filas, headers=["FOLIO", "FECHA", "EVENTO", "ESTADO", "SALA", "CLIENTE"], tablefmt="grid"))
 
     except Error as e:
         print(e)
@@ -116,7 +1038,7 @@ def seleccionar_fecha_reservacion():
 
         try:
             fecha_convertida = datetime.datetime.strptime(fecha_reserva, "%m-%d-%Y").date()
-            fecha_minima = datetime.date.today() + datetime.timedelta(days=2)
+            fecha_minima = datetime.date.today() + datetime.timedelta(days=DIAS_ANTICIPACION)
             
             if fecha_convertida < fecha_minima:
                 print(f"\nLa fecha debe ser al menos dos días posteriores a hoy ({datetime.date.today().strftime('%m-%d-%Y')}).")
@@ -151,37 +1073,33 @@ def seleccionar_fecha_reservacion():
 def seleccionar_turno():
     """Permite seleccionar un turno válido desde la tabla turno."""
     try:
-        with sqlite3.connect ("ReservasCoworking.db") as conn:
-            cursor = conn.cursor()
-
-            while True:
-                cursor.execute("SELECT clave_horario, tipo_turno FROM turno")
-                filas = cursor.fetchall()
-                
-                if not filas:
-                    print("\nNo hay turnos definidos en la base de datos.")
-                    return None
+        while True:
+            filas = obtener_turnos()
+            
+            if not filas:
+                print("\nNo hay turnos definidos en la base de datos.")
+                return None
 
-                TURNOS = {str(clave): descripcion for clave, descripcion in filas}
+            TURNOS = {str(clave): descripcion for clave, descripcion in filas}
 
-                print("\n" + "=" * 40)
-                print(f"{'TURNOS DISPONIBLES':^38}")
-                print("=" * 40)
-                for clave, descripcion in TURNOS.items():
-                    print(f"{clave} - {descripcion}")
+            print("\n" + "=" * 40)
+            print(f"{'TURNOS DISPONIBLES':^38}")
+            print("=" * 40)
+            for clave, descripcion in TURNOS.items():
+                print(f"{clave} - {descripcion}")
 
-                respuesta_turno = input("\nIngrese la clave del turno (o escriba 'EXIT' para volver): ").strip().upper()
+            respuesta_turno = input("\nIngrese la clave del turno (o escriba 'EXIT' para volver): ").strip().upper()
 
-                if respuesta_turno == "EXIT":
-                    print("Regresando al menú...")
-                    return None
-                
+            if respuesta_turno == "EXIT":
+                print("Regresando al menú...")
+                return None
+            
 
-                if respuesta_turno not in TURNOS:
-                    print("\nOpción de turno inválida. Intente de nuevo.")
-                    continue
+            if respuesta_turno not in TURNOS:
+                print("\nOpción de turno inválida. Intente de nuevo.")
+                continue
 
-                return TURNOS[respuesta_turno]
+            return TURNOS[respuesta_turno]
 
     except Error as e:
         print(e)
@@ -189,41 +1107,158 @@ def seleccionar_turno():
         print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
 
 
+@instrumentado
+def consultar_salas_disponibles(fecha_reserva, turno):
+    """Devuelve las salas (clave, nombre, cupo) que no tienen reserva activa en la fecha y turno indicados."""
+    ocupadas = {clave for (clave,) in obtener_conexion().execute(
+        "SELECT clave_sala FROM reserva WHERE fecha = ? AND clave_turno = ? AND estado = 'ACTIVA'",
+        (dia_de_fecha(fecha_reserva), clave_de_turno(turno))
+    )}
+    return [sala for sala in obtener_salas() if sala[0] not in ocupadas]
+
+
+# Salas libres de un espacio con cupo suficiente, de menor a mayor cupo. idx_salas_cupo da el orden y cada
+# sala se descarta con una búsqueda en idx_reserva_espacio_activo, así que la consulta se detiene en cuanto
+# junta las salas pedidas, aunque haya miles.
+CONSULTA_SALAS_CON_CUPO = """
+    SELECT s.clave, s.nombre, s.cupo
+    FROM salas AS s INDEXED BY idx_salas_cupo
+    WHERE s.cupo >= ? AND NOT EXISTS (
+        SELECT 1 FROM reserva AS r
+        WHERE r.fecha = ? AND r.clave_turno = ? AND r.clave_sala = s.clave AND r.estado = 'ACTIVA'
+    )
+    ORDER BY s.cupo, s.clave
+    LIMIT ?
+"""
+
+ALTERNATIVAS_SALA = 3
+
+
+@instrumentado
+def sugerir_salas(asistentes, fecha_reserva, turno, alternativas=ALTERNATIVAS_SALA):
+    """Devuelve la sala libre más chica en la que caben los asistentes, seguida de hasta `alternativas` salas más.
+
+    Cada sala es (clave, nombre, cupo, asientos sobrantes), de menor a mayor cupo. Lista vacía si ninguna cabe.
+    """
+    salas = obtener_conexion().execute(
+        CONSULTA_SALAS_CON_CUPO, (asistentes, dia_de_fecha(fecha_reserva), clave_de_turno(turno), alternativas + 1)
+    ).fetchall()
+    return [(clave, nombre, cupo, cupo - asistentes) for clave, nombre, cupo in salas]
+
+
+def _repartir_salas(solicitudes, salas_libres):
+    """Asigna a cada solicitud (índice, asistentes) una sala distinta de salas_libres [(cupo, clave)] ya ordenadas.
+
+    Atiende primero a los grupos más grandes y a cada uno le da la sala más chica en la que cabe. Como toda
+    sala que sirve a un grupo sirve también a los más chicos, así se coloca el mayor número de solicitudes
+    y se usan las salas de menor cupo posibles. Devuelve {índice: (cupo, clave)}.
+    """
+    asignaciones = {}
+    for indice, asistentes in sorted(solicitudes, key=lambda solicitud: (-solicitud[1], solicitud[0])):
+        posicion = bisect.bisect_left(salas_libres, (asistentes, 0))
+        if posicion < len(salas_libres):
+            asignaciones[indice] = salas_libres.pop(posicion)
+    return asignaciones
+
+
+@instrumentado
+@con_reintentos
+def asignar_salas_en_lote(solicitudes, reservar=False):
+    """Coloca varias solicitudes a la vez minimizando los asientos sobrantes, y opcionalmente las reserva.
+
+    Cada solicitud es un diccionario con asistentes, fecha y turno (y cliente y evento si reservar=True).
+    Las solicitudes del mismo espacio (fecha y turno) compiten por las mismas salas libres. Con reservar=True
+    todo ocurre en una sola transacción, así que nadie más puede ocupar las salas entre la asignación y la
+    reserva. Devuelve, en el orden recibido, un diccionario por solicitud con la sala asignada (clave_sala,
+    cupo, sobrantes y folio si se reservó) o con el motivo por el que no se colocó.
+    """
+    resultados = [None] * len(solicitudes)
+    por_espacio = {}
+    for indice, solicitud in enumerate(solicitudes):
+        error_validacion = None
+        if solicitud["asistentes"] <= 0:
+            error_validacion = "El número de asistentes debe ser un entero positivo."
+        elif reservar:
+            error_validacion = validar_reserva(solicitud["cliente"], solicitud["fecha"], None, solicitud["turno"])
+        else:
+            error_validacion = validar_turno(solicitud["turno"])
+        if error_validacion:
+            resultados[indice] = {"motivo": error_validacion}
+            continue
+        espacio = (dia_de_fecha(solicitud["fecha"]), clave_de_turno(solicitud["turno"]))
+        por_espacio.setdefault(espacio, []).append((indice, solicitud["asistentes"]))
+
+    with transaccion() if reservar else contextlib.nullcontext(obtener_conexion()) as conn:
+        for (dia, clave_turno), pendientes in por_espacio.items():
+            salas_libres = [(cupo, clave) for clave, _, cupo in conn.execute(
+                CONSULTA_SALAS_CON_CUPO, (min(asistentes for _, asistentes in pendientes), dia, clave_turno, -1)
+            )]
+            asignaciones = _repartir_salas(pendientes, salas_libres)
+            for indice, asistentes in pendientes:
+                if indice not in asignaciones:
+                    resultados[indice] = {"motivo": "No hay una sala libre con cupo suficiente en ese turno y fecha."}
+                    continue
+                cupo, clave_sala = asignaciones[indice]
+                resultados[indice] = {"clave_sala": clave_sala, "cupo": cupo, "sobrantes": cupo - asistentes}
+                if reservar:
+                    solicitud = solicitudes[indice]
+                    resultados[indice]["folio"] = reservar_sala(
+                        solicitud["cliente"], solicitud["fecha"], clave_sala, solicitud["turno"], solicitud["evento"]
+                    )
+    return resultados
+
+
+def pedir_asistentes():
+    """Pide el número de asistentes. Devuelve el número, o None si el usuario deja el dato vacío."""
+    while True:
+        respuesta = input("\nIngrese el número de asistentes (o presione ENTER para ver todas las salas libres): ").strip()
+        if respuesta == "":
+            return None
+        if respuesta.isdigit() and int(respuesta) > 0:
+            return int(respuesta)
+        print("\nEl número de asistentes debe ser un entero positivo.")
+
+
 def seleccionar_sala(fecha_reserva, turno_seleccionado):
-    """Permite seleccionar una sala disponible para la fecha y turno indicados."""
+    """Permite seleccionar una sala disponible para la fecha y turno indicados.
+
+    Si se indica el número de asistentes, solo se muestran las salas donde caben, empezando por la más
+    ajustada, que es la recomendada.
+    """
     try:
-        fecha_texto_sql = fecha_reserva.strftime("%Y-%m-%d")
         fecha_texto_usuario = fecha_reserva.strftime("%m-%d-%Y")
+        asistentes = pedir_asistentes()
+        if asistentes is None:
+            salas_disponibles = consultar_salas_disponibles(fecha_reserva, turno_seleccionado)
+        else:
+            salas_disponibles = [
+                (clave, nombre, cupo) for clave, nombre, cupo, _ in sugerir_salas(asistentes, fecha_reserva, turno_seleccionado)
+            ]
 
-        with sqlite3.connect("ReservasCoworking.db") as conn:
-            mi_cursor = conn.cursor()
-            mi_cursor.execute(
-                "SELECT clave, nombre, cupo FROM salas WHERE clave NOT IN ("
-                "SELECT clave_sala FROM reserva WHERE fecha = ? AND turno = ?)",
-                (fecha_texto_sql, turno_seleccionado)
-            )
-            salas_disponibles = mi_cursor.fetchall()
-
-            if not salas_disponibles:
+        if not salas_disponibles:
+            if asistentes is None:
                 print(f"\nNo hay salas disponibles el {fecha_texto_usuario} en ese turno.")
-                return None
+            else:
+                print(f"\nNo hay salas disponibles para {asistentes} personas el {fecha_texto_usuario} en ese turno.")
+            return None
 
-            print("\n" + "=" * 50)
-            print(f"SALAS DISPONIBLES el {fecha_texto_usuario} en turno {turno_seleccionado}")
-            print("=" * 50)
-            for clave_sala, nombre_sala, cupo_sala in salas_disponibles:
-                print(f"\n{clave_sala} - Sala {nombre_sala} para {cupo_sala} personas")
+        print("\n" + "=" * 50)
+        print(f"SALAS DISPONIBLES el {fecha_texto_usuario} en turno {turno_seleccionado}")
+        print("=" * 50)
+        for numero, (clave_sala, nombre_sala, cupo_sala) in enumerate(salas_disponibles):
+            recomendada = " (recomendada)" if asistentes is not None and numero == 0 else ""
+            print(f"\n{clave_sala} - Sala {nombre_sala} para {cupo_sala} personas{recomendada}")
 
-            while True:
-                respuesta_sala = input("\nIngrese la clave de la sala (o escriba 'BACK' para volver a elegir turno): ").strip().upper()
-                if respuesta_sala == "BACK":
-                    return "BACK"
+        while True:
+            respuesta_sala = input("\nIngrese la clave de la sala (o escriba 'BACK' para volver a elegir turno): ").strip().upper()
+            if respuesta_sala == "BACK":
+                return "BACK"
 
-                for clave_sala, nombre_sala, cupo_sala in salas_disponibles:
-                    if str(clave_sala) == respuesta_sala:
-                        return clave_sala
+            for clave_sala, nombre_sala, cupo_sala in salas_disponibles:
+                if str(clave_sala) == respuesta_sala:
+                    return clave_sala
 
-                print("\nClave de sala inválida. Intente de nuevo.")
+            print("\nClave de sala inválida. Intente de nuevo.")
 
     except Error as e:
         print(e)
@@ -247,6 +1282,27 @@ def asignar_nombre_evento():
             return nombre_evento
         
 
+@instrumentado
+@con_reintentos
+def reservar_sala(clave_cliente, fecha_reserva, clave_sala, turno, evento):
+    """Inserta la reserva en una sola operación atómica. Devuelve el folio, o None si el espacio ya está ocupado."""
+    fecha_creacion = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    reserva_nueva = (
+        dia_de_fecha(fecha_reserva), clave_sala, clave_de_turno(turno), clave_cliente, evento.capitalize(), fecha_creacion
+    )
+
+    try:
+        with transaccion() as conn:
+            mi_cursor = conn.execute("""
+                INSERT INTO reserva (fecha, clave_sala, clave_turno, clave_cliente, evento, creado)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, reserva_nueva)
+            return mi_cursor.lastrowid
+    except sqlite3.IntegrityError:
+        return None
+
+
+@instrumentado
 def registrar_reserva_de_sala():
     """Unifica funciones para ser colocado en el menú."""
     resultado_cliente = mostrar_clientes_ordenados()
@@ -276,33 +1332,15 @@ def registrar_reserva_de_sala():
                 if nombre_evento_final == "BACK":
                     break 
 
-                fecha_texto = fecha_reserva.strftime("%Y-%m-%d")
-                fecha_creacion = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
                 try:
-                    with sqlite3.connect("ReservasCoworking.db") as conn:
-                        mi_cursor = conn.cursor()
-
-                        mi_cursor.execute("""
-                            SELECT COUNT(*) FROM reserva 
-                            WHERE fecha = ? AND clave_sala = ? AND turno = ?
-                        """, (fecha_texto, clave_sala, turno_seleccionado))
-                        existe_reserva = mi_cursor.fetchall()[0][0]
-
-                        if existe_reserva > 0:
-                            print("\nLa sala ya está reservada para ese turno y fecha. Intente con otra sala o turno.")
-                            break  
-                        reserva_nueva = (
-                            fecha_texto, clave_sala, turno_seleccionado, clave_cliente,
-                            nombre_evento_final.capitalize(), fecha_creacion
-                        )
-                        mi_cursor.execute("""
-                            INSERT INTO reserva (fecha, clave_sala, turno, clave_cliente, evento, creado)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, reserva_nueva)
-                        conn.commit()
-
-                        print(f"\nReserva confirmada con folio: {mi_cursor.lastrowid}")
+                    folio = reservar_sala(
+                        clave_cliente, fecha_reserva, clave_sala, turno_seleccionado, nombre_evento_final
+                    )
+                    if folio is None:
+                        print("\nLa sala ya está reservada para ese turno y fecha. Intente con otra sala o turno.")
+                        break
+
+                    print(f"\nReserva confirmada con folio: {folio}")
                     return  
 
                 except Error as e:
@@ -311,17 +1349,416 @@ def registrar_reserva_de_sala():
                     print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
 
 
+# Columnas comunes a reserva y reserva_archivo, en el orden en que se copian al archivar.
+COLUMNAS_RESERVA = "folio, fecha, clave_sala, clave_turno, clave_cliente, evento, creado, estado, serie"
+
+# Vista de todas las reservas, vigentes y archivadas. SQLite empuja los filtros de fecha y estado
+# dentro de cada rama del UNION ALL, así que cada tabla se sigue leyendo por su índice de fecha.
+FUENTE_CON_ARCHIVO = f"""(
+    SELECT {COLUMNAS_RESERVA} FROM reserva
+    UNION ALL
+    SELECT {COLUMNAS_RESERVA} FROM reserva_archivo
+)"""
+
+
+def _tabla_reservas(fecha_inicio, incluir_canceladas=False):
+    """Devuelve la fuente que deben leer los reportes que empiezan en fecha_inicio.
+
+    Mientras el rango no llegue a las fechas archivadas basta con la tabla reserva; si llega, se lee
+    también reserva_archivo. La fecha archivada más reciente se guarda en el cache del hilo. Con
+    incluir_canceladas se cuenta también la fecha de las canceladas archivadas.
+    """
+    condicion = "" if incluir_canceladas else " WHERE estado = 'ACTIVA'"
+    ultimo_dia_archivado = _consultar_con_cache(
+        "reserva_archivo", f"SELECT MAX(fecha) FROM reserva_archivo{condicion}"
+    )[0][0]
+    if ultimo_dia_archivado is None or dia_de_fecha(fecha_inicio) > ultimo_dia_archivado:
+        return "reserva"
+    return FUENTE_CON_ARCHIVO
+
+
+def existen_reservas():
+    """Indica si existe al menos una reserva, vigente o archivada, sin contar la tabla completa."""
+    return obtener_conexion().execute(f"SELECT EXISTS (SELECT 1 FROM {FUENTE_CON_ARCHIVO})").fetchone()[0] == 1
+
+
+TAMANO_PAGINA = 20
+
+CONSULTA_PAGINA_RESERVAS = """
+    SELECT r.folio,
+           r.fecha,
+           COALESCE(s.nombre, ''),
+           TRIM(COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, '')),
+           r.evento,
+           COALESCE(t.tipo_turno, '')
+    FROM {reserva} AS r
+    LEFT JOIN salas AS s ON s.clave = r.clave_sala
+    LEFT JOIN clientes AS c ON c.clave = r.clave_cliente
+    LEFT JOIN turno AS t ON t.clave_horario = r.clave_turno
+    WHERE {condiciones} AND (r.fecha, r.folio) > (?, ?)
+    ORDER BY r.fecha, r.folio
+    LIMIT ?
+"""
+
+
+def _filtros_reservas(fecha_inicio, fecha_fin, clave_sala=None, clave_cliente=None, turno=None):
+    """Arma las condiciones WHERE (sobre el alias r) y sus parámetros para las reservas activas de un rango."""
+    condiciones = ["r.estado = 'ACTIVA'", "r.fecha BETWEEN ? AND ?"]
+    parametros = [dia_de_fecha(fecha_inicio), dia_de_fecha(fecha_fin)]
+
+    if clave_sala is not None:
+        condiciones.append("r.clave_sala = ?")
+        parametros.append(clave_sala)
+    if clave_cliente is not None:
+        condiciones.append("r.clave_cliente = ?")
+        parametros.append(clave_cliente)
+    if turno is not None:
+        condiciones.append("r.clave_turno = ?")
+        parametros.append(clave_de_turno(turno))
+
+    return " AND ".join(condiciones), parametros
+
+
+def paginar_reservas(fecha_inicio, fecha_fin, clave_sala=None, clave_cliente=None, turno=None,
+                     tamano_pagina=TAMANO_PAGINA, incluir_archivo=True):
+    """Genera, página por página, las reservas activas del rango con paginación por llave (fecha, folio).
+
+    Cada fila es (folio, fecha, sala, cliente, evento, turno). Cada página cuesta lo mismo sin importar
+    qué tan largo sea el rango, porque la consulta retoma justo después de la última fila entregada.
+    Con incluir_archivo=False solo se listan las reservas vigentes (las únicas que se pueden modificar).
+    """
+    condiciones, parametros = _filtros_reservas(fecha_inicio, fecha_fin, clave_sala, clave_cliente, turno)
+    tabla = _tabla_reservas(fecha_inicio) if incluir_archivo else "reserva"
+    consulta = CONSULTA_PAGINA_RESERVAS.format(reserva=tabla, condiciones=condiciones)
+    ultima_llave = (0, 0)
+
+    while True:
+        pagina = obtener_conexion().execute(consulta, (*parametros, *ultima_llave, tamano_pagina)).fetchall()
+        if not pagina:
+            return
+        yield [(folio, fecha_de_dia(dia), *resto) for folio, dia, *resto in pagina]
+        if len(pagina) < tamano_pagina:
+            return
+        ultima_llave = (pagina[-1][1], pagina[-1][0])
+
+
+def listar_reservas_paginadas(fecha_inicio, fecha_fin, dato_solicitado):
+    """Muestra las reservas del rango por páginas y devuelve lo que escriba el usuario en lugar de ENTER.
+
+    Devuelve None si no hay reservas y "" si se recorrieron todas las páginas sin escribir nada.
+    """
+    hay_reservas = False
+    for pagina in paginar_reservas(fecha_inicio, fecha_fin, incluir_archivo=False):
+        hay_reservas = True
+        lista_mostrar = [
+            [folio, evento, fecha.strftime("%m-%d-%Y")]
+            for folio, fecha, _, _, evento, _ in pagina
+        ]
+        print(tabulate(lista_mostrar, headers=["Folio", "Evento", "Fecha"], tablefmt="grid"))
+
+        if len(pagina) < TAMANO_PAGINA:
+            break
+        respuesta = input(f"\nPresione ENTER para ver más reservas, o ingrese {dato_solicitado} (o 'EXIT'): ").strip()
+        if respuesta:
+            return respuesta
+
+    return "" if hay_reservas else None
+
+
+def pedir_fecha(mensaje):
+    """Pide una fecha mm-dd-aaaa hasta que sea válida. Devuelve None si el usuario escribe EXIT."""
+    while True:
+        fecha_texto = input(f"\n{mensaje} (mm-dd-aaaa) o escriba 'EXIT' para cancelar: ").strip()
+        if fecha_texto.upper() == "EXIT":
+            print("\nOperación cancelada.\n")
+            return None
+        if fecha_texto == "":
+            print("\nNo se puede dejar vacío el dato.")
+            continue
+        try:
+            return datetime.datetime.strptime(fecha_texto, "%m-%d-%Y").date()
+        except ValueError:
+            print("\nFormato incorrecto. Intente de nuevo.")
+
+
+def pedir_filtro_opcional(mensaje, valores_validos):
+    """Pide un filtro opcional; ENTER significa sin filtro. Devuelve el valor normalizado o None."""
+    while True:
+        respuesta = input(f"\n{mensaje} (ENTER para no filtrar): ").strip().upper()
+        if respuesta == "":
+            return None
+        if respuesta in valores_validos:
+            return valores_validos[respuesta]
+        print("\nValor no válido. Intente de nuevo.")
+
+
+@instrumentado
+def consultar_reservas_por_rango():
+    """Consulta las reservas de una semana, un mes o un rango de fechas, con filtros opcionales, por páginas."""
+    print("\n" + "=" * 30)
+    print(f"{'TIPO DE RANGO':^28}")
+    print("=" * 30)
+    print("1. Semana")
+    print("2. Mes")
+    print("3. Rango personalizado")
+
+    try:
+        opcion_rango = int(input("\nSeleccione el tipo de rango: ").strip())
+    except ValueError:
+        print("\nSolo se aceptan números enteros de los que están disponibles (1-3).")
+        return
+
+    if opcion_rango not in (1, 2, 3):
+        print("Opción inválida.")
+        return
+
+    fecha_inicio = pedir_fecha("Ingrese la fecha inicial")
+    if not fecha_inicio:
+        return
+
+    if opcion_rango == 1:
+        fecha_fin = fecha_inicio + datetime.timedelta(days=6)
+    elif opcion_rango == 2:
+        fecha_inicio = fecha_inicio.replace(day=1)
+        siguiente_mes = (fecha_inicio + datetime.timedelta(days=32)).replace(day=1)
+        fecha_fin = siguiente_mes - datetime.timedelta(days=1)
+    else:
+        while True:
+            fecha_fin = pedir_fecha("Ingrese la fecha final")
+            if not fecha_fin:
+                return
+            if fecha_fin < fecha_inicio:
+                print("\nLa fecha final no puede ser anterior a la inicial.")
+                continue
+            break
+
+    try:
+        salas = {str(clave): clave for clave, _, _ in obtener_salas()}
+        clientes = {str(clave): clave for clave, _, _ in obtener_clientes()}
+        turnos = {tipo.upper(): tipo for _, tipo in obtener_turnos()}
+
+        clave_sala = pedir_filtro_opcional("Clave de sala", salas)
+        clave_cliente = pedir_filtro_opcional("Clave de cliente", clientes)
+        turno = pedir_filtro_opcional(f"Turno ({', '.join(turnos.values())})", turnos)
+
+        titulo = f"RESERVACIONES DEL {fecha_inicio.strftime('%m-%d-%Y')} AL {fecha_fin.strftime('%m-%d-%Y')}"
+        hay_reservas = False
+        for pagina in paginar_reservas(fecha_inicio, fecha_fin, clave_sala, clave_cliente, turno):
+            if not hay_reservas:
+                print("\n" + titulo)
+            hay_reservas = True
+            filas = [
+                [folio, fecha.strftime("%m-%d-%Y"), sala, cliente, evento, turno_reserva]
+                for folio, fecha, sala, cliente, evento, turno_reserva in pagina
+            ]
+            print(tabulate(filas, headers=["FOLIO", "FECHA", "SALA", "CLIENTE", "EVENTO", "TURNO"], tablefmt="grid"))
+
+            if len(pagina) == TAMANO_PAGINA:
+                if input("\nPresione ENTER para ver la siguiente página o escriba 'EXIT' para terminar: ").strip().upper() == "EXIT":
+                    return
+
+        if not hay_reservas:
+            print("\nNo hay reservas en este rango.\n")
+
+    except Error as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+def generar_fechas_serie(fecha_inicio, cada_dias=7, fecha_limite=None, repeticiones=None):
+    """Devuelve las fechas de una serie: cada N días desde fecha_inicio hasta una fecha límite o un número de repeticiones."""
+    if cada_dias <= 0:
+        raise ValueError("El intervalo de la serie debe ser de al menos un día.")
+    if fecha_limite is None and repeticiones is None:
+        raise ValueError("Indique la fecha límite o el número de repeticiones de la serie.")
+
+    fechas = []
+    fecha = fecha_inicio
+    while (fecha_limite is None or fecha <= fecha_limite) and (repeticiones is None or len(fechas) < repeticiones):
+        fechas.append(fecha)
+        fecha += datetime.timedelta(days=cada_dias)
+    return fechas
+
+
+@instrumentado
+@con_reintentos
+def reservar_serie(clave_cliente, clave_sala, turno, evento, fecha_inicio, cada_dias=7, fecha_limite=None, repeticiones=None):
+    """Reserva en una sola transacción todas las fechas libres de una serie recurrente.
+
+    Las fechas que no cumplen las reglas de reservación o que ya están ocupadas se reportan juntas y no
+    se insertan. Devuelve un diccionario con la clave de la serie, los folios creados, las fechas en
+    conflicto y las fechas rechazadas con su motivo.
+    """
+    fechas = generar_fechas_serie(fecha_inicio, cada_dias, fecha_limite, repeticiones)
+    rechazadas = []
+    fechas_validas = []
+    for fecha in fechas:
+        error_validacion = validar_fecha_reserva(fecha)
+        if error_validacion:
+            rechazadas.append((fecha, error_validacion))
+        else:
+            fechas_validas.append(dia_de_fecha(fecha))
+
+    resultado = {"serie": None, "folios": [], "conflictos": [], "rechazadas": rechazadas}
+    if not fechas_validas:
+        return resultado
+
+    fecha_creacion = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    clave_turno = clave_de_turno(turno)
+    with transaccion() as conn:
+        ocupadas = {dia for (dia,) in conn.execute(
+            "SELECT fecha FROM reserva WHERE fecha BETWEEN ? AND ? AND clave_turno = ? AND clave_sala = ? AND estado = 'ACTIVA'",
+            (fechas_validas[0], fechas_validas[-1], clave_turno, clave_sala)
+        )}
+        libres = [dia for dia in fechas_validas if dia not in ocupadas]
+        resultado["conflictos"] = [fecha_de_dia(dia) for dia in fechas_validas if dia in ocupadas]
+        if not libres:
+            return resultado
+
+        serie = conn.execute(
+            "SELECT COALESCE(MAX(serie), 0) + 1 FROM (SELECT MAX(serie) AS serie FROM reserva "
+            "UNION ALL SELECT MAX(serie) FROM reserva_archivo)"
+        ).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO reserva (fecha, clave_sala, clave_turno, clave_cliente, evento, creado, serie) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(dia, clave_sala, clave_turno, clave_cliente, evento.capitalize(), fecha_creacion, serie) for dia in libres]
+        )
+        resultado["serie"] = serie
+        resultado["folios"] = [folio for (folio,) in conn.execute(
+            "SELECT folio FROM reserva WHERE serie = ? ORDER BY fecha", (serie,)
+        )]
+
+    return resultado
+
+
+@instrumentado
+@con_reintentos
+def renombrar_serie(serie, evento):
+    """Cambia el nombre del evento de todas las reservaciones activas de la serie. Devuelve cuántas cambiaron."""
+    with transaccion() as conn:
+        return conn.execute(
+            "UPDATE reserva SET evento = ? WHERE serie = ? AND estado = 'ACTIVA'",
+            (evento.capitalize(), serie)
+        ).rowcount
+
+
+@instrumentado
+@con_reintentos
+def cancelar_serie(serie, desde=None):
+    """Cancela las reservaciones activas de la serie a partir de la fecha indicada (hoy por omisión). Devuelve los folios."""
+    desde = desde or datetime.date.today()
+    with transaccion() as conn:
+        return [folio for (folio,) in conn.execute(
+            "UPDATE reserva SET estado = 'CANCELADA' WHERE serie = ? AND estado = 'ACTIVA' AND fecha >= ? RETURNING folio",
+            (serie, dia_de_fecha(desde))
+        ).fetchall()]
+
+
+@instrumentado
+def registrar_reserva_recurrente():
+    """Reserva la misma sala y turno cada cierto número de días hasta una fecha o un número de repeticiones."""
+    resultado_cliente = mostrar_clientes_ordenados()
+    if not resultado_cliente:
+        return
+    clave_cliente = resultado_cliente[0]
+
+    print("\nPrimera fecha de la serie:")
+    fecha_inicio = seleccionar_fecha_reservacion()
+    if not fecha_inicio:
+        return
+
+    turno_seleccionado = seleccionar_turno()
+    if not turno_seleccionado:
+        return
+
+    clave_sala = seleccionar_sala(fecha_inicio, turno_seleccionado)
+    if not clave_sala or clave_sala == "BACK":
+        return
+
+    nombre_evento = asignar_nombre_evento()
+    if nombre_evento == "BACK":
+        return
+
+    while True:
+        respuesta_intervalo = input("\n¿Cada cuántos días se repite? (ENTER para cada semana): ").strip()
+        if respuesta_intervalo == "":
+            cada_dias = 7
+            break
+        if respuesta_intervalo.isdigit() and int(respuesta_intervalo) > 0:
+            cada_dias = int(respuesta_intervalo)
+            break
+        print("\nDebe ser un número entero POSITIVO.")
+
+    fecha_limite = None
+    repeticiones = None
+    while True:
+        respuesta_fin = input("\nIngrese la fecha final (mm-dd-aaaa) o el número de repeticiones: ").strip()
+        if respuesta_fin.isdigit() and int(respuesta_fin) > 0:
+            repeticiones = int(respuesta_fin)
+            break
+        try:
+            fecha_limite = datetime.datetime.strptime(respuesta_fin, "%m-%d-%Y").date()
+        except ValueError:
+            print("\nFormato incorrecto. Intente de nuevo.")
+            continue
+        if fecha_limite < fecha_inicio:
+            print("\nLa fecha final no puede ser anterior a la primera fecha.")
+            continue
+        break
+
+    try:
+        resultado = reservar_serie(
+            clave_cliente, clave_sala, turno_seleccionado, nombre_evento,
+            fecha_inicio, cada_dias, fecha_limite, repeticiones
+        )
+
+        if resultado["folios"]:
+            print(f"\nSerie {resultado['serie']} registrada con {len(resultado['folios'])} reservaciones.")
+            print(f"Folios: {', '.join(str(folio) for folio in resultado['folios'])}")
+        else:
+            print("\nNo se registró ninguna reservación de la serie.")
+
+        no_reservadas = [
+            [fecha.strftime("%m-%d-%Y"), "La sala ya está reservada para ese turno y fecha."]
+            for fecha in resultado["conflictos"]
+        ] + [[fecha.strftime("%m-%d-%Y"), motivo] for fecha, motivo in resultado["rechazadas"]]
+        if no_reservadas:
+            print("\nFechas no reservadas:")
+            print(tabulate(sorted(no_reservadas), headers=["Fecha", "Motivo"], tablefmt="grid"))
+
+    except (Error, ValueError) as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+@instrumentado
+@con_reintentos
+def actualizar_evento(folio, evento):
+    """Cambia el nombre del evento de la reserva. Devuelve True si el folio existe."""
+    with transaccion() as conn:
+        return conn.execute("UPDATE reserva SET evento = ? WHERE folio = ?", (evento.capitalize(), folio)).rowcount > 0
+
+
+@instrumentado
+@con_reintentos
+def cancelar_reserva(folio):
+    """Cancela la reserva si está activa. Devuelve True si se canceló."""
+    with transaccion() as conn:
+        return conn.execute(
+            "UPDATE reserva SET estado = 'CANCELADA' WHERE folio = ? AND estado = 'ACTIVA'", (folio,)
+        ).rowcount > 0
+
+
+@instrumentado
 def editar_nombre_de_evento():
     """Permite modificar el nombre de un evento existente dentro de un rango de fechas."""
 
     while True:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
-            mi_cursor = conn.cursor()
-            mi_cursor.execute("SELECT COUNT(*) FROM reserva")
-            total = mi_cursor.fetchone()[0]
-            if total == 0:
-                print("\nNo hay reservas previamente registradas.")
-                return
+        if not existen_reservas():
+            print("\nNo hay reservas previamente registradas.")
+            return
 
         while True:
             fecha_inicial = input("\nIngrese la primera fecha (mm-dd-aaaa)o escriba 'EXIT' para cancelar: ").strip()
@@ -362,31 +1799,17 @@ def editar_nombre_de_evento():
         break
 
     try:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
+        with obtener_conexion() as conn:
             mi_cursor = conn.cursor()
 
-            fecha_inicio_texto = fecha_inicio.strftime("%Y-%m-%d")
-            fecha_fin_texto = fecha_fin.strftime("%Y-%m-%d")
-
-            mi_cursor.execute(
-                "SELECT folio, fecha, evento FROM reserva "
-                "WHERE fecha BETWEEN ? AND ? AND estado = 'ACTIVA' ORDER BY fecha",
-                (fecha_inicio_texto, fecha_fin_texto)
-            )
-            reservas = mi_cursor.fetchall()
-
-            if not reservas:
+            respuesta_listado = listar_reservas_paginadas(fecha_inicio, fecha_fin, "el folio del evento a modificar")
+            if respuesta_listado is None:
                 print("\nNo hay reservas en este rango.\n")
                 return
 
-            lista_mostrar = [
-                [folio, evento, datetime.datetime.strptime(fecha, "%Y-%m-%d").strftime("%m-%d-%Y")]
-                for folio, fecha, evento in reservas
-            ]
-            print(tabulate(lista_mostrar, headers=["Folio", "Evento", "Fecha"], tablefmt="grid"))
-
             while True:
-                folio_a_modificar = input("\nIngrese el folio del evento a modificar (o escriba 'EXIT' para cancelar): ").strip()
+                folio_a_modificar = respuesta_listado or input("\nIngrese el folio del evento a modificar (o escriba 'EXIT' para cancelar): ").strip()
+                respuesta_listado = ""
                 if folio_a_modificar.upper() == "EXIT":
                     print("\nOperación cancelada.\n")
                     return
@@ -407,11 +1830,7 @@ def editar_nombre_de_evento():
                     print("\nEl nombre no puede estar vacío.")
                     continue
 
-                mi_cursor.execute(
-                    "UPDATE reserva SET evento = ? WHERE folio = ?",
-                    (nuevo_nombre_evento.capitalize(), folio_validacion)
-                )
-                conn.commit()
+                actualizar_evento(folio_validacion, nuevo_nombre_evento)
                 print(f"\nEvento actualizado correctamente: {nuevo_nombre_evento.capitalize()}\n")
                 return
 
@@ -421,15 +1840,34 @@ def editar_nombre_de_evento():
         print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
 
 
+# Una sola consulta, servida por idx_reserva_espacio_activo, que arma el reporte del día ya ordenado por turno y sala.
+CONSULTA_REPORTE_DIA = """
+    SELECT COALESCE(s.nombre, ''),
+           TRIM(COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, '')),
+           r.evento,
+           COALESCE(t.tipo_turno, '')
+    FROM {reserva} AS r
+    LEFT JOIN salas AS s ON s.clave = r.clave_sala
+    LEFT JOIN clientes AS c ON c.clave = r.clave_cliente
+    LEFT JOIN turno AS t ON t.clave_horario = r.clave_turno
+    WHERE r.fecha = ? AND r.estado = 'ACTIVA'
+    ORDER BY r.clave_turno, s.nombre
+"""
+
+
+@instrumentado
+def obtener_reporte_del_dia(fecha):
+    """Devuelve las filas (sala, cliente, evento, turno) del reporte de la fecha."""
+    consulta = CONSULTA_REPORTE_DIA.format(reserva=_tabla_reservas(fecha))
+    return obtener_conexion().execute(consulta, (dia_de_fecha(fecha),)).fetchall()
+
+
+@instrumentado
 def consultar_reservas_por_fecha():
     """Consulta las reservas en la base de datos por fecha, mostrando sala, cliente, evento y turno."""
-    with sqlite3.connect("ReservasCoworking.db") as conn:
-            mi_cursor = conn.cursor()
-            mi_cursor.execute("SELECT COUNT(*) FROM reserva")
-            total = mi_cursor.fetchone()[0]
-            if total == 0:
-                print("\nNo hay reservas previamente registrados.")
-                return
+    if not existen_reservas():
+        print("\nNo hay reservas previamente registrados.")
+        return
     fecha_consulta = input("\nIngrese la fecha a consultar (mm-dd-aaaa) o presione ENTER para tomar la fecha actual. Si desea cancelar escriba 'EXIT' : ").strip()
     if fecha_consulta.upper() == "EXIT":
                     print("\nOperación cancelada.\n")
@@ -448,48 +1886,24 @@ def consultar_reservas_por_fecha():
     fecha_texto = fecha_consulta_convertida.strftime("%Y-%m-%d")
 
     try:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
-            mi_cursor = conn.cursor()
-            mi_cursor.execute(
-                "SELECT clave_sala, clave_cliente, evento, turno FROM reserva WHERE fecha = ? AND estado = 'ACTIVA'",
-                (fecha_texto,)
-            )
-            reservas = mi_cursor.fetchall()
+        filas_reservas = obtener_reporte_del_dia(fecha_consulta_convertida)
 
-            if not reservas:
-                print("\nNo hay reservas para esa fecha.\n")
-                return
-
-            filas_reservas = []
-
-            for clave_sala, clave_cliente, evento, turno in reservas:
-                mi_cursor.execute("SELECT nombre FROM salas WHERE clave = ?", (clave_sala,))
-                resultado_sala = mi_cursor.fetchone()
-                nombre_sala = resultado_sala[0] if resultado_sala else ""
-
-                mi_cursor.execute("SELECT nombre, apellido FROM clientes WHERE clave = ?", (clave_cliente,))
-                resultado_cliente = mi_cursor.fetchone()
-                if resultado_cliente:
-                    nombre_cliente, apellido_cliente = resultado_cliente
-                else:
-                    nombre_cliente, apellido_cliente = ("", "")
-
-                nombre_cliente_completo = f"{nombre_cliente} {apellido_cliente}".strip()
-                filas_reservas.append([nombre_sala, nombre_cliente_completo, evento, turno])
+        if not filas_reservas:
+            print("\nNo hay reservas para esa fecha.\n")
+            return
 
-            if filas_reservas:
-                headers = ["SALA", "CLIENTE", "EVENTO", "TURNO"]
-                tabla = tabulate(filas_reservas, headers=headers, tablefmt="grid")
+        headers = ["SALA", "CLIENTE", "EVENTO", "TURNO"]
+        tabla = tabulate(filas_reservas, headers=headers, tablefmt="grid")
 
-                ancho_tabla = len(tabla.split("\n")[0])
-                print("\n" + "=" * ancho_tabla)
-                titulo = f"REPORTE DE RESERVACIONES PARA EL DÍA {fecha_texto}"
-                print(titulo.center(ancho_tabla))
-                print("=" * ancho_tabla)
+        ancho_tabla = len(tabla.split("\n")[0])
+        print("\n" + "=" * ancho_tabla)
+        titulo = f"REPORTE DE RESERVACIONES PARA EL DÍA {fecha_texto}"
+        print(titulo.center(ancho_tabla))
+        print("=" * ancho_tabla)
 
-                print(tabla)
+        print(tabla)
 
-            exportar_reporte(filas_reservas)
+        exportar_reporte(fecha_consulta_convertida)
 
     except Error as e:
         print(e)
@@ -497,76 +1911,466 @@ def consultar_reservas_por_fecha():
         print(f"\nSe produjo el error: {sys.exc_info()[0]}")
 
 
-def exportar_reporte(filas):
-    if not filas:
-        print("\nNo hay datos para exportar.\n")
-        return
-    
+ENCABEZADOS_REPORTE = ["Sala", "Cliente", "Evento", "Turno"]
+ENCABEZADOS_EXPORTACION = ["Folio", "Fecha", "Sala", "Cliente", "Evento", "Turno"]
+
+# La fecha se exporta en formato aaaa-mm-dd, convertida por SQLite al leer cada fila.
+CONSULTA_EXPORTACION = f"""
+    SELECT r.folio,
+           date(r.fecha + {DIA_JULIANO_DEL_ORDINAL_CERO}),
+           COALESCE(s.nombre, ''),
+           TRIM(COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, '')),
+           r.evento,
+           COALESCE(t.tipo_turno, '')
+    FROM {{reserva}} AS r
+    LEFT JOIN salas AS s ON s.clave = r.clave_sala
+    LEFT JOIN clientes AS c ON c.clave = r.clave_cliente
+    LEFT JOIN turno AS t ON t.clave_horario = r.clave_turno
+    WHERE r.estado = 'ACTIVA' AND r.fecha BETWEEN ? AND ?
+    ORDER BY r.fecha, r.folio
+"""
+
+
+def _filas_sin_nulos(filas):
+    for fila_reserva in filas:
+        yield [valor if valor is not None else "" for valor in fila_reserva]
+
+
+def exportar_csv(filas, ruta, encabezados):
+    """Escribe las filas en CSV conforme se leen del cursor. Devuelve cuántas filas se escribieron."""
+    total = 0
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo_csv:
+        escritor_csv = csv.writer(archivo_csv)
+        escritor_csv.writerow(encabezados)
+        for fila_completa in _filas_sin_nulos(filas):
+            escritor_csv.writerow(fila_completa)
+            total += 1
+    return total
+
+
+def exportar_json(filas, ruta, encabezados):
+    """Escribe un arreglo JSON registro por registro, sin armar la lista completa en memoria."""
+    total = 0
+    with open(ruta, "w", encoding="utf-8") as archivo_json:
+        archivo_json.write("[")
+        for fila_completa in _filas_sin_nulos(filas):
+            registro = dict(zip(encabezados, fila_completa))
+            archivo_json.write(",\n  " if total else "\n  ")
+            archivo_json.write(json.dumps(registro, ensure_ascii=False))
+            total += 1
+        archivo_json.write("\n]\n" if total else "]\n")
+    return total
+
+
+def exportar_ndjson(filas, ruta, encabezados):
+    """Escribe un objeto JSON por línea (NDJSON)."""
+    total = 0
+    with open(ruta, "w", encoding="utf-8") as archivo_ndjson:
+        for fila_completa in _filas_sin_nulos(filas):
+            archivo_ndjson.write(json.dumps(dict(zip(encabezados, fila_completa)), ensure_ascii=False) + "\n")
+            total += 1
+    return total
+
+
+def exportar_excel(filas, ruta, encabezados):
+    """Escribe un libro de Excel en modo de solo escritura, reutilizando los mismos objetos de estilo en todas las celdas."""
+    libro_excel = Workbook(write_only=True)
+    hoja_excel = libro_excel.create_sheet("Reservas")
+
+    fuente_encabezado = Font(bold=True)
+    borde_encabezado = Border(bottom=Side(style="thick"))
+    centrado = Alignment(horizontal="center")
+
+    fila_encabezados = []
+    for encabezado in encabezados:
+        celda = WriteOnlyCell(hoja_excel, value=encabezado)
+        celda.font = fuente_encabezado
+        celda.alignment = centrado
+        celda.border = borde_encabezado
+        fila_encabezados.append(celda)
+    hoja_excel.append(fila_encabezados)
+
+    total = 0
+    for fila_completa in _filas_sin_nulos(filas):
+        fila_excel = []
+        for valor_celda in fila_completa:
+            celda = WriteOnlyCell(hoja_excel, value=valor_celda)
+            celda.alignment = centrado
+            fila_excel.append(celda)
+        hoja_excel.append(fila_excel)
+        total += 1
+
+    libro_excel.save(ruta)
+    return total
+
+
+EXPORTADORES = {
+    "csv": (exportar_csv, "csv"),
+    "json": (exportar_json, "json"),
+    "ndjson": (exportar_ndjson, "ndjson"),
+    "excel": (exportar_excel, "xlsx"),
+}
+
+
+@instrumentado
+def exportar_reservas(formato, ruta=None, fecha_inicio=None, fecha_fin=None):
+    """Exporta las reservas activas (opcionalmente de un rango de fechas) leyendo directo del cursor.
+
+    Devuelve la ruta del archivo y el número de filas escritas.
+    """
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+    exportador, extension = EXPORTADORES[formato]
+    ruta = ruta or f"reservas.{extension}"
+
+    fecha_inicio = fecha_inicio or datetime.date.min
+    consulta = CONSULTA_EXPORTACION.format(reserva=_tabla_reservas(fecha_inicio))
+    cursor = obtener_conexion().execute(consulta, (
+        dia_de_fecha(fecha_inicio), dia_de_fecha(fecha_fin or datetime.date.max)
+    ))
+    return ruta, exportador(cursor, ruta, ENCABEZADOS_EXPORTACION)
+
+
+@instrumentado
+def exportar_reporte_del_dia(fecha, formato, ruta=None):
+    """Exporta el reporte de la fecha en el formato indicado. Devuelve la ruta del archivo y el número de filas."""
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+    exportador, extension = EXPORTADORES[formato]
+    ruta = ruta or f"reporte_{fecha.isoformat()}.{extension}"
+    consulta = CONSULTA_REPORTE_DIA.format(reserva=_tabla_reservas(fecha))
+    cursor = obtener_conexion().execute(consulta, (dia_de_fecha(fecha),))
+    return ruta, exportador(cursor, ruta, ENCABEZADOS_REPORTE)
+
+
+ENCABEZADOS_REPORTE_SALA = ["Fecha", "Cliente", "Evento", "Turno"]
+
+# Reporte de una sala en un rango de fechas, para las exportaciones particionadas por sala.
+CONSULTA_REPORTE_SALA = f"""
+    SELECT date(r.fecha + {DIA_JULIANO_DEL_ORDINAL_CERO}),
+           TRIM(COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, '')),
+           r.evento,
+           COALESCE(t.tipo_turno, '')
+    FROM {{reserva}} AS r
+    LEFT JOIN clientes AS c ON c.clave = r.clave_cliente
+    LEFT JOIN turno AS t ON t.clave_horario = r.clave_turno
+    WHERE r.clave_sala = ? AND r.fecha BETWEEN ? AND ? AND r.estado = 'ACTIVA'
+    ORDER BY r.fecha, r.clave_turno
+"""
+
+TRABAJADORES_EXPORTACION = 4
+
+
+def _sha256_de_archivo(ruta):
+    digesto = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+            digesto.update(bloque)
+    return digesto.hexdigest()
+
+
+def _exportar_particion(consulta, parametros, encabezados, formatos, directorio, nombre, comprimir):
+    """Escribe una partición en cada formato pedido y devuelve sus entradas del manifiesto.
+
+    Corre en un hilo del grupo de trabajo, con la conexión propia de ese hilo. Los libros de Excel ya
+    vienen comprimidos, así que no se les aplica gzip.
+    """
+    entradas = []
+    for formato in formatos:
+        exportador, extension = EXPORTADORES[formato]
+        ruta = os.path.join(directorio, f"{nombre}.{extension}")
+        filas = exportador(obtener_conexion().execute(consulta, parametros), ruta, encabezados)
+        if comprimir and formato != "excel":
+            with open(ruta, "rb") as original, gzip.open(ruta + ".gz", "wb") as comprimido:
+                shutil.copyfileobj(original, comprimido)
+            os.remove(ruta)
+            ruta += ".gz"
+        entradas.append({
+            "archivo": os.path.basename(ruta), "formato": formato, "filas": filas,
+            "bytes": os.path.getsize(ruta), "sha256": _sha256_de_archivo(ruta),
+        })
+    return entradas
+
+
+@instrumentado
+def exportar_reportes_particionados(fecha_inicio, fecha_fin, formatos, particion="fecha", directorio=None,
+                                    comprimir=False, trabajadores=TRABAJADORES_EXPORTACION):
+    """Exporta los reportes del rango en un archivo por fecha (o por sala) y formato, en paralelo.
+
+    Los archivos se escriben en un directorio nuevo con nombre único (o en el indicado, que no debe
+    existir) junto con manifiesto.json, que lista cada archivo con sus filas, tamaño y SHA-256.
+    Solo se generan particiones con reservas. Devuelve la ruta del directorio y el manifiesto.
+    """
+    for formato in formatos:
+        if formato not in EXPORTADORES:
+            raise ValueError(f"Formato de exportación no soportado: {formato}")
+    if particion not in ("fecha", "sala"):
+        raise ValueError(f"Partición no soportada: {particion}")
+
+    tabla = _tabla_reservas(fecha_inicio)
+    rango = (dia_de_fecha(fecha_inicio), dia_de_fecha(fecha_fin))
+    if particion == "fecha":
+        consulta = CONSULTA_REPORTE_DIA.format(reserva=tabla)
+        tareas = [
+            (consulta, (dia,), ENCABEZADOS_REPORTE, f"reporte_{fecha_de_dia(dia).isoformat()}")
+            for (dia,) in obtener_conexion().execute(
+                f"SELECT DISTINCT fecha FROM {tabla} WHERE estado = 'ACTIVA' AND fecha BETWEEN ? AND ? ORDER BY fecha", rango
+            )
+        ]
+    else:
+        consulta = CONSULTA_REPORTE_SALA.format(reserva=tabla)
+        tareas = [
+            (consulta, (clave_sala, *rango), ENCABEZADOS_REPORTE_SALA, f"reporte_sala_{clave_sala}")
+            for (clave_sala,) in obtener_conexion().execute(
+                f"SELECT DISTINCT clave_sala FROM {tabla} WHERE estado = 'ACTIVA' AND fecha BETWEEN ? AND ? ORDER BY clave_sala", rango
+            )
+        ]
+
+    if directorio:
+        os.makedirs(directorio)
+    else:
+        directorio = tempfile.mkdtemp(prefix=f"reportes_{datetime.datetime.now():%Y%m%d_%H%M%S}_", dir=".")
+
+    with ThreadPoolExecutor(max_workers=max(1, trabajadores), thread_name_prefix="exportacion") as grupo:
+        futuros = [
+            grupo.submit(_exportar_particion, consulta, parametros, encabezados, formatos, directorio, nombre, comprimir)
+            for consulta, parametros, encabezados, nombre in tareas
+        ]
+        archivos = [entrada for futuro in futuros for entrada in futuro.result()]
+
+    manifiesto = {
+        "generado": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "fecha_inicio": fecha_inicio.isoformat(),
+        "fecha_fin": fecha_fin.isoformat(),
+        "particion": particion,
+        "formatos": list(formatos),
+        "comprimido": comprimir,
+        "archivos": archivos,
+    }
+    with open(os.path.join(directorio, "manifiesto.json"), "w", encoding="utf-8") as archivo_json:
+        json.dump(manifiesto, archivo_json, ensure_ascii=False, indent=2)
+    return directorio, manifiesto
+
+
+# Días entre el ordinal de Python y la época de Arrow (1970-01-01): date32 cuenta días desde esa época.
+DIA_ORDINAL_EPOCA = datetime.date(1970, 1, 1).toordinal()
+
+# Columnas de la exportación columnar: expresión SQL sobre r, s, c y t, y tipo de Arrow (se arma al exportar,
+# porque pyarrow es opcional). Las fechas salen de SQLite ya convertidas a días y segundos desde la época.
+COLUMNAS_COLUMNARES = {
+    "folio": ("r.folio", lambda pa: pa.int64()),
+    "fecha": (f"r.fecha - {DIA_ORDINAL_EPOCA}", lambda pa: pa.date32()),
+    "clave_sala": ("r.clave_sala", lambda pa: pa.int32()),
+    "sala": ("s.nombre", lambda pa: pa.string()),
+    "cupo": ("s.cupo", lambda pa: pa.int32()),
+    "clave_cliente": ("r.clave_cliente", lambda pa: pa.int64()),
+    "cliente": ("TRIM(COALESCE(c.nombre, '') || ' ' || COALESCE(c.apellido, ''))", lambda pa: pa.string()),
+    "clave_turno": ("r.clave_turno", lambda pa: pa.int8()),
+    "turno": ("t.tipo_turno", lambda pa: pa.dictionary(pa.int8(), pa.string())),
+    "evento": ("r.evento", lambda pa: pa.string()),
+    "estado": ("r.estado", lambda pa: pa.dictionary(pa.int8(), pa.string())),
+    "serie": ("r.serie", lambda pa: pa.int64()),
+    "creado": ("CAST(strftime('%s', r.creado) AS INTEGER)", lambda pa: pa.timestamp("s")),
+}
+
+# Columnas con pocos valores distintos: se guardan como diccionario fijo, igual en todos los lotes (Arrow IPC
+# no admite que el diccionario cambie de un lote a otro).
+DICCIONARIOS_COLUMNARES = {
+    "turno": lambda: [tipo_turno for _, tipo_turno in obtener_turnos()],
+    "estado": lambda: ["ACTIVA", "CANCELADA"],
+}
+
+FORMATOS_COLUMNARES = {"parquet": "parquet", "arrow": "arrow"}
+TAMANO_LOTE_COLUMNAR = 65536
+
+
+def _importar_pyarrow():
+    """Importa pyarrow solo cuando se exporta en formato columnar, para no cargarlo en cada arranque."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("La exportación Parquet/Arrow necesita pyarrow (pip install pyarrow).") from None
+    return pyarrow
+
+
+def _escritor_columnar(pyarrow, formato, ruta, esquema):
+    if formato == "parquet":
+        return pyarrow.parquet.ParquetWriter(ruta, esquema, compression="zstd")
+    return pyarrow.ipc.new_file(ruta, esquema)
+
+
+@instrumentado
+def exportar_reservas_columnar(formato, ruta=None, fecha_inicio=None, fecha_fin=None, columnas=None,
+                               incluir_canceladas=False, tamano_lote=TAMANO_LOTE_COLUMNAR):
+    """Exporta las reservas en Parquet o Arrow IPC, con tipos de fecha y enteros, por lotes leídos del cursor.
+
+    columnas elige y ordena las columnas de COLUMNAS_COLUMNARES (todas por omisión). Incluye lo archivado
+    cuando el rango llega a ello. Necesita pyarrow. Devuelve la ruta del archivo y el número de filas.
+    """
+    if formato not in FORMATOS_COLUMNARES:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+    columnas = list(columnas or COLUMNAS_COLUMNARES)
+    desconocidas = [columna for columna in columnas if columna not in COLUMNAS_COLUMNARES]
+    if desconocidas:
+        raise ValueError(f"Columnas no válidas: {', '.join(desconocidas)}. Disponibles: {', '.join(COLUMNAS_COLUMNARES)}.")
+    pyarrow = _importar_pyarrow()
+
+    ruta = ruta or f"reservas.{FORMATOS_COLUMNARES[formato]}"
+    fecha_inicio = fecha_inicio or datetime.date.min
+    esquema = pyarrow.schema([(columna, COLUMNAS_COLUMNARES[columna][1](pyarrow)) for columna in columnas])
+    condicion_estado = "" if incluir_canceladas else "AND r.estado = 'ACTIVA'"
+    cursor = obtener_conexion().execute(f"""
+        SELECT {", ".join(COLUMNAS_COLUMNARES[columna][0] for columna in columnas)}
+        FROM {_tabla_reservas(fecha_inicio, incluir_canceladas)} AS r
+        LEFT JOIN salas AS s ON s.clave = r.clave_sala
+        LEFT JOIN clientes AS c ON c.clave = r.clave_cliente
+        LEFT JOIN turno AS t ON t.clave_horario = r.clave_turno
+        WHERE r.fecha BETWEEN ? AND ? {condicion_estado}
+        ORDER BY r.fecha, r.folio
+    """, (dia_de_fecha(fecha_inicio), dia_de_fecha(fecha_fin or datetime.date.max)))
+
+    diccionarios = {}
+    for columna in columnas:
+        if columna in DICCIONARIOS_COLUMNARES:
+            valores = DICCIONARIOS_COLUMNARES[columna]()
+            diccionarios[columna] = (pyarrow.array(valores, pyarrow.string()), {valor: i for i, valor in enumerate(valores)})
+
+    def arreglo(valores, campo):
+        if campo.name not in diccionarios:
+            return pyarrow.array(valores, type=campo.type)
+        diccionario, posiciones = diccionarios[campo.name]
+        indices = pyarrow.array([posiciones.get(valor) for valor in valores], type=campo.type.index_type)
+        return pyarrow.DictionaryArray.from_arrays(indices, diccionario)
+
+    total = 0
+    with _escritor_columnar(pyarrow, formato, ruta, esquema) as escritor:
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            arreglos = [arreglo(valores, campo) for valores, campo in zip(zip(*filas), esquema)]
+            escritor.write_batch(pyarrow.RecordBatch.from_arrays(arreglos, schema=esquema))
+            total += len(filas)
+    return ruta, total
+
+
+def pedir_formato_exportacion():
+    """Muestra las opciones de exportación y devuelve el formato elegido, o None si la opción no es válida."""
     print("\n" + "=" * 30)
     print(f"{'OPCIONES DE EXPORTACION':^28}")
     print("=" * 30)
     print("1. CSV")
     print("2. JSON")
     print("3. Excel")
+    print("4. JSON por líneas (NDJSON)")
+
+    formatos = {1: "csv", 2: "json", 3: "excel", 4: "ndjson"}
 
     try:
         opcion_exportacion = int(input("\nSeleccione el formato: ").strip())
+    except ValueError:
+        print("\nSolo se aceptan números enteros de los que están disponibles (1-4).")
+        return None
 
-        if opcion_exportacion == 1:
-            with open("reporte.csv", "w", newline="", encoding="utf-8") as archivo_csv:
-                escritor_csv = csv.writer(archivo_csv)
-                escritor_csv.writerow(["Sala", "Cliente", "Evento", "Turno"])
-                for fila_reserva in filas:
-                    fila_completa = [valor if valor is not None else "" for valor in fila_reserva]
-                    escritor_csv.writerow(fila_completa)
-
-            print("\nReporte exportado a 'reporte.csv'")
-
-        elif opcion_exportacion == 2:
-            reporte_json = []
-            for fila_reserva in filas:
-                fila_completa = [valor if valor is not None else "" for valor in fila_reserva]
-                registro = {
-                    "Sala": fila_completa[0],
-                    "Cliente": fila_completa[1],
-                    "Evento": fila_completa[2],
-                    "Turno": fila_completa[3]
-                }
-                reporte_json.append(registro)
-
-            with open("reporte.json", "w", encoding="utf-8") as archivo_json:
-                json.dump(reporte_json, archivo_json, ensure_ascii=False, indent=2)
-
-            print("\nReporte exportado a 'reporte.json'")
-
-        elif opcion_exportacion == 3:
-            libro_excel = Workbook()
-            hoja_excel = libro_excel.active
-            hoja_excel.title = "Reservas"
-            encabezados = ["Sala", "Cliente", "Evento", "Turno"]
-
-            for col_index, encabezado in enumerate(encabezados, start=1):
-                celda = hoja_excel.cell(row=1, column=col_index, value=encabezado)
-                celda.font = Font(bold=True)
-                celda.alignment = Alignment(horizontal="center")
-                celda.border = Border(bottom=Side(style="thick"))
-
-            for row_index, fila_reserva in enumerate(filas, start=2):
-                fila_completa = [valor if valor is not None else "" for valor in fila_reserva]
-                for col_index, valor_celda in enumerate(fila_completa, start=1):
-                    celda = hoja_excel.cell(row=row_index, column=col_index, value=valor_celda)
-                    celda.alignment = Alignment(horizontal="center")
-
-            libro_excel.save("reporte.xlsx")
-            print("\nReporte exportado a 'reporte.xlsx'")
+    if opcion_exportacion not in formatos:
+        print("Opción inválida.")
+        return None
+    return formatos[opcion_exportacion]
 
-        else:
-            print("Opción inválida.")
-        
-    except ValueError:
-        print("\nSolo se aceptan números enteros de los que están disponibles (1-3).")
+
+def exportar_reporte(fecha):
+    formato = pedir_formato_exportacion()
+    if not formato:
+        return
+
+    try:
+        ruta, _ = exportar_reporte_del_dia(fecha, formato)
+        print(f"\nReporte exportado a '{ruta}'")
+    except Error as e:
+        print(e)
+
+
+def validar_nombre(texto):
+    """Devuelve el mensaje de error si el nombre o apellido no es válido, o None si lo es."""
+    if texto == "":
+        return "No se puede omitir el dato."
+    if not texto.replace(" ", "").isalpha():
+        return "No se aceptan números ni caracteres especiales."
+    return None
+
+
+def validar_cupo(texto):
+    """Convierte el cupo a entero. Devuelve (cupo, None) si es válido o (None, mensaje de error)."""
+    try:
+        cupo_sala = int(texto)
+    except (TypeError, ValueError):
+        return None, "El cupo no es un número entero válido. Intente de nuevo."
+    if cupo_sala <= 0:
+        return None, "El cupo debe ser un número entero POSITIVO."
+    return cupo_sala, None
+
+
+def validar_fecha_reserva(fecha):
+    """Devuelve el mensaje de error si la fecha cae en domingo o no cumple la anticipación mínima, o None."""
+    if fecha < datetime.date.today() + datetime.timedelta(days=DIAS_ANTICIPACION):
+        return f"La fecha debe ser al menos dos días posteriores a hoy ({datetime.date.today().strftime('%m-%d-%Y')})."
+    if fecha.weekday() == 6:
+        return "No se pueden realizar reservaciones en domingo."
+    return None
 
 
+def validar_turno(turno):
+    """Devuelve el mensaje de error si el turno no existe (sin distinguir mayúsculas), o None si existe."""
+    try:
+        clave_de_turno(turno)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def validar_reserva(clave_cliente, fecha, clave_sala, turno):
+    """Devuelve el mensaje de error si algún dato de una reserva nueva no es válido, o None si todos lo son.
+
+    Con clave_sala=None no se revisa la sala, para cuando todavía no se asigna.
+    """
+    error_fecha = validar_fecha_reserva(fecha)
+    if error_fecha:
+        return error_fecha
+    error_turno = validar_turno(turno)
+    if error_turno:
+        return error_turno
+    if clave_sala is not None and clave_sala not in {clave for clave, _, _ in obtener_salas()}:
+        return f"La sala {clave_sala} no existe."
+    if obtener_conexion().execute("SELECT 1 FROM clientes WHERE clave = ?", (clave_cliente,)).fetchone() is None:
+        return f"El cliente {clave_cliente} no existe."
+    return None
+
+
+@instrumentado
+@con_reintentos
+def agregar_cliente(nombre, apellido):
+    """Inserta un cliente con nombre y apellido en mayúsculas. Devuelve la clave asignada."""
+    with transaccion() as conn:
+        clave = conn.execute(
+            "INSERT INTO clientes (nombre, apellido) VALUES (?,?)", (nombre.upper(), apellido.upper())
+        ).lastrowid
+    invalidar_cache("clientes")
+    return clave
+
+
+@instrumentado
+@con_reintentos
+def agregar_sala(nombre, cupo):
+    """Inserta una sala con nombre en mayúsculas. Devuelve la clave asignada."""
+    with transaccion() as conn:
+        clave = conn.execute("INSERT INTO salas (nombre, cupo) VALUES (?,?)", (nombre.upper(), cupo)).lastrowid
+    invalidar_cache("salas")
+    return clave
+
+
+@instrumentado
 def registrar_cliente():
     '''Registra un cliente en la Base de Datos y devuelve una clave única generada automáticamente.'''
     while True: 
@@ -578,12 +2382,9 @@ def registrar_cliente():
                 print("\nOperación cancelada.")
                 return 
             
-            if nombre_cliente == "":
-                print("\nNo se puede omitir el dato.")
-                continue
-
-            if not nombre_cliente.replace(" ", "").isalpha():
-                print("\nNo se aceptan números ni caracteres especiales.")
+            error_validacion = validar_nombre(nombre_cliente)
+            if error_validacion:
+                print(f"\n{error_validacion}")
                 continue
             break
 
@@ -594,12 +2395,9 @@ def registrar_cliente():
                 print("\nRegresando a ingresar nombre...")
                 break
             
-            if apellido_cliente == "":
-                print("\nNo se puede omitir el dato.")
-                continue
-
-            if not apellido_cliente.replace(" ", "").isalpha():
-                print("\nNo se aceptan números ni caracteres especiales.")
+            error_validacion = validar_nombre(apellido_cliente)
+            if error_validacion:
+                print(f"\n{error_validacion}")
                 continue
             break
         
@@ -607,13 +2405,9 @@ def registrar_cliente():
             continue
         break 
 
-    cliente_nuevo = (nombre_cliente.upper(), apellido_cliente.upper())
-
     try:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
-            mi_cursor = conn.cursor()
-            mi_cursor.execute("INSERT INTO clientes (nombre, apellido) VALUES (?,?)", cliente_nuevo)
-            print(f"\nCliente registrado correctamente. Clave asignada: {mi_cursor.lastrowid}")
+        clave_cliente = agregar_cliente(nombre_cliente, apellido_cliente)
+        print(f"\nCliente registrado correctamente. Clave asignada: {clave_cliente}")
 
     except Error as e:
         print(e)
@@ -621,6 +2415,7 @@ def registrar_cliente():
         print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
 
 
+@instrumentado
 def registrar_sala():
     while True: 
         
@@ -641,46 +2436,294 @@ def registrar_sala():
                 print("\nRegresando a ingresar nombre de sala...")
                 break
                 
-            try:
-                cupo_sala = int(cupo_input) 
-                
-                if cupo_sala <= 0:
-                    print("\nEl cupo debe ser un número entero POSITIVO.")
-                    continue
-                
-                break
-                
-            except ValueError:
-                print("\nEl cupo no es un número entero válido. Intente de nuevo.")
+            cupo_sala, error_validacion = validar_cupo(cupo_input)
+            if error_validacion:
+                print(f"\n{error_validacion}")
                 continue
+            break
 
         if cupo_input == "BACK":
             continue
         break 
 
-    sala_nueva = (nombre_sala, cupo_sala)
+    try:
+        print(f"\nLa clave asignada fue {agregar_sala(nombre_sala, cupo_sala)}")
+
+    except Error as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+TAMANO_LOTE = 5000
+
+
+def convertir_fecha(texto):
+    """Convierte una fecha escrita como mm-dd-aaaa o aaaa-mm-dd. Lanza ValueError si no es válida."""
+    texto = str(texto).strip()
+    for formato in ("%m-%d-%Y", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha no válida: {texto}")
+
+
+def leer_registros(ruta):
+    """Genera (número de registro, diccionario) desde un archivo CSV, JSON (arreglo) o NDJSON."""
+    extension = os.path.splitext(ruta)[1].lower()
+
+    if extension == ".csv":
+        with open(ruta, newline="", encoding="utf-8-sig") as archivo_csv:
+            for numero, registro in enumerate(csv.DictReader(archivo_csv), start=2):
+                yield numero, {clave.strip().lower(): valor for clave, valor in registro.items() if clave}
+    elif extension == ".json":
+        with open(ruta, encoding="utf-8") as archivo_json:
+            for numero, registro in enumerate(json.load(archivo_json), start=1):
+                yield numero, {clave.lower(): valor for clave, valor in registro.items()}
+    elif extension in (".ndjson", ".jsonl"):
+        with open(ruta, encoding="utf-8") as archivo_ndjson:
+            for numero, linea in enumerate(archivo_ndjson, start=1):
+                if linea.strip():
+                    yield numero, {clave.lower(): valor for clave, valor in json.loads(linea).items()}
+    else:
+        raise ValueError(f"Tipo de archivo no soportado: {extension}")
+
+
+def _texto(registro, campo):
+    valor = registro.get(campo)
+    return "" if valor is None else str(valor).strip()
+
+
+@con_reintentos
+def _insertar_lote(sql, lote):
+    """Inserta un lote de filas con executemany en su propia transacción."""
+    with transaccion() as conn:
+        conn.executemany(sql, lote)
+    return len(lote)
+
+
+def _insertar_por_lotes(sql, filas):
+    """Inserta las filas con executemany, confirmando una transacción por cada lote de TAMANO_LOTE filas."""
+    total = 0
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == TAMANO_LOTE:
+            total += _insertar_lote(sql, lote)
+            lote = []
+    if lote:
+        total += _insertar_lote(sql, lote)
+    return total
+
+
+@instrumentado
+def importar_clientes(ruta):
+    """Importa clientes (columnas nombre, apellido) con las mismas reglas que registrar_cliente.
+
+    Devuelve un diccionario con el total insertado y la lista de rechazos (registro, motivo).
+    """
+    rechazos = []
+
+    def clientes_validos():
+        for numero, registro in leer_registros(ruta):
+            nombre_cliente = _texto(registro, "nombre")
+            apellido_cliente = _texto(registro, "apellido")
+            error_validacion = validar_nombre(nombre_cliente) or validar_nombre(apellido_cliente)
+            if error_validacion:
+                rechazos.append((numero, error_validacion))
+                continue
+            yield nombre_cliente.upper(), apellido_cliente.upper()
 
     try:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
-            mi_cursor = conn.cursor()
-            mi_cursor.execute("INSERT INTO salas (nombre, cupo) VALUES (?,?)", sala_nueva)
-            print(f"\nLa clave asignada fue {mi_cursor.lastrowid}")
+        insertados = _insertar_por_lotes("INSERT INTO clientes (nombre, apellido) VALUES (?, ?)", clientes_validos())
+    finally:
+        invalidar_cache("clientes")
+    return {"insertados": insertados, "rechazos": rechazos}
+
+
+@instrumentado
+def importar_salas(ruta):
+    """Importa salas (columnas nombre, cupo) con las mismas reglas que registrar_sala."""
+    rechazos = []
+
+    def salas_validas():
+        for numero, registro in leer_registros(ruta):
+            nombre_sala = _texto(registro, "nombre").upper()
+            if nombre_sala == "":
+                rechazos.append((numero, "No se puede omitir el dato."))
+                continue
+            cupo_sala, error_validacion = validar_cupo(_texto(registro, "cupo"))
+            if error_validacion:
+                rechazos.append((numero, error_validacion))
+                continue
+            yield nombre_sala, cupo_sala
+
+    try:
+        insertados = _insertar_por_lotes("INSERT INTO salas (nombre, cupo) VALUES (?, ?)", salas_validas())
+    finally:
+        invalidar_cache("salas")
+    return {"insertados": insertados, "rechazos": rechazos}
+
+
+@instrumentado
+def importar_reservas(ruta, validar_anticipacion=True):
+    """Importa reservas (fecha, clave_sala, turno, clave_cliente, evento) por lotes.
+
+    Aplica las reglas de fecha de la reservación interactiva (sin domingos y, si validar_anticipacion es
+    verdadero, la anticipación mínima), verifica que existan cliente, sala y turno, y rechaza los espacios
+    ya ocupados en la base o repetidos dentro del mismo archivo. Cada lote se verifica e inserta dentro de
+    una misma transacción.
+    """
+    rechazos = []
+    insertados = 0
+    clientes = {clave for clave, _, _ in obtener_clientes()}
+    salas = {clave for clave, _, _ in obtener_salas()}
+    turnos = {}
+    for clave_horario, tipo_turno in obtener_turnos():
+        turnos[str(clave_horario)] = clave_horario
+        turnos[tipo_turno.upper()] = clave_horario
+    fecha_creacion = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def validar(registro):
+        try:
+            fecha = convertir_fecha(_texto(registro, "fecha"))
+        except ValueError:
+            return None, "Formato de fecha incorrecto. Use mm-dd-aaaa."
+        if validar_anticipacion:
+            error_validacion = validar_fecha_reserva(fecha)
+            if error_validacion:
+                return None, error_validacion
+        elif fecha.weekday() == 6:
+            return None, "No se pueden realizar reservaciones en domingo."
+
+        try:
+            clave_sala = int(_texto(registro, "clave_sala"))
+            clave_cliente = int(_texto(registro, "clave_cliente"))
+        except ValueError:
+            return None, "Las claves de sala y cliente deben ser números enteros."
+        if clave_cliente not in clientes:
+            return None, f"No existe el cliente {clave_cliente}."
+        if clave_sala not in salas:
+            return None, f"No existe la sala {clave_sala}."
+
+        clave_turno = turnos.get(_texto(registro, "turno").upper())
+        if not clave_turno:
+            return None, "Turno inválido."
+
+        evento = " ".join(_texto(registro, "evento").split())
+        if evento == "":
+            return None, "El nombre del evento es obligatorio y no puede dejarse vacío."
+
+        return (dia_de_fecha(fecha), clave_sala, clave_turno, clave_cliente, evento.capitalize(), fecha_creacion), None
+
+    @con_reintentos
+    def insertar_lote(lote):
+        dias = [reserva[0] for _, reserva in lote]
+        with transaccion() as conn:
+            ocupados = set(conn.execute(
+                "SELECT fecha, clave_turno, clave_sala FROM reserva WHERE fecha BETWEEN ? AND ? AND estado = 'ACTIVA'",
+                (min(dias), max(dias))
+            ))
+            nuevas = []
+            ocupadas = []
+            for numero, reserva in lote:
+                espacio = (reserva[0], reserva[2], reserva[1])
+                if espacio in ocupados:
+                    ocupadas.append((numero, "La sala ya está reservada para ese turno y fecha."))
+                    continue
+                ocupados.add(espacio)
+                nuevas.append(reserva)
+            conn.executemany(
+                "INSERT INTO reserva (fecha, clave_sala, clave_turno, clave_cliente, evento, creado) VALUES (?, ?, ?, ?, ?, ?)",
+                nuevas
+            )
+        # Los rechazos se registran sólo cuando el lote quedó confirmado, para no duplicarlos al reintentar.
+        rechazos.extend(ocupadas)
+        return len(nuevas)
+
+    lote = []
+    for numero, registro in leer_registros(ruta):
+        reserva, error_validacion = validar(registro)
+        if error_validacion:
+            rechazos.append((numero, error_validacion))
+            continue
+        lote.append((numero, reserva))
+        if len(lote) == TAMANO_LOTE:
+            insertados += insertar_lote(lote)
+            lote = []
+    if lote:
+        insertados += insertar_lote(lote)
+
+    rechazos.sort()
+    return {"insertados": insertados, "rechazos": rechazos}
+
+
+def escribir_rechazos(rechazos, ruta):
+    """Guarda el reporte de registros rechazados en un CSV (registro, motivo)."""
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo_csv:
+        escritor_csv = csv.writer(archivo_csv)
+        escritor_csv.writerow(["Registro", "Motivo"])
+        escritor_csv.writerows(rechazos)
+
 
+IMPORTADORES = {
+    "clientes": importar_clientes,
+    "salas": importar_salas,
+    "reservas": importar_reservas,
+}
+
+
+@instrumentado
+def importar_archivo():
+    """Importa clientes, salas o reservas desde un archivo CSV, JSON o NDJSON y muestra el reporte de rechazos."""
+    print("\n" + "=" * 30)
+    print(f"{'IMPORTAR DESDE ARCHIVO':^28}")
+    print("=" * 30)
+    print("1. Clientes (nombre, apellido)")
+    print("2. Salas (nombre, cupo)")
+    print("3. Reservas (fecha, clave_sala, turno, clave_cliente, evento)")
+
+    tipos = {1: "clientes", 2: "salas", 3: "reservas"}
+    try:
+        opcion_importacion = int(input("\nSeleccione qué desea importar: ").strip())
+    except ValueError:
+        print("\nSolo se aceptan números enteros de los que están disponibles (1-3).")
+        return
+    if opcion_importacion not in tipos:
+        print("Opción inválida.")
+        return
+
+    ruta = input("\nIngrese la ruta del archivo (.csv, .json o .ndjson) o escriba 'EXIT' para cancelar: ").strip()
+    if ruta.upper() == "EXIT" or ruta == "":
+        print("\nOperación cancelada.")
+        return
+
+    try:
+        resultado = IMPORTADORES[tipos[opcion_importacion]](ruta)
+        print(f"\nRegistros importados: {resultado['insertados']}")
+        print(f"Registros rechazados: {len(resultado['rechazos'])}")
+
+        if resultado["rechazos"]:
+            print(tabulate(resultado["rechazos"][:20], headers=["Registro", "Motivo"], tablefmt="grid"))
+            ruta_rechazos = f"rechazos_{tipos[opcion_importacion]}.csv"
+            escribir_rechazos(resultado["rechazos"], ruta_rechazos)
+            print(f"\nReporte completo de rechazos guardado en '{ruta_rechazos}'")
+
+    except (OSError, ValueError) as e:
+        print(f"\nNo se pudo leer el archivo: {e}")
     except Error as e:
         print(e)
     except Exception:
         print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
 
 
+@instrumentado
 def cancelar_reservas():
     while True:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
-            mi_cursor = conn.cursor()
-            mi_cursor.execute("SELECT COUNT(*) FROM reserva")
-            total = mi_cursor.fetchone()[0]
-            if total == 0:
-                print("\nNo hay reservas previamente registradas.")
-                return
+        if not existen_reservas():
+            print("\nNo hay reservas previamente registradas.")
+            return
 
         while True:
             fecha_inicial = input("\nIngrese la primera fecha (mm-dd-aaaa) o escriba 'EXIT' para cancelar: ").strip()
@@ -720,28 +2763,17 @@ def cancelar_reservas():
         break
 
     try:
-        with sqlite3.connect("ReservasCoworking.db") as conn:
+        with obtener_conexion() as conn:
             mi_cursor = conn.cursor()
-            fecha_inicio_texto = fecha_inicio.strftime("%Y-%m-%d")
-            fecha_fin_texto = fecha_fin.strftime("%Y-%m-%d")
-            mi_cursor.execute(
-                "SELECT folio, fecha, evento FROM reserva WHERE fecha BETWEEN ? AND ? AND estado = 'ACTIVA' ORDER BY fecha",
-                (fecha_inicio_texto, fecha_fin_texto)
-            )
-            reservas = mi_cursor.fetchall()
 
-            if not reservas:
+            respuesta_listado = listar_reservas_paginadas(fecha_inicio, fecha_fin, "el folio del evento a cancelar")
+            if respuesta_listado is None:
                 print("\nNo hay reservas en este rango.\n")
                 return
-            else:
-                lista_mostrar = [
-                    [folio, evento, datetime.datetime.strptime(fecha, "%Y-%m-%d").strftime("%m-%d-%Y")] 
-                    for folio, fecha, evento in reservas
-                ]
-                print(tabulate(lista_mostrar, headers=["Folio", "Evento", "Fecha"], tablefmt="grid"))
 
             while True:
-                folio_a_cancelar = input("\nIngrese el folio del evento a cancelar (o escriba 'EXIT' para salir): ").strip()
+                folio_a_cancelar = respuesta_listado or input("\nIngrese el folio del evento a cancelar (o escriba 'EXIT' para salir): ").strip()
+                respuesta_listado = ""
                 if folio_a_cancelar.upper() == "EXIT":
                     print("\nOperación cancelada.\n")
                     return
@@ -768,8 +2800,7 @@ def cancelar_reservas():
                     confirmacion = input(f"\n¿Está seguro que desea cancelar la reservación '{evento}'? (S/N): ").strip().upper()
                     
                     if confirmacion == "S":
-                        mi_cursor.execute("UPDATE reserva SET estado = 'CANCELADA' WHERE folio = ?", (folio,))
-                        conn.commit()
+                        cancelar_reserva(folio)
                         print(f"\nReservación '{evento}' cancelada correctamente.\n")
                         return
                     elif confirmacion == "N":
@@ -784,7 +2815,1140 @@ def cancelar_reservas():
         print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
 
 
-def main():
+@instrumentado
+def calcular_disponibilidad(fecha_inicio, fecha_fin):
+    """Calcula en una sola consulta la ocupación sala × turno × fecha del rango.
+
+    Devuelve un diccionario con las fechas del rango, los turnos, las salas (clave, nombre, cupo) y
+    "ocupacion": una lista con un entero por (día, turno) cuyo bit i vale 1 si la sala i está ocupada.
+    La posición de cada (día, turno) es dia * len(turnos) + turno.
+    """
+    conn = obtener_conexion()
+    turnos = [tipo for _, tipo in obtener_turnos()]
+    salas = obtener_salas()
+
+    fechas = [fecha_inicio + datetime.timedelta(days=dia) for dia in range((fecha_fin - fecha_inicio).days + 1)]
+    primer_dia = dia_de_fecha(fecha_inicio)
+    posicion_turno = {clave: indice for indice, (clave, _) in enumerate(obtener_turnos())}
+    posicion_sala = {sala[0]: indice for indice, sala in enumerate(salas)}
+    ocupacion = [0] * (len(fechas) * len(turnos))
+
+    reservas = conn.execute(
+        "SELECT fecha, clave_turno, clave_sala FROM reserva "
+        "WHERE fecha BETWEEN ? AND ? AND estado = 'ACTIVA'",
+        (primer_dia, dia_de_fecha(fecha_fin))
+    )
+    for dia, clave_turno, clave_sala in reservas:
+        if clave_turno not in posicion_turno or clave_sala not in posicion_sala:
+            continue
+        ocupacion[(dia - primer_dia) * len(turnos) + posicion_turno[clave_turno]] |= 1 << posicion_sala[clave_sala]
+
+    return {
+        "fecha_inicio": fecha_inicio,
+        "fechas": fechas,
+        "turnos": turnos,
+        "salas": salas,
+        "ocupacion": ocupacion,
+    }
+
+
+def _mascara_salas(salas, clave_sala=None, cupo_minimo=0):
+    """Devuelve la máscara de bits de las salas que cumplen los filtros."""
+    mascara = 0
+    for indice, (clave, _, cupo) in enumerate(salas):
+        if (clave_sala is None or clave == clave_sala) and cupo >= cupo_minimo:
+            mascara |= 1 << indice
+    return mascara
+
+
+def salas_libres(disponibilidad, fecha, turno, cupo_minimo=0):
+    """Devuelve las salas (clave, nombre, cupo) libres en la fecha y turno indicados según la matriz."""
+    dia = (fecha - disponibilidad["fecha_inicio"]).days
+    turnos = disponibilidad["turnos"]
+    salas = disponibilidad["salas"]
+    ocupadas = disponibilidad["ocupacion"][dia * len(turnos) + turnos.index(turno)]
+    libres = _mascara_salas(salas, cupo_minimo=cupo_minimo) & ~ocupadas
+    return [sala for indice, sala in enumerate(salas) if libres >> indice & 1]
+
+
+@instrumentado
+def buscar_espacios_disponibles(cantidad=5, clave_sala=None, cupo_minimo=0, desde=None, turno=None,
+                                dias_maximos=365, dias_por_bloque=31):
+    """Busca los próximos espacios libres para una sala, o para cualquier sala con cupo suficiente.
+
+    Respeta las reglas de reservación (anticipación mínima y sin domingos) y recorre el calendario por
+    bloques, calculando cada bloque con una sola consulta. Devuelve una lista de
+    (fecha, turno, clave_sala, nombre_sala, cupo); cuando no se indica sala, se propone la más pequeña que cabe.
+    """
+    fecha_minima = datetime.date.today() + datetime.timedelta(days=DIAS_ANTICIPACION)
+    fecha_actual = max(desde or fecha_minima, fecha_minima)
+    fecha_limite = fecha_actual + datetime.timedelta(days=dias_maximos - 1)
+    espacios = []
+
+    while fecha_actual <= fecha_limite and len(espacios) < cantidad:
+        fecha_fin_bloque = min(fecha_actual + datetime.timedelta(days=dias_por_bloque - 1), fecha_limite)
+        disponibilidad = calcular_disponibilidad(fecha_actual, fecha_fin_bloque)
+        turnos = disponibilidad["turnos"]
+        salas = disponibilidad["salas"]
+
+        mascara = _mascara_salas(salas, clave_sala, cupo_minimo)
+        if mascara == 0:
+            return espacios
+        # Salas candidatas de la más pequeña a la más grande, para proponer la que menos asientos desperdicia.
+        orden_salas = sorted((indice for indice in range(len(salas)) if mascara >> indice & 1), key=lambda i: salas[i][2])
+
+        for dia, fecha in enumerate(disponibilidad["fechas"]):
+            if fecha.weekday() == 6:
+                continue
+            for indice_turno, tipo_turno in enumerate(turnos):
+                if turno is not None and tipo_turno != turno:
+                    continue
+                libres = mascara & ~disponibilidad["ocupacion"][dia * len(turnos) + indice_turno]
+                if not libres:
+                    continue
+                indice_sala = next(indice for indice in orden_salas if libres >> indice & 1)
+                espacios.append((fecha, tipo_turno) + tuple(salas[indice_sala]))
+                if len(espacios) == cantidad:
+                    return espacios
+
+        fecha_actual = fecha_fin_bloque + datetime.timedelta(days=1)
+
+    return espacios
+
+
+@instrumentado
+def buscar_proximos_espacios():
+    """Muestra los próximos espacios disponibles para una sala o para cualquier sala con el cupo pedido."""
+    try:
+        salas = {str(clave): clave for clave, _, _ in obtener_salas()}
+        clave_sala = pedir_filtro_opcional("Clave de sala", salas)
+
+        cupo_minimo = 0
+        if clave_sala is None:
+            while True:
+                respuesta_cupo = input("\nNúmero mínimo de personas (ENTER para cualquiera): ").strip()
+                if respuesta_cupo == "":
+                    break
+                if respuesta_cupo.isdigit() and int(respuesta_cupo) > 0:
+                    cupo_minimo = int(respuesta_cupo)
+                    break
+                print("\nEl cupo debe ser un número entero POSITIVO.")
+
+        espacios = buscar_espacios_disponibles(10, clave_sala, cupo_minimo)
+        if not espacios:
+            print("\nNo se encontraron espacios disponibles en el próximo año.")
+            return
+
+        filas = [
+            [fecha.strftime("%m-%d-%Y"), turno, clave, nombre, cupo]
+            for fecha, turno, clave, nombre, cupo in espacios
+        ]
+        print(tabulate(filas, headers=["FECHA", "TURNO", "CLAVE", "SALA", "CUPO"], tablefmt="grid"))
+
+    except Error as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+@instrumentado
+def contar_reservas_por_criterios(fecha_inicio, fecha_fin, clave_sala=None, clave_cliente=None, turno=None):
+    """Cuenta las reservas activas que cumplen los criterios, como vista previa de una cancelación masiva."""
+    condiciones, parametros = _filtros_reservas(fecha_inicio, fecha_fin, clave_sala, clave_cliente, turno)
+    return obtener_conexion().execute(
+        f"SELECT COUNT(*) FROM reserva AS r WHERE {condiciones}", parametros
+    ).fetchone()[0]
+
+
+@instrumentado
+@con_reintentos
+def cancelar_reservas_por_criterios(fecha_inicio, fecha_fin, clave_sala=None, clave_cliente=None, turno=None):
+    """Cancela con un solo UPDATE, en una transacción, todas las reservas activas que cumplen los criterios.
+
+    Devuelve la lista de folios cancelados para poder avisar a los clientes.
+    """
+    condiciones, parametros = _filtros_reservas(fecha_inicio, fecha_fin, clave_sala, clave_cliente, turno)
+    with transaccion() as conn:
+        folios = conn.execute(
+            f"UPDATE reserva AS r SET estado = 'CANCELADA' WHERE {condiciones} RETURNING folio", parametros
+        ).fetchall()
+    return sorted(folio for (folio,) in folios)
+
+
+FOLIOS_POR_LINEA = 10
+
+
+def guardar_folios(folios, ruta):
+    """Guarda los folios en un CSV de una columna. Devuelve la ruta."""
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo_csv:
+        escritor_csv = csv.writer(archivo_csv)
+        escritor_csv.writerow(["Folio"])
+        escritor_csv.writerows([folio] for folio in folios)
+    return ruta
+
+
+def mostrar_folios_cancelados(folios):
+    """Muestra los folios cancelados; si son muchos, por páginas o guardados en un archivo, según elija el usuario."""
+    if len(folios) <= FOLIOS_POR_LINEA:
+        print(f"Folios cancelados: {', '.join(str(folio) for folio in folios)}\n")
+        return
+
+    while True:
+        respuesta = input("\n¿Desea ver los folios cancelados (V), guardarlos en un archivo (A) o continuar (ENTER)? ").strip().upper()
+        if respuesta in ("", "V", "A"):
+            break
+        print("\nRespuesta no válida. Intente con 'V', 'A' o ENTER.")
+
+    if respuesta == "A":
+        ruta = guardar_folios(folios, f"folios_cancelados_{datetime.datetime.now():%Y%m%d_%H%M%S}.csv")
+        print(f"\nFolios guardados en '{ruta}'.\n")
+    elif respuesta == "V":
+        lineas = [folios[inicio:inicio + FOLIOS_POR_LINEA] for inicio in range(0, len(folios), FOLIOS_POR_LINEA)]
+        for inicio in range(0, len(lineas), TAMANO_PAGINA):
+            for linea in lineas[inicio:inicio + TAMANO_PAGINA]:
+                print(", ".join(str(folio) for folio in linea))
+            if inicio + TAMANO_PAGINA < len(lineas):
+                if input("\nPresione ENTER para ver la siguiente página o escriba 'EXIT' para terminar: ").strip().upper() == "EXIT":
+                    return
+
+
+@instrumentado
+def cancelar_reservas_en_bloque():
+    """Cancela todas las reservaciones de un rango que coincidan con la sala, el cliente o el turno indicados."""
+    fecha_inicio = pedir_fecha("Ingrese la primera fecha")
+    if not fecha_inicio:
+        return
+
+    while True:
+        fecha_fin = pedir_fecha("Ingrese la segunda fecha")
+        if not fecha_fin:
+            return
+        if fecha_fin < fecha_inicio:
+            print("\nLa segunda fecha no puede ser anterior a la primera.")
+            continue
+        break
+
+    try:
+        salas = {str(clave): clave for clave, _, _ in obtener_salas()}
+        clientes = {str(clave): clave for clave, _, _ in obtener_clientes()}
+        turnos = {tipo.upper(): tipo for _, tipo in obtener_turnos()}
+
+        clave_sala = pedir_filtro_opcional("Clave de sala", salas)
+        clave_cliente = pedir_filtro_opcional("Clave de cliente", clientes)
+        turno = pedir_filtro_opcional(f"Turno ({', '.join(turnos.values())})", turnos)
+
+        total = contar_reservas_por_criterios(fecha_inicio, fecha_fin, clave_sala, clave_cliente, turno)
+        if total == 0:
+            print("\nNo hay reservas activas que cumplan esos criterios.\n")
+            return
+
+        while True:
+            confirmacion = input(f"\nSe cancelarán {total} reservaciones. ¿Desea continuar? (S/N): ").strip().upper()
+            if confirmacion == "S":
+                break
+            elif confirmacion == "N":
+                print("\nCancelación abortada. Volviendo al menú.\n")
+                return
+            else:
+                print("\nRespuesta no válida. Intente con 'S' o 'N'.")
+
+        folios = cancelar_reservas_por_criterios(fecha_inicio, fecha_fin, clave_sala, clave_cliente, turno)
+        print(f"\nSe cancelaron {len(folios)} reservaciones.")
+        mostrar_folios_cancelados(folios)
+
+    except Error as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+# Las reservas cuya fecha quedó más atrás que DIAS_RETENCION, y las cancelaciones registradas hace más de
+# DIAS_RETENCION_CANCELADAS, ya no se reservan ni se modifican: archivar_reservas las mueve a reserva_archivo.
+DIAS_RETENCION = 365
+DIAS_RETENCION_CANCELADAS = 30
+TAMANO_LOTE_ARCHIVO = 2000
+
+# La reserva con el folio más alto nunca se archiva: reserva no usa AUTOINCREMENT y, si se quedara vacía
+# por arriba, SQLite volvería a repartir folios que ya existen en el archivo.
+CONDICION_ARCHIVO = """(fecha < ? OR (estado = 'CANCELADA' AND creado < ?))
+    AND folio < (SELECT MAX(folio) FROM reserva)"""
+
+
+@con_reintentos
+def _archivar_lote(dia_corte, creado_corte, archivado, tamano_lote):
+    """Mueve, en una transacción, el siguiente lote de reservas archivables. Devuelve cuántas movió."""
+    parametros = (dia_corte, creado_corte)
+    with transaccion() as conn:
+        tope = conn.execute(
+            f"SELECT MAX(folio) FROM (SELECT folio FROM reserva WHERE {CONDICION_ARCHIVO} ORDER BY folio LIMIT ?)",
+            (*parametros, tamano_lote)
+        ).fetchone()[0]
+        if tope is None:
+            return 0
+        conn.execute(
+            f"INSERT INTO reserva_archivo ({COLUMNAS_RESERVA}, archivado) "
+            f"SELECT {COLUMNAS_RESERVA}, ? FROM reserva WHERE {CONDICION_ARCHIVO} AND folio <= ?",
+            (archivado, *parametros, tope)
+        )
+        movidas = conn.execute(
+            f"DELETE FROM reserva WHERE {CONDICION_ARCHIVO} AND folio <= ?", (*parametros, tope)
+        ).rowcount
+    invalidar_cache("reserva_archivo")
+    return movidas
+
+
+@instrumentado
+def archivar_reservas(dias_retencion=DIAS_RETENCION, dias_canceladas=DIAS_RETENCION_CANCELADAS,
+                      tamano_lote=TAMANO_LOTE_ARCHIVO):
+    """Mueve a reserva_archivo las reservas pasadas y las cancelaciones viejas. Devuelve cuántas movió.
+
+    Trabaja por lotes de folios, cada uno en su propia transacción, para no bloquear las reservaciones
+    nuevas mientras dura. Los reportes siguen viendo lo archivado; la búsqueda y las modificaciones no.
+    """
+    ahora = datetime.datetime.now()
+    dia_corte = dia_de_fecha(ahora.date() - datetime.timedelta(days=dias_retencion))
+    creado_corte = (ahora - datetime.timedelta(days=dias_canceladas)).strftime("%Y-%m-%d %H:%M:%S")
+    archivado = ahora.strftime("%Y-%m-%d %H:%M:%S")
+
+    total = 0
+    while True:
+        movidas = _archivar_lote(dia_corte, creado_corte, archivado, tamano_lote)
+        total += movidas
+        if movidas < tamano_lote:
+            return total
+
+
+@instrumentado
+def archivar_reservas_antiguas():
+    """Pide confirmación y archiva las reservaciones pasadas y las cancelaciones viejas."""
+    print(f"\nSe archivarán las reservaciones de hace más de {DIAS_RETENCION} días y las cancelaciones "
+          f"registradas hace más de {DIAS_RETENCION_CANCELADAS} días.")
+    print("Seguirán apareciendo en los reportes, pero ya no podrán editarse, cancelarse ni buscarse por evento.")
+
+    while True:
+        confirmacion = input("\n¿Desea continuar? (S/N): ").strip().upper()
+        if confirmacion == "S":
+            break
+        elif confirmacion == "N":
+            print("\nArchivado cancelado. Volviendo al menú.\n")
+            return
+        else:
+            print("\nRespuesta no válida. Intente con 'S' o 'N'.")
+
+    try:
+        total = archivar_reservas()
+        print(f"\nSe archivaron {total} reservaciones.\n")
+    except Error as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+ENCABEZADOS_OCUPACION = ["Sección", "Concepto", "Reservas activas", "Canceladas", "Espacios", "Ocupación %", "Cancelación %"]
+LIMITE_CLIENTES_FRECUENTES = 10
+
+
+def _porcentaje(parte, total):
+    return round(100 * parte / total, 1) if total else None
+
+
+def _dias_reservables(fecha_inicio, fecha_fin):
+    """Cuenta los días en que se puede reservar (todos menos domingo) por (mes, día de la semana), en meses completos."""
+    fecha = fecha_inicio.replace(day=1)
+    ultimo_dia = (fecha_fin.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+    dias = {}
+    while fecha <= ultimo_dia:
+        if fecha.weekday() != 6:
+            llave = (fecha.strftime("%Y-%m"), fecha.weekday())
+            dias[llave] = dias.get(llave, 0) + 1
+        fecha += datetime.timedelta(days=1)
+    return dias
+
+
+@instrumentado
+def obtener_analitica_ocupacion(fecha_inicio, fecha_fin, limite_clientes=LIMITE_CLIENTES_FRECUENTES):
+    """Devuelve las filas del reporte de ocupación de los meses que abarca el rango, incluidas las reservas archivadas.
+
+    Cada fila es (sección, concepto, activas, canceladas, espacios, ocupación %, cancelación %). Se lee
+    solo de los acumulados, así que el costo depende del número de meses, salas y turnos, no del
+    número de reservas.
+    """
+    meses = (fecha_inicio.strftime("%Y-%m"), fecha_fin.strftime("%Y-%m"))
+    dias = _dias_reservables(fecha_inicio, fecha_fin)
+    turnos = dict(obtener_turnos())
+    salas = {clave: nombre for clave, nombre, _ in obtener_salas()}
+    espacios_por_dia = len(salas) * len(turnos)
+    conn = obtener_conexion()
+
+    def agrupar(columna, orden=None):
+        return conn.execute(
+            f"SELECT {columna}, SUM(activas), SUM(canceladas) FROM ocupacion WHERE mes BETWEEN ? AND ? "
+            f"GROUP BY {columna} ORDER BY {orden or columna}", meses
+        ).fetchall()
+
+    def fila(seccion, concepto, activas, canceladas, espacios):
+        return (seccion, concepto, activas, canceladas, espacios,
+                _porcentaje(activas, espacios), _porcentaje(canceladas, activas + canceladas))
+
+    total_dias = sum(dias.values())
+    activas, canceladas = conn.execute(
+        "SELECT COALESCE(SUM(activas), 0), COALESCE(SUM(canceladas), 0) FROM ocupacion WHERE mes BETWEEN ? AND ?", meses
+    ).fetchone()
+    filas = [fila("Total", f"{meses[0]} a {meses[1]}", activas, canceladas, total_dias * espacios_por_dia)]
+
+    filas += [fila("Sala", salas.get(clave, clave), activas, canceladas, total_dias * len(turnos))
+              for clave, activas, canceladas in agrupar("clave_sala")]
+    filas += [fila("Turno", turnos.get(clave, clave), activas, canceladas, total_dias * len(salas))
+              for clave, activas, canceladas in agrupar("clave_turno", orden="2 DESC, 1")]
+
+    dias_por_semana = {}
+    for (_, dia_semana), total in dias.items():
+        dias_por_semana[dia_semana] = dias_por_semana.get(dia_semana, 0) + total
+    filas += [fila("Día", DIAS_SEMANA[dia_semana], activas, canceladas, dias_por_semana.get(dia_semana, 0) * espacios_por_dia)
+              for dia_semana, activas, canceladas in agrupar("dia_semana")]
+
+    dias_por_mes = {}
+    for (mes, _), total in dias.items():
+        dias_por_mes[mes] = dias_por_mes.get(mes, 0) + total
+    filas += [fila("Mes", mes, activas, canceladas, dias_por_mes.get(mes, 0) * espacios_por_dia)
+              for mes, activas, canceladas in agrupar("mes")]
+
+    # Solo se nombra a los clientes que entran al top, uniendo clientes en la misma consulta.
+    frecuentes = conn.execute(
+        """SELECT COALESCE(c.nombre || ' ' || c.apellido, o.clave_cliente), SUM(o.activas), SUM(o.canceladas)
+           FROM ocupacion_clientes AS o LEFT JOIN clientes AS c ON c.clave = o.clave_cliente
+           WHERE o.mes BETWEEN ? AND ?
+           GROUP BY o.clave_cliente ORDER BY 2 DESC, o.clave_cliente LIMIT ?""", (*meses, limite_clientes)
+    ).fetchall()
+    filas += [fila("Cliente", nombre, activas, canceladas, None) for nombre, activas, canceladas in frecuentes]
+    return filas
+
+
+@instrumentado
+def exportar_analitica_ocupacion(fecha_inicio, fecha_fin, formato, ruta=None):
+    """Exporta el reporte de ocupación en el formato indicado. Devuelve la ruta del archivo y el número de filas."""
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+    exportador, extension = EXPORTADORES[formato]
+    ruta = ruta or f"ocupacion.{extension}"
+    return ruta, exportador(obtener_analitica_ocupacion(fecha_inicio, fecha_fin), ruta, ENCABEZADOS_OCUPACION)
+
+
+@instrumentado
+@con_reintentos
+def reconstruir_ocupacion():
+    """Recalcula desde cero los acumulados de ocupación. Devuelve cuántos acumulados quedaron."""
+    with transaccion() as conn:
+        _reconstruir_ocupacion(conn.cursor())
+        return conn.execute("SELECT COUNT(*) FROM ocupacion").fetchone()[0]
+
+
+@instrumentado
+def consultar_estadisticas_de_ocupacion():
+    """Muestra el reporte de ocupación de un rango de meses y permite exportarlo, o reconstruye los acumulados."""
+    print("\n" + "=" * 30)
+    print(f"{'ESTADÍSTICAS DE OCUPACIÓN':^28}")
+    print("=" * 30)
+    print("1. Consultar la ocupación de un rango de fechas")
+    print("2. Reconstruir los acumulados de ocupación")
+
+    try:
+        opcion_estadisticas = int(input("\nSeleccione una opción: ").strip())
+    except ValueError:
+        print("\nSolo se aceptan números enteros de los que están disponibles (1-2).")
+        return
+
+    try:
+        if opcion_estadisticas == 2:
+            total = reconstruir_ocupacion()
+            print(f"\nSe reconstruyeron los acumulados de ocupación ({total} registros).\n")
+            return
+        if opcion_estadisticas != 1:
+            print("\nOpción inválida.")
+            return
+
+        fecha_inicio = pedir_fecha("Ingrese una fecha del primer mes")
+        if not fecha_inicio:
+            return
+        while True:
+            fecha_fin = pedir_fecha("Ingrese una fecha del último mes")
+            if not fecha_fin:
+                return
+            if fecha_fin < fecha_inicio:
+                print("\nLa segunda fecha no puede ser anterior a la primera.")
+                continue
+            break
+
+        filas = obtener_analitica_ocupacion(fecha_inicio, fecha_fin)
+        print(tabulate(filas, headers=ENCABEZADOS_OCUPACION, tablefmt="grid"))
+
+        while True:
+            confirmacion = input("\n¿Desea exportar el reporte? (S/N): ").strip().upper()
+            if confirmacion == "N":
+                return
+            elif confirmacion == "S":
+                break
+            else:
+                print("\nRespuesta no válida. Intente con 'S' o 'N'.")
+
+        formato = pedir_formato_exportacion()
+        if formato:
+            ruta, _ = exportar_analitica_ocupacion(fecha_inicio, fecha_fin, formato)
+            print(f"\nReporte exportado a '{ruta}'")
+
+    except Error as e:
+        print(e)
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+
+
+TAMANO_LOTE_CAMBIOS = 1000
+
+
+@instrumentado
+def leer_cambios(despues_de=0, limite=TAMANO_LOTE_CAMBIOS):
+    """Devuelve hasta `limite` cambios con id mayor que despues_de, en orden.
+
+    Cada cambio es un diccionario (id, tabla, operacion, clave, datos, registrado) con los datos ya
+    convertidos de JSON. Se lee por la llave primaria, así que el costo depende de los cambios leídos.
+    """
+    return [
+        {"id": id_cambio, "tabla": tabla, "operacion": operacion, "clave": clave,
+         "datos": json.loads(datos), "registrado": registrado}
+        for id_cambio, tabla, operacion, clave, datos, registrado in obtener_conexion().execute(
+            "SELECT id, tabla, operacion, clave, datos, registrado FROM cambios WHERE id > ? ORDER BY id LIMIT ?",
+            (despues_de, limite)
+        )
+    ]
+
+
+def marca_de_consumidor(consumidor):
+    """Devuelve el id del último cambio que confirmó el consumidor (0 si nunca ha confirmado)."""
+    fila = obtener_conexion().execute(
+        "SELECT ultimo_id FROM consumidores_cambios WHERE consumidor = ?", (consumidor,)
+    ).fetchone()
+    return fila[0] if fila else 0
+
+
+@instrumentado
+def consumir_cambios(consumidor, limite=TAMANO_LOTE_CAMBIOS):
+    """Devuelve el siguiente lote de cambios pendientes del consumidor, sin mover su marca.
+
+    El consumidor confirma con confirmar_cambios después de procesarlos; si falla antes, el mismo lote
+    se vuelve a entregar (entrega al menos una vez).
+    """
+    return leer_cambios(marca_de_consumidor(consumidor), limite)
+
+
+@instrumentado
+@con_reintentos
+def confirmar_cambios(consumidor, ultimo_id):
+    """Avanza la marca del consumidor hasta ultimo_id. La marca nunca retrocede."""
+    with transaccion() as conn:
+        conn.execute("""
+            INSERT INTO consumidores_cambios (consumidor, ultimo_id, actualizado) VALUES (?, ?, ?)
+            ON CONFLICT (consumidor) DO UPDATE
+            SET ultimo_id = MAX(ultimo_id, excluded.ultimo_id), actualizado = excluded.actualizado
+        """, (consumidor, ultimo_id, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+
+def sincronizar_cambios(consumidor, procesar, limite=TAMANO_LOTE_CAMBIOS):
+    """Entrega a procesar(lote) todos los cambios pendientes del consumidor, confirmando cada lote procesado.
+
+    Devuelve cuántos cambios se procesaron.
+    """
+    total = 0
+    while True:
+        lote = consumir_cambios(consumidor, limite)
+        if not lote:
+            return total
+        procesar(lote)
+        confirmar_cambios(consumidor, lote[-1]["id"])
+        total += len(lote)
+
+
+@instrumentado
+@con_reintentos
+def depurar_cambios():
+    """Borra los cambios que ya confirmaron todos los consumidores registrados. Devuelve cuántos borró."""
+    with transaccion() as conn:
+        return conn.execute(
+            "DELETE FROM cambios WHERE id <= (SELECT MIN(ultimo_id) FROM consumidores_cambios)"
+        ).rowcount
+
+
+DIRECTORIO_RESPALDOS = "respaldos"
+RESPALDOS_CONSERVADOS = 7
+# Páginas que copia cada paso del respaldo y pausa entre pasos: cada paso es corto y entre uno y otro
+# las reservaciones siguen escribiendo.
+PAGINAS_POR_PASO = 256
+PAUSA_ENTRE_PASOS = 0.005
+
+
+@instrumentado
+def respaldar_base(directorio=DIRECTORIO_RESPALDOS, paginas_por_paso=PAGINAS_POR_PASO, pausa=PAUSA_ENTRE_PASOS):
+    """Copia la base en caliente con la API de respaldo de SQLite, por pasos, y verifica la copia.
+
+    El respaldo abre su propia conexión y mantiene una transacción de lectura durante toda la copia:
+    en modo WAL eso fija una imagen consistente de la base sin bloquear a quienes escriben, y evita
+    que el respaldo vuelva a empezar cada vez que alguien reserva. La copia se escribe con otro nombre
+    y solo se renombra cuando PRAGMA quick_check la aprueba. Devuelve un diccionario con la ruta,
+    páginas, bytes, pasos y segundos.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    nombre = os.path.splitext(os.path.basename(RUTA_BD))[0]
+    ruta = os.path.join(directorio, f"{nombre}_{datetime.datetime.now():%Y%m%d_%H%M%S_%f}.db")
+    ruta_parcial = ruta + ".parcial"
+    pasos = 0
+
+    def progreso(estado, restantes, total):
+        nonlocal pasos
+        pasos += 1
+        if restantes:
+            time.sleep(pausa)
+
+    inicio = time.perf_counter()
+    origen = abrir_conexion()
+    destino = sqlite3.connect(ruta_parcial)
+    try:
+        origen.execute("BEGIN")
+        paginas = origen.execute("PRAGMA page_count").fetchone()[0]
+        origen.backup(destino, pages=paginas_por_paso, progress=progreso)
+        origen.rollback()
+        resultado_verificacion = destino.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        destino.close()
+        origen.close()
+
+    if resultado_verificacion != "ok":
+        os.remove(ruta_parcial)
+        raise Error(f"El respaldo no pasó la verificación: {resultado_verificacion}")
+    os.replace(ruta_parcial, ruta)
+    return {
+        "ruta": ruta, "paginas": paginas, "bytes": os.path.getsize(ruta), "pasos": pasos,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def rotar_respaldos(directorio=DIRECTORIO_RESPALDOS, conservar=RESPALDOS_CONSERVADOS):
+    """Borra los respaldos más viejos de la base actual y deja solo los `conservar` más recientes. Devuelve los borrados."""
+    prefijo = os.path.splitext(os.path.basename(RUTA_BD))[0] + "_"
+    respaldos = sorted(
+        archivo for archivo in os.listdir(directorio) if archivo.startswith(prefijo) and archivo.endswith(".db")
+    )
+    borrados = respaldos[:max(0, len(respaldos) - conservar)]
+    for archivo in borrados:
+        os.remove(os.path.join(directorio, archivo))
+    return borrados
+
+
+def programar_respaldos(intervalo, directorio=DIRECTORIO_RESPALDOS, conservar=RESPALDOS_CONSERVADOS,
+                        repeticiones=None, al_terminar=None):
+    """Respalda cada `intervalo` segundos (contados desde el inicio de cada respaldo) y rota los viejos.
+
+    Corre hasta completar `repeticiones` respaldos, o indefinidamente si es None. al_terminar(resultado)
+    recibe el resultado de cada respaldo, con la lista de archivos rotados en "rotados".
+    """
+    realizados = 0
+    siguiente = time.monotonic()
+    while repeticiones is None or realizados < repeticiones:
+        time.sleep(max(0.0, siguiente - time.monotonic()))
+        siguiente = time.monotonic() + intervalo
+        resultado = respaldar_base(directorio)
+        resultado["rotados"] = rotar_respaldos(directorio, conservar)
+        realizados += 1
+        if al_terminar:
+            al_terminar(resultado)
+    return realizados
+
+
+def _contar_filas(conn):
+    return {
+        tabla: conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+        for (tabla,) in conn.execute(
+            "SELECT name FROM sqlite_schema WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND name NOT LIKE '%_fts%' ORDER BY name"
+        ).fetchall()
+    }
+
+
+@instrumentado
+def restaurar_base(respaldo, destino=None):
+    """Restaura un respaldo sobre la base (o sobre destino) y comprueba que quedó igual al respaldo.
+
+    Antes de copiar se revisa el respaldo con PRAGMA integrity_check y que su versión de esquema sea
+    conocida; después se comparan la versión y el número de filas de cada tabla. Las demás instancias
+    del programa deben estar detenidas. Devuelve un diccionario con la ruta, las filas por tabla y los
+    segundos que tomó verificar y copiar.
+    """
+    destino = destino or RUTA_BD
+    inicio = time.perf_counter()
+    origen = sqlite3.connect(f"file:{respaldo}?mode=ro", uri=True)
+    try:
+        verificacion = origen.execute("PRAGMA integrity_check").fetchone()[0]
+        if verificacion != "ok":
+            raise Error(f"El respaldo está dañado: {verificacion}")
+        version = origen.execute("PRAGMA user_version").fetchone()[0]
+        if version > len(MIGRACIONES):
+            raise Error(f"El respaldo es de una versión de esquema más nueva ({version}) que este programa.")
+        filas = _contar_filas(origen)
+        segundos_verificacion = time.perf_counter() - inicio
+
+        if os.path.abspath(destino) == os.path.abspath(RUTA_BD):
+            cerrar_conexion()
+        copia = sqlite3.connect(destino)
+        try:
+            origen.backup(copia)
+            restaurado = (copia.execute("PRAGMA user_version").fetchone()[0], _contar_filas(copia))
+        finally:
+            copia.close()
+    finally:
+        origen.close()
+
+    if restaurado != (version, filas):
+        raise Error("La base restaurada no coincide con el respaldo.")
+    if os.path.abspath(destino) == os.path.abspath(RUTA_BD):
+        configurar_base_de_datos(destino)
+    return {
+        "ruta": destino, "version": version, "filas": filas,
+        "segundos_verificacion": round(segundos_verificacion, 3),
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+# Códigos de salida de la línea de comandos. argparse ya termina con 2 cuando los argumentos no son válidos.
+SALIDA_EXITO = 0
+SALIDA_RECHAZADA = 1
+SALIDA_USO = 2
+SALIDA_ERROR = 3
+
+TAMANO_GRUPO_LOTE = 500
+
+
+class OperacionRechazada(Exception):
+    """Operación de la línea de comandos que no procede; el mensaje explica por qué."""
+
+
+def operacion_reservar(cliente, sala, fecha, turno, evento):
+    evento = " ".join(evento.split())
+    if evento == "":
+        raise OperacionRechazada("El nombre del evento es obligatorio y no puede dejarse vacío.")
+    turno = turno.capitalize()
+    error_validacion = validar_reserva(cliente, fecha, sala, turno)
+    if error_validacion:
+        raise OperacionRechazada(error_validacion)
+    folio = reservar_sala(cliente, fecha, sala, turno, evento)
+    if folio is None:
+        raise OperacionRechazada("La sala ya está reservada para ese turno y fecha.")
+    return {"folio": folio}
+
+
+def operacion_cancelar(folio):
+    if not cancelar_reserva(folio):
+        raise OperacionRechazada(f"No existe una reserva activa con folio {folio}.")
+    return {"folio": folio, "estado": "CANCELADA"}
+
+
+def operacion_editar_evento(folio, evento):
+    evento = " ".join(evento.split())
+    if evento == "":
+        raise OperacionRechazada("El nombre del evento es obligatorio y no puede dejarse vacío.")
+    if not actualizar_evento(folio, evento):
+        raise OperacionRechazada(f"No existe la reserva con folio {folio}.")
+    return {"folio": folio, "evento": evento.capitalize()}
+
+
+def operacion_agregar_cliente(nombre, apellido):
+    nombre, apellido = nombre.strip(), apellido.strip()
+    for texto in (nombre, apellido):
+        error_validacion = validar_nombre(texto)
+        if error_validacion:
+            raise OperacionRechazada(error_validacion)
+    return {"clave": agregar_cliente(nombre, apellido)}
+
+
+def operacion_agregar_sala(nombre, cupo):
+    nombre = nombre.strip()
+    if nombre == "":
+        raise OperacionRechazada("No se puede omitir el nombre de la sala.")
+    cupo, error_validacion = validar_cupo(cupo)
+    if error_validacion:
+        raise OperacionRechazada(error_validacion)
+    return {"clave": agregar_sala(nombre, cupo)}
+
+
+# Operaciones de escritura disponibles como subcomando y en el modo por lotes: función y conversión de cada campo.
+OPERACIONES_CLI = {
+    "reservar": (operacion_reservar, {"cliente": int, "sala": int, "fecha": convertir_fecha, "turno": str, "evento": str}),
+    "cancelar": (operacion_cancelar, {"folio": int}),
+    "editar-evento": (operacion_editar_evento, {"folio": int, "evento": str}),
+    "agregar-cliente": (operacion_agregar_cliente, {"nombre": str, "apellido": str}),
+    "agregar-sala": (operacion_agregar_sala, {"nombre": str, "cupo": int}),
+}
+
+
+def _argumentos_de_registro(registro):
+    """Convierte una línea del modo por lotes en (función, argumentos). Lanza OperacionRechazada si no es válida."""
+    if not isinstance(registro, dict):
+        raise OperacionRechazada("Cada línea debe ser un objeto JSON.")
+    nombre_operacion = registro.get("operacion")
+    if nombre_operacion not in OPERACIONES_CLI:
+        raise OperacionRechazada(f"Operación desconocida: {nombre_operacion!r}.")
+
+    funcion, campos = OPERACIONES_CLI[nombre_operacion]
+    argumentos = []
+    for campo, conversion in campos.items():
+        valor = registro.get(campo)
+        if valor is None or isinstance(valor, bool) or isinstance(valor, (dict, list)):
+            raise OperacionRechazada(f"No se puede omitir el campo '{campo}'.")
+        try:
+            argumentos.append(conversion(valor) if conversion is not str else str(valor))
+        except (TypeError, ValueError):
+            raise OperacionRechazada(f"El campo '{campo}' no es válido: {valor!r}.")
+    return funcion, argumentos
+
+
+def _solicitud_de_asignacion(registro, reservar):
+    """Convierte una línea de la asignación por lotes en la solicitud que espera asignar_salas_en_lote."""
+    if not isinstance(registro, dict):
+        raise ValueError("Cada línea debe ser un objeto JSON.")
+    campos = {"asistentes": int, "fecha": convertir_fecha, "turno": str}
+    if reservar:
+        campos.update({"cliente": int, "evento": str})
+    solicitud = {}
+    for campo, conversion in campos.items():
+        if registro.get(campo) is None:
+            raise ValueError(f"No se puede omitir el campo '{campo}'.")
+        solicitud[campo] = conversion(registro[campo])
+    solicitud["turno"] = solicitud["turno"].capitalize()
+    return solicitud
+
+
+@con_reintentos
+def _aplicar_grupo(grupo):
+    """Aplica un grupo de operaciones en una sola transacción, con un SAVEPOINT por operación.
+
+    Una operación rechazada solo deshace su propio SAVEPOINT. Devuelve un resultado por operación.
+    """
+    resultados = []
+    try:
+        with transaccion():
+            for numero, funcion, argumentos in grupo:
+                try:
+                    with transaccion():
+                        resultados.append({"linea": numero, "ok": True, **funcion(*argumentos)})
+                except (OperacionRechazada, Error, ValueError) as e:
+                    resultados.append({"linea": numero, "ok": False, "error": str(e)})
+    except BaseException:
+        invalidar_cache()
+        raise
+    return resultados
+
+
+def ejecutar_lote(entrada, salida, tamano_grupo=TAMANO_GRUPO_LOTE):
+    """Ejecuta las operaciones NDJSON de entrada por grupos y escribe un resultado NDJSON por línea en salida.
+
+    Cada línea es un objeto con "operacion" (reservar, cancelar, editar-evento, agregar-cliente o
+    agregar-sala) y sus campos. Devuelve (operaciones aplicadas, operaciones rechazadas).
+    """
+    aplicadas = rechazadas = 0
+
+    def escribir(resultados):
+        nonlocal aplicadas, rechazadas
+        for resultado in resultados:
+            if resultado["ok"]:
+                aplicadas += 1
+            else:
+                rechazadas += 1
+            salida.write(json.dumps(resultado, ensure_ascii=False, default=str) + "\n")
+
+    grupo = []
+    pendientes = []
+    for numero, linea in enumerate(entrada, start=1):
+        if not linea.strip():
+            continue
+        try:
+            funcion, argumentos = _argumentos_de_registro(json.loads(linea))
+        except json.JSONDecodeError as e:
+            pendientes.append({"linea": numero, "ok": False, "error": f"JSON inválido: {e.msg}."})
+            continue
+        except OperacionRechazada as e:
+            pendientes.append({"linea": numero, "ok": False, "error": str(e)})
+            continue
+        grupo.append((numero, funcion, argumentos))
+        if len(grupo) == tamano_grupo:
+            escribir(sorted(pendientes + _aplicar_grupo(grupo), key=lambda resultado: resultado["linea"]))
+            grupo, pendientes = [], []
+
+    escribir(sorted(pendientes + (_aplicar_grupo(grupo) if grupo else []), key=lambda resultado: resultado["linea"]))
+    salida.flush()
+    return aplicadas, rechazadas
+
+
+def _fecha_argumento(texto):
+    try:
+        return convertir_fecha(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha no válida: {texto!r}; use aaaa-mm-dd o mm-dd-aaaa")
+
+
+def crear_parser():
+    """Arma el parser de la línea de comandos. Sin subcomando se abre el menú interactivo."""
+    parser = argparse.ArgumentParser(
+        prog="PIA.py", description="Reservaciones de salas. Sin subcomando se abre el menú interactivo."
+    )
+    parser.add_argument("--bd", help="Ruta de la base de datos (por omisión, la variable PIA_BD o ReservasCoworking.db).")
+    parser.add_argument("--instrumentar", action="store_true", help="Mide operaciones y sentencias (resumen en stderr).")
+    subcomandos = parser.add_subparsers(dest="subcomando", metavar="subcomando")
+
+    reservar = subcomandos.add_parser("reservar", aliases=["book"], help="Reserva una sala.")
+    reservar.add_argument("--cliente", type=int, required=True)
+    reservar.add_argument("--sala", type=int, required=True)
+    reservar.add_argument("--fecha", type=_fecha_argumento, required=True, help="aaaa-mm-dd o mm-dd-aaaa")
+    reservar.add_argument("--turno", required=True)
+    reservar.add_argument("--evento", required=True)
+
+    cancelar = subcomandos.add_parser("cancelar", aliases=["cancel"], help="Cancela una reserva activa.")
+    cancelar.add_argument("folio", type=int)
+
+    editar = subcomandos.add_parser("editar-evento", aliases=["edit-event"], help="Cambia el nombre del evento.")
+    editar.add_argument("folio", type=int)
+    editar.add_argument("evento")
+
+    cliente = subcomandos.add_parser("agregar-cliente", aliases=["add-client"], help="Registra un cliente.")
+    cliente.add_argument("nombre")
+    cliente.add_argument("apellido")
+
+    sala = subcomandos.add_parser("agregar-sala", aliases=["add-room"], help="Registra una sala.")
+    sala.add_argument("nombre")
+    sala.add_argument("cupo", type=int)
+
+    reporte = subcomandos.add_parser("reporte", aliases=["report"], help="Reporte de reservas de una fecha.")
+    reporte.add_argument("--fecha", type=_fecha_argumento, default=datetime.date.today(), help="Por omisión, hoy.")
+    reporte.add_argument("--formato", choices=sorted(EXPORTADORES), help="Exporta en lugar de imprimir la tabla.")
+    reporte.add_argument("--salida", help="Ruta del archivo exportado.")
+
+    exportar = subcomandos.add_parser("exportar", aliases=["export"], help="Exporta las reservas activas.")
+    exportar.add_argument("--formato", choices=sorted(EXPORTADORES) + sorted(FORMATOS_COLUMNARES), default="csv")
+    exportar.add_argument("--salida", help="Ruta del archivo exportado.")
+    exportar.add_argument("--desde", type=_fecha_argumento)
+    exportar.add_argument("--hasta", type=_fecha_argumento)
+    exportar.add_argument("--columnas", nargs="+", metavar="COLUMNA",
+                          help=f"Solo Parquet/Arrow: columnas a exportar ({', '.join(COLUMNAS_COLUMNARES)}).")
+    exportar.add_argument("--incluir-canceladas", action="store_true", help="Solo Parquet/Arrow.")
+
+    reportes = subcomandos.add_parser("exportar-reportes", aliases=["export-reports"],
+                                      help="Exporta en paralelo un reporte por fecha (o por sala) del rango, con manifiesto.")
+    reportes.add_argument("--desde", type=_fecha_argumento, required=True)
+    reportes.add_argument("--hasta", type=_fecha_argumento, required=True)
+    reportes.add_argument("--formatos", nargs="+", choices=sorted(EXPORTADORES), default=["csv"])
+    reportes.add_argument("--por", choices=["fecha", "sala"], default="fecha", help="Partición de los archivos.")
+    reportes.add_argument("--directorio", help="Directorio nuevo para los archivos; por omisión, uno con nombre único.")
+    reportes.add_argument("--gzip", action="store_true", help="Comprime los archivos CSV y JSON.")
+    reportes.add_argument("--trabajadores", type=int, default=TRABAJADORES_EXPORTACION)
+
+    sugerir = subcomandos.add_parser("sugerir-sala", aliases=["suggest-room"],
+                                     help="Sala libre más ajustada para un número de asistentes, con alternativas.")
+    sugerir.add_argument("--asistentes", type=int, required=True)
+    sugerir.add_argument("--fecha", type=_fecha_argumento, required=True)
+    sugerir.add_argument("--turno", required=True)
+    sugerir.add_argument("--alternativas", type=int, default=ALTERNATIVAS_SALA)
+
+    asignar = subcomandos.add_parser("asignar", aliases=["allocate"],
+                                     help="Coloca en salas las solicitudes NDJSON de stdin minimizando asientos sobrantes.")
+    asignar.add_argument("--reservar", action="store_true",
+                         help="Reserva las salas asignadas (cada solicitud debe traer cliente y evento).")
+
+    cambios = subcomandos.add_parser("cambios", aliases=["changes"],
+                                     help="Escribe en NDJSON los cambios pendientes de un consumidor.")
+    cambios.add_argument("--consumidor", required=True)
+    cambios.add_argument("--limite", type=int, default=TAMANO_LOTE_CAMBIOS, help="Cambios por lote.")
+    cambios.add_argument("--confirmar", action="store_true",
+                         help="Avanza la marca del consumidor después de escribir cada lote.")
+    cambios.add_argument("--depurar", action="store_true",
+                         help="Al terminar, borra los cambios que ya confirmaron todos los consumidores.")
+
+    respaldar = subcomandos.add_parser("respaldar", aliases=["backup"],
+                                       help="Respalda la base en caliente por pasos y rota los respaldos viejos.")
+    respaldar.add_argument("--directorio", default=DIRECTORIO_RESPALDOS)
+    respaldar.add_argument("--conservar", type=int, default=RESPALDOS_CONSERVADOS, help="Respaldos que se conservan.")
+    respaldar.add_argument("--cada", type=float, metavar="MINUTOS",
+                           help="Repite el respaldo cada tantos minutos hasta que se interrumpa.")
+
+    restaurar = subcomandos.add_parser("restaurar", aliases=["restore"],
+                                       help="Verifica un respaldo y lo restaura sobre la base.")
+    restaurar.add_argument("respaldo")
+    restaurar.add_argument("--destino", help="Restaura en otra ruta en lugar de la base configurada.")
+
+    lote = subcomandos.add_parser("lote", aliases=["batch"],
+                                  help="Lee operaciones NDJSON de stdin y escribe un resultado NDJSON por línea.")
+    lote.add_argument("--tamano-grupo", type=int, default=TAMANO_GRUPO_LOTE,
+                      help="Operaciones confirmadas en cada transacción.")
+    return parser
+
+
+# Los alias en inglés llegan a argparse con su propio nombre; aquí se traducen al subcomando principal.
+ALIAS_SUBCOMANDOS = {
+    "book": "reservar", "cancel": "cancelar", "edit-event": "editar-evento", "add-client": "agregar-cliente",
+    "add-room": "agregar-sala", "report": "reporte", "export": "exportar", "export-reports": "exportar-reportes",
+    "suggest-room": "sugerir-sala", "allocate": "asignar", "changes": "cambios",
+    "backup": "respaldar", "restore": "restaurar", "batch": "lote",
+}
+
+
+def ejecutar_subcomando(argumentos):
+    """Ejecuta el subcomando ya interpretado por argparse y devuelve el código de salida."""
+    subcomando = ALIAS_SUBCOMANDOS.get(argumentos.subcomando, argumentos.subcomando)
+
+    if subcomando in OPERACIONES_CLI:
+        funcion, campos = OPERACIONES_CLI[subcomando]
+        resultado = funcion(*(getattr(argumentos, campo) for campo in campos))
+        print(json.dumps(resultado, ensure_ascii=False))
+    elif subcomando == "reporte":
+        if argumentos.formato:
+            ruta, total = exportar_reporte_del_dia(argumentos.fecha, argumentos.formato, argumentos.salida)
+            print(json.dumps({"ruta": ruta, "filas": total}, ensure_ascii=False))
+        else:
+            print(tabulate(obtener_reporte_del_dia(argumentos.fecha), headers=ENCABEZADOS_REPORTE, tablefmt="grid"))
+    elif subcomando == "exportar":
+        if argumentos.formato in FORMATOS_COLUMNARES:
+            ruta, total = exportar_reservas_columnar(
+                argumentos.formato, argumentos.salida, argumentos.desde, argumentos.hasta,
+                argumentos.columnas, argumentos.incluir_canceladas
+            )
+        elif argumentos.columnas or argumentos.incluir_canceladas:
+            print("--columnas e --incluir-canceladas solo aplican a los formatos parquet y arrow.", file=sys.stderr)
+            return SALIDA_USO
+        else:
+            ruta, total = exportar_reservas(argumentos.formato, argumentos.salida, argumentos.desde, argumentos.hasta)
+        print(json.dumps({"ruta": ruta, "filas": total}, ensure_ascii=False))
+    elif subcomando == "exportar-reportes":
+        if argumentos.hasta < argumentos.desde:
+            print("La fecha final no puede ser anterior a la inicial.", file=sys.stderr)
+            return SALIDA_USO
+        directorio, manifiesto = exportar_reportes_particionados(
+            argumentos.desde, argumentos.hasta, argumentos.formatos, argumentos.por, argumentos.directorio,
+            argumentos.gzip, argumentos.trabajadores
+        )
+        print(json.dumps({"directorio": directorio, "archivos": len(manifiesto["archivos"]),
+                          "filas": sum(archivo["filas"] for archivo in manifiesto["archivos"])}, ensure_ascii=False))
+    elif subcomando == "sugerir-sala":
+        salas = sugerir_salas(argumentos.asistentes, argumentos.fecha, argumentos.turno, argumentos.alternativas)
+        print(json.dumps([dict(zip(("clave", "nombre", "cupo", "sobrantes"), sala)) for sala in salas], ensure_ascii=False))
+        return SALIDA_EXITO if salas else SALIDA_RECHAZADA
+    elif subcomando == "asignar":
+        resultados = {}
+        solicitudes = []
+        for numero, linea in enumerate(sys.stdin, start=1):
+            if not linea.strip():
+                continue
+            try:
+                solicitudes.append((numero, _solicitud_de_asignacion(json.loads(linea), argumentos.reservar)))
+            except json.JSONDecodeError as e:
+                resultados[numero] = {"motivo": f"JSON inválido: {e.msg}."}
+            except (TypeError, ValueError) as e:
+                resultados[numero] = {"motivo": str(e)}
+        asignaciones = asignar_salas_en_lote([solicitud for _, solicitud in solicitudes], argumentos.reservar)
+        resultados.update(zip((numero for numero, _ in solicitudes), asignaciones))
+        for numero in sorted(resultados):
+            print(json.dumps({"solicitud": numero, **resultados[numero]}, ensure_ascii=False))
+        return SALIDA_RECHAZADA if any("motivo" in resultado for resultado in resultados.values()) else SALIDA_EXITO
+    elif subcomando == "cambios":
+        if argumentos.limite <= 0:
+            print("El límite debe ser un entero positivo.", file=sys.stderr)
+            return SALIDA_USO
+
+        def escribir(lote):
+            for cambio in lote:
+                sys.stdout.write(json.dumps(cambio, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+
+        if argumentos.confirmar:
+            total = sincronizar_cambios(argumentos.consumidor, escribir, argumentos.limite)
+        else:
+            lote = consumir_cambios(argumentos.consumidor, argumentos.limite)
+            escribir(lote)
+            total = len(lote)
+        print(f"Cambios escritos: {total}.", file=sys.stderr)
+        if argumentos.depurar:
+            print(f"Cambios depurados: {depurar_cambios()}.", file=sys.stderr)
+    elif subcomando == "respaldar":
+        if argumentos.conservar <= 0 or (argumentos.cada is not None and argumentos.cada <= 0):
+            print("--conservar y --cada deben ser positivos.", file=sys.stderr)
+            return SALIDA_USO
+
+        def informar(resultado):
+            print(json.dumps(resultado, ensure_ascii=False), flush=True)
+
+        try:
+            programar_respaldos((argumentos.cada or 0) * 60, argumentos.directorio, argumentos.conservar,
+                                None if argumentos.cada else 1, informar)
+        except KeyboardInterrupt:
+            print("Respaldos programados detenidos.", file=sys.stderr)
+    elif subcomando == "restaurar":
+        if not os.path.isfile(argumentos.respaldo):
+            print(f"No existe el respaldo '{argumentos.respaldo}'.", file=sys.stderr)
+            return SALIDA_USO
+        print(json.dumps(restaurar_base(argumentos.respaldo, argumentos.destino), ensure_ascii=False))
+    elif subcomando == "lote":
+        if argumentos.tamano_grupo <= 0:
+            print("El tamaño de grupo debe ser un entero positivo.", file=sys.stderr)
+            return SALIDA_USO
+        aplicadas, rechazadas = ejecutar_lote(sys.stdin, sys.stdout, argumentos.tamano_grupo)
+        print(f"Operaciones aplicadas: {aplicadas}. Rechazadas: {rechazadas}.", file=sys.stderr)
+        return SALIDA_RECHAZADA if rechazadas else SALIDA_EXITO
+    return SALIDA_EXITO
+
+
+def ejecutar_linea_de_comandos(argumentos):
+    """Prepara la base, ejecuta el subcomando y devuelve el código de salida. Los errores van a stderr."""
+    if argumentos.bd:
+        configurar_base_de_datos(argumentos.bd)
+    try:
+        inicializar_base_de_datos()
+        return ejecutar_subcomando(argumentos)
+    except OperacionRechazada as e:
+        print(e, file=sys.stderr)
+        return SALIDA_RECHAZADA
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return SALIDA_USO
+    except Error as e:
+        print(f"Error de base de datos: {e}", file=sys.stderr)
+        return SALIDA_ERROR
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return SALIDA_ERROR
+    finally:
+        if INSTRUMENTACION["activa"]:
+            with contextlib.redirect_stdout(sys.stderr):
+                mostrar_resumen_instrumentacion()
+
+
+def main(argv=None):
+    argumentos = crear_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    if argumentos.instrumentar:
+        activar_instrumentacion()
+    if argumentos.subcomando:
+        return ejecutar_linea_de_comandos(argumentos)
+    if argumentos.bd:
+        configurar_base_de_datos(argumentos.bd)
+
+    if not os.path.exists(RUTA_BD):
+        print("\nNo se encontró base de datos anterior. Se inicia con estado vacío.")
+    else:
+        print("\nSe ha recuperado el estado anterior.")
+
+    try:
+        inicializar_base_de_datos()
+    except Error as e:
+        print(e)
+        return
+    except Exception:
+        print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+        return
+
     while True:
         print("\n*" + "*" * 80)
         print(f"{'MENU PRINCIPAL':^78}")
@@ -796,6 +3960,17 @@ def main():
         print("5. Registrar a un nuevo cliente.")
         print("6. Registrar una sala.")
         print("7. Salir")
+        print("\n" + "-" * 80)
+        print(f"{'MÁS OPCIONES':^78}")
+        print("-" * 80)
+        print("8. Consultar las reservaciones de un rango de fechas.")
+        print("9. Buscar los próximos espacios disponibles.")
+        print("10. Importar clientes, salas o reservas desde un archivo.")
+        print("11. Registrar una reservación recurrente.")
+        print("12. Cancelar reservaciones en bloque (por rango, sala, cliente o turno).")
+        print("13. Buscar reservaciones por nombre de evento.")
+        print("14. Archivar reservaciones antiguas.")
+        print("15. Consultar estadísticas de ocupación.")
 
         try:
             opcion = int(input("\nSeleccione una opción: "))
@@ -803,23 +3978,15 @@ def main():
             print("\nOpción incorrecta. Intente de nuevo.\n")
             continue
 
-        if opcion in [1, 2, 3, 4]:
+        if opcion in [1, 2, 3, 4, 8, 9, 11, 12]:
             try:
-                with sqlite3.connect("ReservasCoworking.db") as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT COUNT(clave) FROM clientes")
-                    total_clientes = cursor.fetchall()[0][0]
-
-                    cursor.execute("SELECT COUNT(clave) FROM salas")
-                    total_salas = cursor.fetchall()[0][0]
-
-                    if total_clientes == 0:
-                        print("\nDebe registrar al menos un cliente primero.")
-                        continue
+                if contar_clientes() == 0:
+                    print("\nDebe registrar al menos un cliente primero.")
+                    continue
 
-                    if total_salas == 0:
-                        print("\nDebe registrar al menos una sala primero.")
-                        continue
+                if contar_salas() == 0:
+                    print("\nDebe registrar al menos una sala primero.")
+                    continue
 
             except Error as e:
                 print(f"\nError al verificar la base de datos: {e}")
@@ -837,6 +4004,22 @@ def main():
             registrar_cliente()
         elif opcion == 6:
             registrar_sala()
+        elif opcion == 8:
+            consultar_reservas_por_rango()
+        elif opcion == 9:
+            buscar_proximos_espacios()
+        elif opcion == 10:
+            importar_archivo()
+        elif opcion == 11:
+            registrar_reserva_recurrente()
+        elif opcion == 12:
+            cancelar_reservas_en_bloque()
+        elif opcion == 13:
+            buscar_reservas_por_nombre_de_evento()
+        elif opcion == 14:
+            archivar_reservas_antiguas()
+        elif opcion == 15:
+            consultar_estadisticas_de_ocupacion()
         elif opcion == 7:
             while True:
                 confirmar_salida_menu = input("\n¿Está seguro que desea salir del programa? (S/N): ").strip().upper()
@@ -848,6 +4031,8 @@ def main():
                     print("\nSe ha regresado al menú principal.\n")
                     break  
                 elif confirmar_salida_menu == "S":
+                    if INSTRUMENTACION["activa"]:
+                        mostrar_resumen_instrumentacion()
                     print("\nSe ha cerrado el programa con éxito.\n")
                     return 
                 else:
@@ -858,4 +4043,4 @@ def main():
             print("\nOpción incorrecta.\n")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,379 @@
+import os
+import sys
+import json
+import random
+import contextlib
+import sqlite3
+import argparse
+import datetime
+import platform
+import statistics
+import tempfile
+import time
+
+from tabulate import tabulate
+
+import PIA
+
+
+TURNOS = ["Matutino", "Vespertino", "Nocturno"]
+
+# Tamaños predefinidos: (clientes, salas, meses, reservas).
+ESCALAS = {
+    "10k": (1000, 20, 12, 10000),
+    "100k": (10000, 100, 24, 100000),
+    "1m": (50000, 500, 36, 1000000),
+}
+
+
+def generar_base_sintetica(ruta, total_clientes, total_salas, meses, total_reservas,
+                           proporcion_canceladas=0.1, semilla=2024, fecha_inicio=None):
+    """Crea (o completa) una base con clientes, salas y reservas sintéticas reproducibles.
+
+    Las reservas se reparten entre los días hábiles (sin domingos) del periodo, que por omisión empieza
+    a la mitad de los meses indicados antes de hoy para tener historial y reservas futuras. Las reservas
+    activas nunca comparten espacio; las canceladas pueden caer en cualquiera. Devuelve el primer y el
+    último día hábil del periodo.
+    """
+    aleatorio = random.Random(semilla)
+    fecha_inicio = fecha_inicio or datetime.date.today() - datetime.timedelta(days=meses * 30 // 2)
+    dias_habiles = [
+        fecha for fecha in (fecha_inicio + datetime.timedelta(days=dia) for dia in range(meses * 30))
+        if fecha.weekday() != 6
+    ]
+
+    total_canceladas = int(total_reservas * proporcion_canceladas)
+    total_activas = total_reservas - total_canceladas
+    espacios_posibles = len(dias_habiles) * len(TURNOS) * total_salas
+    if total_activas > espacios_posibles:
+        raise ValueError(
+            f"{total_activas} reservas activas no caben en {espacios_posibles} espacios; "
+            "aumente las salas o los meses."
+        )
+
+    PIA.configurar_base_de_datos(ruta)
+    PIA.inicializar_base_de_datos()
+
+    with PIA.transaccion() as conn:
+        primera_sala = conn.execute("SELECT COALESCE(MAX(clave), 0) + 1 FROM salas").fetchone()[0]
+        primer_cliente = conn.execute("SELECT COALESCE(MAX(clave), 0) + 1 FROM clientes").fetchone()[0]
+
+        conn.executemany(
+            "INSERT INTO clientes (nombre, apellido) VALUES (?, ?)",
+            ((f"NOMBRE{i}", f"APELLIDO{aleatorio.randrange(total_clientes)}") for i in range(total_clientes))
+        )
+        conn.executemany(
+            "INSERT INTO salas (nombre, cupo) VALUES (?, ?)",
+            ((f"SALA{primera_sala + i}", aleatorio.randint(2, 40)) for i in range(total_salas))
+        )
+
+        def reservas():
+            creado = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            claves_turno = [PIA.clave_de_turno(turno) for turno in TURNOS]
+            espacios = aleatorio.sample(range(espacios_posibles), total_activas)
+            espacios += [aleatorio.randrange(espacios_posibles) for _ in range(total_canceladas)]
+            for numero, espacio in enumerate(espacios):
+                dia, resto = divmod(espacio, len(TURNOS) * total_salas)
+                turno, sala = divmod(resto, total_salas)
+                yield (
+                    PIA.dia_de_fecha(dias_habiles[dia]),
+                    primera_sala + sala,
+                    claves_turno[turno],
+                    primer_cliente + aleatorio.randrange(total_clientes),
+                    f"Evento {numero}",
+                    creado,
+                    "ACTIVA" if numero < total_activas else "CANCELADA",
+                )
+
+        if total_reservas:
+            conn.executemany(
+                "INSERT INTO reserva (fecha, clave_sala, clave_turno, clave_cliente, evento, creado, estado) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                reservas()
+            )
+
+    PIA.invalidar_cache()
+    return dias_habiles[0], dias_habiles[-1]
+
+
+def consultas_de_una_reserva(dia, clave_turno):
+    """Devuelve las lecturas que hace una reserva: clientes, turnos, salas libres y conteos del menú."""
+    return [
+        ("SELECT clave, apellido, nombre FROM clientes ORDER BY apellido, nombre", ()),
+        ("SELECT clave_horario, tipo_turno FROM turno", ()),
+        (
+            "SELECT clave, nombre, cupo FROM salas WHERE clave NOT IN ("
+            "SELECT clave_sala FROM reserva WHERE fecha = ? AND clave_turno = ? AND estado = 'ACTIVA')",
+            (dia, clave_turno)
+        ),
+        ("SELECT COUNT(clave) FROM clientes", ()),
+        ("SELECT COUNT(clave) FROM salas", ()),
+    ]
+
+
+def medir(funcion, repeticiones):
+    """Devuelve el tiempo promedio en milisegundos de ejecutar la función."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+
+def medir_operacion(funcion, llamadas):
+    """Ejecuta la función una vez por cada juego de argumentos y devuelve sus estadísticas en milisegundos."""
+    tiempos = []
+    for argumentos in llamadas:
+        inicio = time.perf_counter()
+        funcion(*argumentos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tiempos.sort()
+    return {
+        "repeticiones": len(tiempos),
+        "promedio_ms": round(statistics.fmean(tiempos), 4),
+        "p50_ms": round(tiempos[len(tiempos) // 2], 4),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 4),
+        "max_ms": round(tiempos[-1], 4),
+    }
+
+
+def benchmark_conexiones(ruta, repeticiones):
+    """Compara abrir una conexión por consulta contra la conexión compartida de PIA."""
+    dia = PIA.dia_de_fecha(datetime.date.today() + datetime.timedelta(days=30))
+    consultas = consultas_de_una_reserva(dia, PIA.clave_de_turno("Matutino"))
+
+    def por_llamada():
+        for sql, parametros in consultas:
+            with contextlib.closing(sqlite3.connect(ruta)) as conn:
+                conn.execute(sql, parametros).fetchall()
+
+    def compartida():
+        for sql, parametros in consultas:
+            with PIA.obtener_conexion() as conn:
+                conn.execute(sql, parametros).fetchall()
+
+    PIA.obtener_conexion()
+    return [
+        ["connect() por consulta", f"{medir(por_llamada, repeticiones):.3f}"],
+        ["Conexión compartida (WAL)", f"{medir(compartida, repeticiones):.3f}"],
+    ]
+
+
+def reporte_con_consultas_por_fila(conn, dia):
+    """Reproduce el reporte anterior: una consulta del día y búsquedas extra de sala, cliente y turno por reserva."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT clave_sala, clave_cliente, evento, clave_turno FROM reserva WHERE fecha = ? AND estado = 'ACTIVA'",
+        (dia,)
+    )
+    filas = []
+    for clave_sala, clave_cliente, evento, clave_turno in cursor.fetchall():
+        sala = conn.execute("SELECT nombre FROM salas WHERE clave = ?", (clave_sala,)).fetchone()
+        cliente = conn.execute("SELECT nombre, apellido FROM clientes WHERE clave = ?", (clave_cliente,)).fetchone()
+        turno = conn.execute("SELECT tipo_turno FROM turno WHERE clave_horario = ?", (clave_turno,)).fetchone()
+        filas.append([sala[0], f"{cliente[0]} {cliente[1]}", evento, turno[0]])
+    return filas
+
+
+def llenar_dia(fecha, total_reservas):
+    """Ocupa la fecha indicada con el número de reservas pedido, repartidas entre salas y turnos.
+
+    Devuelve cuántas reservas cupieron.
+    """
+    with PIA.transaccion() as conn:
+        salas = [clave for (clave,) in conn.execute("SELECT clave FROM salas ORDER BY clave")]
+        clientes = [clave for (clave,) in conn.execute("SELECT clave FROM clientes LIMIT 1000")]
+        total = min(total_reservas, len(salas) * len(TURNOS))
+        claves_turno = [PIA.clave_de_turno(turno) for turno in TURNOS]
+        dia = PIA.dia_de_fecha(fecha)
+        conn.execute("DELETE FROM reserva WHERE fecha = ?", (dia,))
+        conn.executemany(
+            "INSERT INTO reserva (fecha, clave_sala, clave_turno, clave_cliente, evento, creado) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (dia, salas[i // 3], claves_turno[i % 3], clientes[i % len(clientes)], f"Evento {i}", fecha.isoformat())
+                for i in range(total)
+            )
+        )
+    return total
+
+
+def benchmark_reporte_diario(repeticiones, reservas_por_dia):
+    """Mide la latencia del reporte diario con N+1 consultas contra la consulta unida de PIA."""
+    fecha = datetime.date.today() + datetime.timedelta(days=3000)
+    resultados = []
+    conn = PIA.obtener_conexion()
+
+    for total in reservas_por_dia:
+        total = llenar_dia(fecha, total)
+        anterior = medir(lambda: reporte_con_consultas_por_fila(conn, PIA.dia_de_fecha(fecha)), repeticiones)
+        unida = medir(lambda: PIA.obtener_reporte_del_dia(fecha), repeticiones)
+        resultados.append([total, f"{anterior:.3f}", f"{unida:.3f}"])
+    return resultados
+
+
+def ejecutar_suite(primer_dia, ultimo_dia, repeticiones, directorio, semilla=7):
+    """Mide las operaciones principales de PIA sin interacción. Devuelve las estadísticas por operación."""
+    aleatorio = random.Random(semilla)
+    conn = PIA.obtener_conexion()
+    total_dias = (ultimo_dia - primer_dia).days
+    salas = [clave for clave, _, _ in PIA.obtener_salas()]
+    clientes = [clave for (clave,) in conn.execute("SELECT clave FROM clientes LIMIT 10000")]
+
+    def fecha_aleatoria():
+        return primer_dia + datetime.timedelta(days=aleatorio.randrange(total_dias + 1))
+
+    def folios_activos(cantidad):
+        folios = conn.execute(
+            "SELECT folio FROM reserva WHERE estado = 'ACTIVA' AND fecha <= ? ORDER BY random() LIMIT ?",
+            (PIA.dia_de_fecha(ultimo_dia), cantidad)
+        ).fetchall()
+        return folios
+
+    # Las reservas nuevas van después del periodo generado para no chocar con las existentes.
+    fechas_nuevas = [ultimo_dia + datetime.timedelta(days=1 + dia) for dia in range(repeticiones)]
+    mes = datetime.timedelta(days=30)
+
+    resultados = {
+        "disponibilidad": medir_operacion(
+            PIA.consultar_salas_disponibles,
+            [(fecha_aleatoria(), aleatorio.choice(TURNOS)) for _ in range(repeticiones)]
+        ),
+        "reservar": medir_operacion(
+            PIA.reservar_sala,
+            [
+                (aleatorio.choice(clientes), fecha, aleatorio.choice(salas), aleatorio.choice(TURNOS), "Benchmark")
+                for fecha in fechas_nuevas
+            ]
+        ),
+        "reporte_diario": medir_operacion(
+            PIA.obtener_reporte_del_dia, [(fecha_aleatoria(),) for _ in range(repeticiones)]
+        ),
+        "rango_primera_pagina": medir_operacion(
+            lambda inicio: next(PIA.paginar_reservas(inicio, inicio + mes), None),
+            [(fecha_aleatoria(),) for _ in range(repeticiones)]
+        ),
+        "rango_mes_completo": medir_operacion(
+            lambda inicio: sum(len(pagina) for pagina in PIA.paginar_reservas(inicio, inicio + mes)),
+            [(fecha_aleatoria(),) for _ in range(max(1, repeticiones // 10))]
+        ),
+        "editar_evento": medir_operacion(
+            PIA.actualizar_evento, [(folio, "Evento editado") for (folio,) in folios_activos(repeticiones)]
+        ),
+        "cancelar": medir_operacion(PIA.cancelar_reserva, folios_activos(repeticiones)),
+    }
+
+    for formato, (_, extension) in PIA.EXPORTADORES.items():
+        resultados[f"exportar_reporte_{formato}"] = medir_operacion(
+            PIA.exportar_reporte_del_dia,
+            [
+                (fecha_aleatoria(), formato, os.path.join(directorio, f"reporte.{extension}"))
+                for _ in range(max(1, repeticiones // 5))
+            ]
+        )
+
+    return resultados
+
+
+def comparar_resultados(actuales, anteriores, umbral):
+    """Compara el p50 de dos corridas de la suite. Devuelve las filas de la tabla y las operaciones que empeoraron."""
+    filas = []
+    regresiones = []
+    for operacion, medicion in actuales["operaciones"].items():
+        anterior = anteriores.get("operaciones", {}).get(operacion)
+        if not anterior or not anterior["p50_ms"]:
+            filas.append([operacion, "-", medicion["p50_ms"], "-"])
+            continue
+        cambio = medicion["p50_ms"] / anterior["p50_ms"] - 1
+        if cambio > umbral:
+            regresiones.append(operacion)
+        filas.append([operacion, anterior["p50_ms"], medicion["p50_ms"], f"{cambio:+.1%}"])
+    return filas, regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de la base de reservaciones.")
+    parser.add_argument("--escala", choices=list(ESCALAS), default="100k",
+                        help="Tamaño predefinido de la base sintética.")
+    parser.add_argument("--clientes", type=int, help="Sustituye el número de clientes de la escala.")
+    parser.add_argument("--salas", type=int, help="Sustituye el número de salas de la escala.")
+    parser.add_argument("--meses", type=int, help="Sustituye los meses que abarcan las reservas.")
+    parser.add_argument("--reservas", type=int, help="Sustituye el número de reservas de la escala.")
+    parser.add_argument("--canceladas", type=float, default=0.1, help="Proporción de reservas canceladas.")
+    parser.add_argument("--semilla", type=int, default=2024)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--prueba", choices=["suite", "conexiones", "reporte", "todas"], default="suite")
+    parser.add_argument("--reservas-por-dia", type=int, nargs="+", default=[10, 100, 500, 1000, 3000])
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados de la suite.")
+    parser.add_argument("--comparar", help="Archivo JSON de una corrida anterior contra el cual comparar.")
+    parser.add_argument("--umbral", type=float, default=0.2,
+                        help="Aumento relativo del p50 que se considera regresión (0.2 = 20%%).")
+    argumentos = parser.parse_args()
+    ejecutar = lambda prueba: argumentos.prueba in (prueba, "todas")
+
+    clientes, salas, meses, reservas = ESCALAS[argumentos.escala]
+    clientes = argumentos.clientes or clientes
+    salas = argumentos.salas or salas
+    meses = argumentos.meses or meses
+    reservas = reservas if argumentos.reservas is None else argumentos.reservas
+    regresiones = []
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "benchmark.db")
+        inicio = time.perf_counter()
+        primer_dia, ultimo_dia = generar_base_sintetica(
+            ruta, clientes, salas, meses, reservas, argumentos.canceladas, argumentos.semilla
+        )
+        print(f"\nBase sintética: {clientes} clientes, {salas} salas, {meses} meses y {reservas} reservas "
+              f"(generada en {time.perf_counter() - inicio:.1f} s).")
+
+        if ejecutar("suite"):
+            resultados = {
+                "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "parametros": {
+                    "clientes": clientes, "salas": salas, "meses": meses, "reservas": reservas,
+                    "canceladas": argumentos.canceladas, "semilla": argumentos.semilla,
+                    "repeticiones": argumentos.repeticiones,
+                },
+                "operaciones": ejecutar_suite(primer_dia, ultimo_dia, argumentos.repeticiones, directorio),
+            }
+            print(tabulate(
+                [[operacion, *medicion.values()] for operacion, medicion in resultados["operaciones"].items()],
+                headers=["Operación", "Repeticiones", "Promedio (ms)", "p50 (ms)", "p95 (ms)", "Máximo (ms)"],
+                tablefmt="grid"
+            ))
+
+            if argumentos.salida:
+                with open(argumentos.salida, "w", encoding="utf-8") as archivo_json:
+                    json.dump(resultados, archivo_json, ensure_ascii=False, indent=2)
+                print(f"\nResultados guardados en '{argumentos.salida}'.")
+
+            if argumentos.comparar:
+                with open(argumentos.comparar, encoding="utf-8") as archivo_json:
+                    filas, regresiones = comparar_resultados(resultados, json.load(archivo_json), argumentos.umbral)
+                print(f"\nComparación contra '{argumentos.comparar}':")
+                print(tabulate(filas, headers=["Operación", "p50 anterior", "p50 actual", "Cambio"], tablefmt="grid"))
+                if regresiones:
+                    print(f"\nRegresiones mayores a {argumentos.umbral:.0%}: {', '.join(regresiones)}")
+
+        if ejecutar("conexiones"):
+            resultados = benchmark_conexiones(ruta, argumentos.repeticiones)
+            print(f"\nLecturas de una reserva (5 consultas) sobre {reservas} reservas:")
+            print(tabulate(resultados, headers=["Ruta", "ms por reserva"], tablefmt="grid"))
+
+        if ejecutar("reporte"):
+            salas_necesarias = max(argumentos.reservas_por_dia) // len(TURNOS) + 1
+            if salas < salas_necesarias:
+                generar_base_sintetica(ruta, 0, salas_necesarias - salas, 1, 0)
+            resultados = benchmark_reporte_diario(argumentos.repeticiones, argumentos.reservas_por_dia)
+            print(f"\nReporte diario sobre {reservas} reservas:")
+            print(tabulate(resultados, headers=["Reservas en el día", "N+1 consultas (ms)", "JOIN (ms)"], tablefmt="grid"))
+
+        PIA.cerrar_conexion()
+
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
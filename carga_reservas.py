@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import random
+import sqlite3
+import argparse
+import contextlib
+import datetime
+import tempfile
+import time
+import multiprocessing
+from collections import defaultdict
+
+from tabulate import tabulate
+
+import PIA
+
+
+TURNOS = ["Matutino", "Vespertino", "Nocturno"]
+
+# Peso de cada operación en la mezcla de tráfico.
+MEZCLA = {"reservar": 50, "editar": 15, "cancelar": 15, "reporte": 20}
+
+
+def preparar_base(ruta, total_clientes, total_salas):
+    """Crea la base si hace falta y se asegura de que tenga al menos los clientes y salas pedidos."""
+    PIA.configurar_base_de_datos(ruta)
+    PIA.inicializar_base_de_datos()
+    for numero in range(PIA.contar_clientes(), total_clientes):
+        PIA.agregar_cliente(f"Carga{chr(65 + numero % 26)}", "Prueba")
+    for numero in range(PIA.contar_salas(), total_salas):
+        PIA.agregar_sala(f"Sala carga {numero + 1}", 10)
+    clientes = [clave for clave, _, _ in PIA.obtener_clientes()]
+    salas = [clave for clave, _, _ in PIA.obtener_salas()]
+    PIA.cerrar_conexion()
+    return clientes, salas
+
+
+def fechas_de_prueba(total_dias):
+    """Devuelve los primeros días hábiles que cumplen la anticipación mínima."""
+    fecha = datetime.date.today() + datetime.timedelta(days=PIA.DIAS_ANTICIPACION)
+    fechas = []
+    while len(fechas) < total_dias:
+        if fecha.weekday() != 6:
+            fechas.append(fecha)
+        fecha += datetime.timedelta(days=1)
+    return fechas
+
+
+def trabajador(parametros):
+    """Proceso de carga: ejecuta la mezcla de operaciones hasta agotar el tiempo y devuelve lo que observó."""
+    numero, ruta, duracion, busy_timeout, clientes, salas, fechas = parametros
+    aleatorio = random.Random(numero)
+    PIA.configurar_base_de_datos(ruta, busy_timeout=busy_timeout)
+
+    latencias = defaultdict(list)
+    errores = defaultdict(int)
+    confirmadas = []
+    canceladas = []
+    activas = []
+    operaciones, pesos = zip(*MEZCLA.items())
+
+    limite = time.perf_counter() + duracion
+    while time.perf_counter() < limite:
+        operacion = aleatorio.choices(operaciones, pesos)[0]
+        if operacion in ("editar", "cancelar") and not activas:
+            operacion = "reservar"
+
+        inicio = time.perf_counter()
+        try:
+            if operacion == "reservar":
+                espacio = (aleatorio.choice(fechas), aleatorio.choice(TURNOS), aleatorio.choice(salas))
+                folio = PIA.reservar_sala(aleatorio.choice(clientes), espacio[0], espacio[2], espacio[1], "Carga")
+                if folio is None:
+                    operacion = "reservar_ocupado"
+                else:
+                    confirmadas.append((folio, espacio[0].isoformat(), espacio[1], espacio[2]))
+                    activas.append(folio)
+            elif operacion == "editar":
+                PIA.actualizar_evento(aleatorio.choice(activas), f"Carga editada {numero}")
+            elif operacion == "cancelar":
+                folio = activas.pop(aleatorio.randrange(len(activas)))
+                if PIA.cancelar_reserva(folio):
+                    canceladas.append(folio)
+            else:
+                PIA.obtener_reporte_del_dia(aleatorio.choice(fechas))
+        except sqlite3.Error as e:
+            errores[str(e)] += 1
+            continue
+        latencias[operacion].append((time.perf_counter() - inicio) * 1000)
+
+    PIA.cerrar_conexion()
+    return {
+        "latencias": dict(latencias),
+        "errores": dict(errores),
+        "confirmadas": confirmadas,
+        "canceladas": canceladas,
+        "reintentos": PIA.ESTADISTICAS_REINTENTOS["reintentos"],
+        "agotados": PIA.ESTADISTICAS_REINTENTOS["agotados"],
+    }
+
+
+def percentil(valores, fraccion):
+    """Devuelve el percentil de una lista ya ordenada."""
+    return valores[min(len(valores) - 1, int(len(valores) * fraccion))]
+
+
+def verificar_reservas_dobles(ruta, confirmadas, canceladas):
+    """Comprueba que ningún espacio haya tenido dos reservas activas al mismo tiempo. Devuelve la lista de problemas.
+
+    Revisa el estado final de la base y el orden real de las altas y cancelaciones de la corrida, tomado del
+    registro de cambios: el id de cada cambio se asigna en la misma transacción que la escritura, así que
+    sigue el orden en que se confirmaron. Reproduciéndolo por espacio, cada confirmación tiene que llegar
+    con el espacio libre, es decir, después de confirmada la cancelación de la reserva anterior.
+    """
+    problemas = []
+    with contextlib.closing(sqlite3.connect(ruta)) as conn:
+        for fecha, turno, sala, total in conn.execute("""
+            SELECT fecha, clave_turno, clave_sala, COUNT(*) FROM reserva
+            WHERE estado = 'ACTIVA' GROUP BY fecha, clave_turno, clave_sala HAVING COUNT(*) > 1
+        """):
+            problemas.append(f"{PIA.fecha_de_dia(fecha)} turno {turno} sala {sala}: {total} reservas activas en la base")
+
+        estados = dict(conn.execute("SELECT folio, estado FROM reserva"))
+        cambios = conn.execute(
+            "SELECT id, clave, datos FROM cambios WHERE tabla = 'reserva' ORDER BY id"
+        ).fetchall()
+
+    folios_confirmados = {folio for folio, _, _, _ in confirmadas}
+    for folio in folios_confirmados - estados.keys():
+        problemas.append(f"Folio {folio} confirmado pero ausente de la base")
+
+    activas = {}
+    altas = set()
+    cancelaciones = set()
+    for id_cambio, folio, datos in cambios:
+        if folio not in folios_confirmados:
+            continue
+        datos = json.loads(datos)
+        espacio = (datos["fecha"], datos["turno"], datos["clave_sala"])
+        if datos["estado"] == "ACTIVA":
+            altas.add(folio)
+            anterior = activas.get(espacio)
+            if anterior is not None and anterior != folio:
+                problemas.append(f"{espacio[0]} {espacio[1]} sala {espacio[2]}: folio {folio} se confirmó "
+                                 f"(cambio {id_cambio}) cuando el folio {anterior} seguía activo")
+            activas[espacio] = folio
+        else:
+            cancelaciones.add(folio)
+            if activas.get(espacio) == folio:
+                del activas[espacio]
+
+    for folio in folios_confirmados - altas:
+        problemas.append(f"Folio {folio} confirmado pero sin alta en el registro de cambios")
+    for folio in set(canceladas) - cancelaciones:
+        problemas.append(f"Folio {folio} cancelado pero sin cancelación en el registro de cambios")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga multiproceso sobre la base de reservaciones.")
+    parser.add_argument("--bd", help="Base sobre la que se prueba; por omisión, una base temporal nueva.")
+    parser.add_argument("--procesos", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--salas", type=int, default=5, help="Pocas salas y días aumentan la contención.")
+    parser.add_argument("--dias", type=int, default=10)
+    parser.add_argument("--busy-timeout", type=int, default=PIA.CONFIGURACION_BD["busy_timeout"],
+                        help="busy_timeout en ms de cada proceso; valores bajos fuerzan reintentos.")
+    argumentos = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = argumentos.bd or os.path.join(directorio, "carga.db")
+        clientes, salas = preparar_base(ruta, argumentos.clientes, argumentos.salas)
+        salas = salas[-argumentos.salas:]
+        fechas = fechas_de_prueba(argumentos.dias)
+
+        print(f"\n{argumentos.procesos} procesos durante {argumentos.segundos:g} s sobre '{ruta}' "
+              f"({len(salas)} salas, {len(fechas)} días, busy_timeout {argumentos.busy_timeout} ms)")
+        inicio = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(argumentos.procesos) as grupo:
+            resultados = grupo.map(trabajador, [
+                (numero, ruta, argumentos.segundos, argumentos.busy_timeout, clientes, salas, fechas)
+                for numero in range(argumentos.procesos)
+            ])
+        transcurrido = time.perf_counter() - inicio
+
+        latencias = defaultdict(list)
+        errores = defaultdict(int)
+        for resultado in resultados:
+            for operacion, valores in resultado["latencias"].items():
+                latencias[operacion].extend(valores)
+            for mensaje, total in resultado["errores"].items():
+                errores[mensaje] += total
+
+        filas = []
+        for operacion, valores in sorted(latencias.items()):
+            valores.sort()
+            filas.append([operacion, len(valores), f"{len(valores) / transcurrido:.1f}",
+                          f"{percentil(valores, 0.5):.2f}", f"{percentil(valores, 0.99):.2f}", f"{valores[-1]:.2f}"])
+        total_operaciones = sum(len(valores) for valores in latencias.values())
+        print(tabulate(filas, headers=["Operación", "Total", "Por segundo", "p50 (ms)", "p99 (ms)", "Máximo (ms)"],
+                       tablefmt="grid"))
+        print(f"\nThroughput total: {total_operaciones / transcurrido:.1f} operaciones por segundo")
+        print(f"Reintentos por bloqueo: {sum(r['reintentos'] for r in resultados)}"
+              f" (agotados: {sum(r['agotados'] for r in resultados)})")
+        for mensaje, total in errores.items():
+            print(f"Errores '{mensaje}': {total}")
+
+        problemas = verificar_reservas_dobles(
+            ruta,
+            [reserva for resultado in resultados for reserva in resultado["confirmadas"]],
+            [folio for resultado in resultados for folio in resultado["canceladas"]],
+        )
+        if problemas:
+            print(f"\nSe encontraron {len(problemas)} reservas dobles:")
+            for problema in problemas[:20]:
+                print(f"  {problema}")
+            return 1
+
+        print("\nVerificación: ningún espacio tuvo dos reservas activas.")
+        return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+import sys
+import json
+import asyncio
+import argparse
+import sqlite3
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from sqlite3 import Error
+from urllib.parse import urlsplit, parse_qs
+
+import PIA
+
+
+TAMANO_LOTE = 64
+TAMANO_MAXIMO_CUERPO = 1024 * 1024
+
+
+class ErrorServicio(Exception):
+    """Error que se responde al cliente con el código HTTP indicado."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _fecha(texto):
+    """Convierte la fecha de una petición (aaaa-mm-dd o mm-dd-aaaa) o responde 400."""
+    try:
+        return PIA.convertir_fecha(texto)
+    except (TypeError, ValueError):
+        raise ErrorServicio(HTTPStatus.BAD_REQUEST, f"Fecha inválida: {texto!r}. Use aaaa-mm-dd o mm-dd-aaaa.")
+
+
+def _entero(datos, campo):
+    """Devuelve el campo como entero positivo o responde 400."""
+    valor = datos.get(campo)
+    if isinstance(valor, bool) or not isinstance(valor, (int, str)) or not str(valor).isdigit() or int(valor) <= 0:
+        raise ErrorServicio(HTTPStatus.BAD_REQUEST, f"El campo '{campo}' debe ser un entero positivo.")
+    return int(valor)
+
+
+def _texto(datos, campo):
+    """Devuelve el campo como texto no vacío o responde 400."""
+    valor = datos.get(campo)
+    if not isinstance(valor, str) or not valor.strip():
+        raise ErrorServicio(HTTPStatus.BAD_REQUEST, f"No se puede omitir el campo '{campo}'.")
+    return valor.strip()
+
+
+# Operaciones de escritura. Se ejecutan siempre en el hilo del escritor, dentro del lote que esté abierto.
+
+def _reservar(clave_cliente, fecha, clave_sala, turno, evento):
+    error_validacion = PIA.validar_reserva(clave_cliente, fecha, clave_sala, turno)
+    if error_validacion:
+        raise ErrorServicio(HTTPStatus.UNPROCESSABLE_ENTITY, error_validacion)
+    folio = PIA.reservar_sala(clave_cliente, fecha, clave_sala, turno, evento)
+    if folio is None:
+        raise ErrorServicio(HTTPStatus.CONFLICT, "La sala ya está reservada para ese turno y fecha.")
+    return {"folio": folio}
+
+
+def _editar_evento(folio, evento):
+    if not PIA.actualizar_evento(folio, evento):
+        raise ErrorServicio(HTTPStatus.NOT_FOUND, f"No existe la reserva con folio {folio}.")
+    return {"folio": folio, "evento": evento.capitalize()}
+
+
+def _cancelar(folio):
+    if not PIA.cancelar_reserva(folio):
+        raise ErrorServicio(HTTPStatus.NOT_FOUND, f"No existe una reserva activa con folio {folio}.")
+    return {"folio": folio, "estado": "CANCELADA"}
+
+
+def _aplicar_lote(operaciones):
+    """Aplica las operaciones en una sola transacción con un SAVEPOINT por operación y confirma una vez.
+
+    Una operación que falla solo deshace su propio SAVEPOINT; las demás del lote se confirman juntas.
+    Devuelve una lista de (éxito, resultado o excepción) en el mismo orden.
+    """
+    try:
+        return _confirmar_lote(operaciones)
+    except Error as e:
+        return [(False, e)] * len(operaciones)
+
+
+@PIA.con_reintentos
+def _confirmar_lote(operaciones):
+    # Los resultados se reconstruyen en cada intento: un reintento repite el lote completo. Solo los errores
+    # propios de una operación se le responden a ella; un bloqueo de la base sube y reintenta todo el lote.
+    resultados = []
+    with PIA.transaccion():
+        for funcion, argumentos in operaciones:
+            try:
+                with PIA.transaccion():
+                    resultados.append((True, funcion(*argumentos)))
+            except (ErrorServicio, ValueError, sqlite3.IntegrityError) as e:
+                resultados.append((False, e))
+    return resultados
+
+
+class EscritorSerializado:
+    """Tarea única que recibe todas las escrituras por una cola y las confirma por lotes en un solo hilo."""
+
+    def __init__(self, tamano_lote=TAMANO_LOTE):
+        self.tamano_lote = tamano_lote
+        self.cola = asyncio.Queue()
+        self.hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor")
+        self.estadisticas = {"operaciones": 0, "lotes": 0, "lote_maximo": 0}
+
+    async def enviar(self, funcion, *argumentos):
+        """Encola la escritura y espera a que su lote se confirme. Devuelve el resultado o lanza su error."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((funcion, argumentos, futuro))
+        return await futuro
+
+    async def ejecutar(self):
+        bucle = asyncio.get_running_loop()
+        while True:
+            lote = [await self.cola.get()]
+            while len(lote) < self.tamano_lote and not self.cola.empty():
+                lote.append(self.cola.get_nowait())
+
+            try:
+                resultados = await bucle.run_in_executor(
+                    self.hilo, _aplicar_lote, [(funcion, argumentos) for funcion, argumentos, _ in lote]
+                )
+            except Exception as e:
+                resultados = [(False, e)] * len(lote)
+
+            self.estadisticas["operaciones"] += len(lote)
+            self.estadisticas["lotes"] += 1
+            self.estadisticas["lote_maximo"] = max(self.estadisticas["lote_maximo"], len(lote))
+            for (_, _, futuro), (exito, valor) in zip(lote, resultados):
+                if futuro.cancelled():
+                    continue
+                if exito:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+
+    def cerrar(self):
+        self.hilo.submit(PIA.cerrar_conexion).result()
+        self.hilo.shutdown()
+
+
+class ServicioReservas:
+    """Atiende la API HTTP/JSON: las lecturas corren en paralelo en hilos y las escrituras van al escritor."""
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.rutas = {
+            ("GET", "salas"): self.listar_salas,
+            ("POST", "salas"): self.crear_sala,
+            ("POST", "clientes"): self.crear_cliente,
+            ("GET", "reservas"): self.reporte_del_dia,
+            ("POST", "reservas"): self.crear_reserva,
+            ("PATCH", "reservas"): self.editar_reserva,
+            ("DELETE", "reservas"): self.cancelar_reserva,
+            ("GET", "estado"): self.estado,
+        }
+
+    async def listar_salas(self, consulta, datos, folio):
+        """GET /salas[?fecha=...&turno=...]: todas las salas, o solo las libres en esa fecha y turno."""
+        if "fecha" not in consulta:
+            salas = await asyncio.to_thread(PIA.obtener_salas)
+        else:
+            salas = await asyncio.to_thread(
+                PIA.consultar_salas_disponibles, _fecha(consulta["fecha"]), consulta.get("turno", "")
+            )
+        return HTTPStatus.OK, [{"clave": clave, "nombre": nombre, "cupo": cupo} for clave, nombre, cupo in salas]
+
+    async def reporte_del_dia(self, consulta, datos, folio):
+        """GET /reservas?fecha=...: el reporte de reservas activas de la fecha."""
+        fecha = _fecha(consulta.get("fecha", datetime.date.today().isoformat()))
+        filas = await asyncio.to_thread(PIA.obtener_reporte_del_dia, fecha)
+        return HTTPStatus.OK, [dict(zip(("sala", "cliente", "evento", "turno"), fila)) for fila in filas]
+
+    async def crear_reserva(self, consulta, datos, folio):
+        """POST /reservas {cliente, sala, fecha, turno, evento}."""
+        argumentos = (
+            _entero(datos, "cliente"), _fecha(datos.get("fecha")), _entero(datos, "sala"),
+            _texto(datos, "turno").capitalize(), _texto(datos, "evento"),
+        )
+        return HTTPStatus.CREATED, await self.escritor.enviar(_reservar, *argumentos)
+
+    async def editar_reserva(self, consulta, datos, folio):
+        """PATCH /reservas/<folio> {evento}."""
+        return HTTPStatus.OK, await self.escritor.enviar(_editar_evento, folio, _texto(datos, "evento"))
+
+    async def cancelar_reserva(self, consulta, datos, folio):
+        """DELETE /reservas/<folio>."""
+        return HTTPStatus.OK, await self.escritor.enviar(_cancelar, folio)
+
+    async def crear_cliente(self, consulta, datos, folio):
+        """POST /clientes {nombre, apellido}."""
+        nombre, apellido = _texto(datos, "nombre"), _texto(datos, "apellido")
+        for texto in (nombre, apellido):
+            error_validacion = PIA.validar_nombre(texto)
+            if error_validacion:
+                raise ErrorServicio(HTTPStatus.UNPROCESSABLE_ENTITY, error_validacion)
+        clave = await self.escritor.enviar(PIA.agregar_cliente, nombre, apellido)
+        return HTTPStatus.CREATED, {"clave": clave}
+
+    async def crear_sala(self, consulta, datos, folio):
+        """POST /salas {nombre, cupo}."""
+        nombre = _texto(datos, "nombre")
+        cupo, error_validacion = PIA.validar_cupo(datos.get("cupo"))
+        if error_validacion:
+            raise ErrorServicio(HTTPStatus.UNPROCESSABLE_ENTITY, error_validacion)
+        clave = await self.escritor.enviar(PIA.agregar_sala, nombre, cupo)
+        return HTTPStatus.CREATED, {"clave": clave}
+
+    async def estado(self, consulta, datos, folio):
+        """GET /estado: operaciones escritas, lotes confirmados y escrituras en espera."""
+        return HTTPStatus.OK, {**self.escritor.estadisticas, "en_cola": self.escritor.cola.qsize()}
+
+    async def despachar(self, metodo, objetivo, cuerpo):
+        """Resuelve la ruta y devuelve (estado, respuesta JSON)."""
+        partes = urlsplit(objetivo)
+        segmentos = [segmento for segmento in partes.path.split("/") if segmento]
+        consulta = {llave: valores[-1] for llave, valores in parse_qs(partes.query).items()}
+
+        manejador = self.rutas.get((metodo, segmentos[0] if segmentos else ""))
+        if manejador is None:
+            raise ErrorServicio(HTTPStatus.NOT_FOUND, f"No existe la ruta {metodo} {partes.path}.")
+
+        folio = None
+        if metodo in ("PATCH", "DELETE"):
+            if len(segmentos) != 2 or not segmentos[1].isdigit():
+                raise ErrorServicio(HTTPStatus.NOT_FOUND, "Indique el folio: /reservas/<folio>.")
+            folio = int(segmentos[1])
+
+        datos = {}
+        if cuerpo:
+            try:
+                datos = json.loads(cuerpo)
+            except ValueError:
+                raise ErrorServicio(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido.")
+            if not isinstance(datos, dict):
+                raise ErrorServicio(HTTPStatus.BAD_REQUEST, "El cuerpo debe ser un objeto JSON.")
+        return await manejador(consulta, datos, folio)
+
+    async def atender(self, lector, escritor):
+        """Atiende las peticiones HTTP/1.1 de una conexión, respetando keep-alive."""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    return
+                try:
+                    metodo, objetivo, version = linea.decode("latin-1").split()
+                except ValueError:
+                    return
+
+                encabezados = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+
+                try:
+                    longitud = int(encabezados.get("content-length", 0))
+                    if longitud > TAMANO_MAXIMO_CUERPO:
+                        raise ErrorServicio(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "El cuerpo es demasiado grande.")
+                    cuerpo = await lector.readexactly(longitud) if longitud else b""
+                    estado, respuesta = await self.despachar(metodo.upper(), objetivo, cuerpo)
+                except ErrorServicio as e:
+                    estado, respuesta = e.estado, {"error": str(e)}
+                except (ValueError, asyncio.IncompleteReadError) as e:
+                    estado, respuesta = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+                except Error as e:
+                    print(e)
+                    estado, respuesta = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+                except Exception:
+                    print(f"\nSe produjo el siguiente error: {sys.exc_info()[0]}")
+                    estado, respuesta = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Error interno."}
+
+                cerrar = encabezados.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                contenido = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                escritor.write(
+                    f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(contenido)}\r\n"
+                    f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n".encode("latin-1") + contenido
+                )
+                await escritor.drain()
+                if cerrar:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+
+async def servir(host, puerto, tamano_lote):
+    PIA.inicializar_base_de_datos()
+    escritor = EscritorSerializado(tamano_lote)
+    servicio = ServicioReservas(escritor)
+    tarea_escritor = asyncio.create_task(escritor.ejecutar())
+    servidor = await asyncio.start_server(servicio.atender, host, puerto)
+
+    print(f"\nServicio de reservas escuchando en http://{host}:{puerto} (base: {PIA.RUTA_BD})")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        tarea_escritor.cancel()
+        escritor.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de reservaciones de salas.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--bd", help="Ruta de la base de datos (por omisión, la de PIA).")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Máximo de escrituras por transacción.")
+    argumentos = parser.parse_args()
+
+    if argumentos.bd:
+        PIA.configurar_base_de_datos(argumentos.bd)
+    try:
+        asyncio.run(servir(argumentos.host, argumentos.puerto, argumentos.lote))
+    except KeyboardInterrupt:
+        print("\nServicio detenido.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PIA
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Base de datos nueva en tmp_path con todas las migraciones aplicadas."""
+    ruta = str(tmp_path / "reservas.db")
+    PIA.configurar_base_de_datos(ruta)
+    PIA.inicializar_base_de_datos()
+    yield ruta
+    PIA.cerrar_conexion()
+
+
+@pytest.fixture
+def datos(base):
+    """Un cliente y una sala registrados, con el nombre de los turnos en orden de clave."""
+    return {
+        "cliente": PIA.agregar_cliente("Ana", "López"),
+        "sala": PIA.agregar_sala("Sala A", 10),
+        "turnos": [tipo_turno for _, tipo_turno in PIA.obtener_turnos()],
+        "dia": datetime.date.today() + datetime.timedelta(days=5),
+    }
+
+
+@pytest.fixture
+def reservas(datos):
+    """Una reserva activa por turno en datos["dia"], en la sala de datos. Devuelve los folios."""
+    return [
+        PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], turno, f"Evento {numero}")
+        for numero, turno in enumerate(datos["turnos"])
+    ]
+
+
+@pytest.fixture
+def base_version_1(tmp_path, monkeypatch):
+    """Crea una base en la versión 1 del esquema, con un cliente y una sala, y le agrega las reservas indicadas.
+
+    Cada reserva es (fecha de texto, turno por nombre, evento, estado), como las guardaba esa versión.
+    """
+    def crear(reservas=()):
+        PIA.configurar_base_de_datos(str(tmp_path / "antigua.db"))
+        conn = PIA.obtener_conexion()
+        with monkeypatch.context() as parche:
+            parche.setattr(PIA, "MIGRACIONES", PIA.MIGRACIONES[:1])
+            PIA.aplicar_migraciones(conn)
+        conn.execute("INSERT INTO clientes (nombre, apellido) VALUES ('ANA', 'LÓPEZ')")
+        conn.execute("INSERT INTO salas (nombre, cupo) VALUES ('Sala A', 10)")
+        conn.executemany(
+            "INSERT INTO reserva (fecha, clave_sala, turno, clave_cliente, evento, creado, estado) "
+            "VALUES (?, 1, ?, 1, ?, '2024-01-01 09:00:00', ?)", reservas
+        )
+        conn.commit()
+        return conn
+
+    yield crear
+    PIA.cerrar_conexion()
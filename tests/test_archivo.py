@@ -0,0 +1,46 @@
+import json
+
+import PIA
+
+
+def test_archivar_mueve_las_reservas_pasadas(datos, reservas):
+    assert PIA.archivar_reservas() == 0
+    assert PIA.archivar_reservas(dias_retencion=-30) == 2
+
+    conn = PIA.obtener_conexion()
+    assert [folio for (folio,) in conn.execute("SELECT folio FROM reserva_archivo ORDER BY folio")] == reservas[:2]
+    assert [folio for (folio,) in conn.execute("SELECT folio FROM reserva")] == reservas[2:]
+
+
+def test_archivar_por_lotes(datos, reservas):
+    PIA.reservar_sala(datos["cliente"], datos["dia"], PIA.agregar_sala("Sala B", 4), datos["turnos"][0], "Curso")
+
+    assert PIA.archivar_reservas(dias_retencion=-30, tamano_lote=1) == 3
+    assert PIA.obtener_conexion().execute("SELECT COUNT(*) FROM reserva_archivo").fetchone()[0] == 3
+
+
+def test_cancelaciones_viejas_se_archivan(datos, reservas):
+    PIA.cancelar_reserva(reservas[0])
+
+    assert PIA.archivar_reservas(dias_canceladas=-1) == 1
+    assert PIA.obtener_conexion().execute("SELECT folio, estado FROM reserva_archivo").fetchall() == [
+        (reservas[0], "CANCELADA")
+    ]
+
+
+def test_reportes_leen_lo_archivado(datos, reservas, tmp_path):
+    PIA.archivar_reservas(dias_retencion=-30)
+
+    assert len(PIA.obtener_reporte_del_dia(datos["dia"])) == 3
+    ruta, total = PIA.exportar_reservas("ndjson", str(tmp_path / "reservas.ndjson"), datos["dia"], datos["dia"])
+    with open(ruta, encoding="utf-8") as archivo:
+        assert [json.loads(linea)["Folio"] for linea in archivo] == reservas
+
+
+def test_existen_reservas_considera_el_archivo(datos):
+    assert not PIA.existen_reservas()
+    PIA.obtener_conexion().execute(
+        "INSERT INTO reserva_archivo (folio, fecha, clave_sala, clave_turno, clave_cliente, evento, creado, estado, archivado) "
+        "VALUES (1, ?, 1, 1, 1, 'Taller', '2024-01-01', 'ACTIVA', '2024-02-01')", (PIA.dia_de_fecha(datos["dia"]),)
+    )
+    assert PIA.existen_reservas()
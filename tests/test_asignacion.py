@@ -0,0 +1,26 @@
+import PIA
+
+
+def test_turno_sin_distinguir_mayusculas_en_ambos_modos(datos):
+    solicitud = {"asistentes": 4, "fecha": datos["dia"], "turno": datos["turnos"][0].lower(),
+                 "cliente": datos["cliente"], "evento": "Taller"}
+
+    sugerencia, = PIA.asignar_salas_en_lote([solicitud])
+    assert sugerencia["clave_sala"] == datos["sala"]
+
+    reservada, = PIA.asignar_salas_en_lote([solicitud], reservar=True)
+    assert reservada["clave_sala"] == datos["sala"] and reservada["folio"]
+
+
+def test_turno_inexistente_se_rechaza_en_ambos_modos(datos):
+    solicitud = {"asistentes": 4, "fecha": datos["dia"], "turno": "Madrugada",
+                 "cliente": datos["cliente"], "evento": "Taller"}
+
+    for reservar in (False, True):
+        resultado, = PIA.asignar_salas_en_lote([solicitud], reservar=reservar)
+        assert resultado == {"motivo": "El turno 'Madrugada' no existe."}
+
+
+def test_repartir_salas_prefiere_la_mas_ajustada():
+    asignaciones = PIA._repartir_salas([(0, 3), (1, 8)], [(4, 1), (8, 2), (20, 3)])
+    assert asignaciones == {0: (4, 1), 1: (8, 2)}
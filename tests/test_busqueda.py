@@ -0,0 +1,41 @@
+import PIA
+
+
+def _claves(resultados):
+    return sorted(fila[0] for fila in resultados)
+
+
+def test_clientes_sin_acentos_y_por_prefijo(base):
+    ana = PIA.agregar_cliente("Ana", "López")
+    jose = PIA.agregar_cliente("José", "Ramírez")
+    PIA.agregar_cliente("Luis", "Pérez")
+
+    assert _claves(PIA.buscar_clientes("lopez")) == [ana]
+    assert _claves(PIA.buscar_clientes("RAMIR")) == [jose]
+    assert _claves(PIA.buscar_clientes("jose ram")) == [jose]
+    assert PIA.buscar_clientes("jose perez") == []
+    assert PIA.buscar_clientes("  ¿? ") == []
+
+
+def test_clientes_con_errores_de_escritura(base):
+    jose = PIA.agregar_cliente("José", "Ramírez")
+    PIA.agregar_cliente("Ana", "López")
+
+    assert _claves(PIA.buscar_clientes("ramires")) == [jose]
+    assert PIA.buscar_clientes("zzzzzz") == []
+
+
+def test_eventos_incluyen_sala_cliente_y_siguen_los_cambios(datos):
+    folio = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], "Matutino", "Conferencia de mercadotecnia")
+    otro = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], "Nocturno", "Cena de gala")
+
+    assert PIA.buscar_reservas_por_evento("mercado") == [
+        (folio, datos["dia"], "Conferencia de mercadotecnia", "ACTIVA", "SALA A", "ANA LÓPEZ")
+    ]
+    assert _claves(PIA.buscar_reservas_por_evento("conferensia")) == [folio]
+
+    PIA.obtener_conexion().execute("UPDATE reserva SET evento = 'Gala benéfica' WHERE folio = ?", (folio,))
+    PIA.obtener_conexion().commit()
+    assert _claves(PIA.buscar_reservas_por_evento("gala")) == [folio, otro]
+    assert PIA.buscar_reservas_por_evento("mercado") == []
+    assert len(PIA.buscar_reservas_por_evento("gala", limite=1)) == 1
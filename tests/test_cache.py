@@ -0,0 +1,55 @@
+import contextlib
+import sqlite3
+
+import pytest
+
+import PIA
+
+
+@pytest.fixture
+def estadisticas(monkeypatch):
+    """Contadores del caché en cero para la prueba."""
+    contadores = dict.fromkeys(PIA.ESTADISTICAS_CACHE, 0)
+    monkeypatch.setattr(PIA, "ESTADISTICAS_CACHE", contadores)
+    return contadores
+
+
+def _escribir_desde_otra_estacion(ruta, sentencia):
+    with contextlib.closing(sqlite3.connect(ruta)) as otra:
+        otra.execute(sentencia)
+        otra.commit()
+
+
+def test_aciertos_y_revisiones_limitadas(datos, estadisticas, monkeypatch):
+    monkeypatch.setattr(PIA, "INTERVALO_VERSION_DATOS", 3600)
+    PIA.invalidar_cache()
+
+    for _ in range(5):
+        assert PIA.contar_salas() == 1
+
+    assert estadisticas["fallos"] == 1
+    assert estadisticas["aciertos"] == 4
+    assert estadisticas["revisiones"] == 0
+
+
+def test_escritura_propia_invalida_al_momento(datos, estadisticas, monkeypatch):
+    monkeypatch.setattr(PIA, "INTERVALO_VERSION_DATOS", 3600)
+    assert [nombre for _, nombre, _ in PIA.obtener_salas()] == ["SALA A"]
+
+    PIA.agregar_sala("Sala B", 5)
+
+    assert [nombre for _, nombre, _ in PIA.obtener_salas()] == ["SALA A", "SALA B"]
+    assert estadisticas["invalidaciones"] >= 1
+
+
+def test_escritura_de_otra_estacion_se_nota_tras_el_intervalo(base, datos, estadisticas, monkeypatch):
+    monkeypatch.setattr(PIA, "INTERVALO_VERSION_DATOS", 3600)
+    assert PIA.contar_clientes() == 1
+
+    _escribir_desde_otra_estacion(base, "INSERT INTO clientes (nombre, apellido) VALUES ('LUIS', 'PÉREZ')")
+    assert PIA.contar_clientes() == 1
+
+    monkeypatch.setattr(PIA, "INTERVALO_VERSION_DATOS", 0)
+    assert PIA.contar_clientes() == 2
+    assert estadisticas["invalidaciones"] == 1
+    assert estadisticas["revisiones"] == 1
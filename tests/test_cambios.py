@@ -0,0 +1,56 @@
+import PIA
+
+
+def test_registra_altas_y_cambios(datos):
+    folio = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    PIA.cancelar_reserva(folio)
+
+    cambios = PIA.leer_cambios()
+    assert [(cambio["tabla"], cambio["operacion"], cambio["clave"]) for cambio in cambios] == [
+        ("clientes", "INSERT", datos["cliente"]), ("salas", "INSERT", datos["sala"]),
+        ("reserva", "INSERT", folio), ("reserva", "UPDATE", folio),
+    ]
+    assert cambios[-1]["datos"]["estado"] == "CANCELADA"
+    assert cambios[-1]["datos"]["fecha"] == datos["dia"].isoformat()
+    assert [cambio["id"] for cambio in PIA.leer_cambios(despues_de=cambios[1]["id"])] == [cambios[2]["id"], cambios[3]["id"]]
+
+
+def test_la_marca_avanza_solo_al_confirmar(datos):
+    primero = PIA.consumir_cambios("facturacion", limite=1)
+    assert PIA.consumir_cambios("facturacion", limite=1) == primero
+    assert PIA.marca_de_consumidor("facturacion") == 0
+
+    PIA.confirmar_cambios("facturacion", primero[-1]["id"])
+    assert PIA.marca_de_consumidor("facturacion") == primero[-1]["id"]
+
+    PIA.confirmar_cambios("facturacion", 0)
+    assert PIA.marca_de_consumidor("facturacion") == primero[-1]["id"]
+
+
+def test_sincronizar_entrega_cada_cambio_una_vez(datos):
+    for turno in datos["turnos"]:
+        PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], turno, "Taller")
+    lotes = []
+
+    assert PIA.sincronizar_cambios("correo", lotes.append, limite=2) == 5
+    assert [len(lote) for lote in lotes] == [2, 2, 1]
+    assert PIA.sincronizar_cambios("correo", lotes.append) == 0
+    assert PIA.marca_de_consumidor("correo") == lotes[-1][-1]["id"]
+
+
+def test_depurar_respeta_al_consumidor_mas_atrasado(datos):
+    cambios = PIA.leer_cambios()
+    PIA.confirmar_cambios("correo", cambios[-1]["id"])
+    PIA.confirmar_cambios("facturacion", cambios[0]["id"])
+
+    assert PIA.depurar_cambios() == 1
+    assert [cambio["id"] for cambio in PIA.leer_cambios()] == [cambio["id"] for cambio in cambios[1:]]
+
+
+def test_archivar_no_registra_cambios(datos):
+    PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][1], "Junta")
+    total = len(PIA.leer_cambios())
+
+    assert PIA.archivar_reservas(dias_retencion=-30) == 1
+    assert len(PIA.leer_cambios()) == total
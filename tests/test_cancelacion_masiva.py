@@ -0,0 +1,61 @@
+import csv
+import datetime
+
+import PIA
+
+
+def _respuestas(monkeypatch, *respuestas):
+    pendientes = iter(respuestas)
+    monkeypatch.setattr("builtins.input", lambda mensaje="": next(pendientes))
+
+
+def test_cancelar_por_sala_y_turno(datos):
+    otra_sala = PIA.agregar_sala("Sala B", 20)
+    dias = [datos["dia"] + datetime.timedelta(days=desplazamiento) for desplazamiento in range(3)]
+    folios = {}
+    for dia in dias:
+        for clave_sala in (datos["sala"], otra_sala):
+            for turno in datos["turnos"]:
+                folios[dia, clave_sala, turno] = PIA.reservar_sala(datos["cliente"], dia, clave_sala, turno, "Evento")
+
+    criterios = (dias[0], dias[1], datos["sala"], None, "Matutino")
+    assert PIA.contar_reservas_por_criterios(*criterios) == 2
+    cancelados = PIA.cancelar_reservas_por_criterios(*criterios)
+
+    assert cancelados == sorted(folios[dia, datos["sala"], "Matutino"] for dia in dias[:2])
+    assert PIA.contar_reservas_por_criterios(*criterios) == 0
+    assert PIA.cancelar_reservas_por_criterios(*criterios) == []
+    assert PIA.contar_reservas_por_criterios(dias[0], dias[2]) == len(folios) - 2
+
+
+def test_pocos_folios_se_muestran_en_linea(monkeypatch, capsys):
+    _respuestas(monkeypatch)
+
+    PIA.mostrar_folios_cancelados([3, 5, 8])
+
+    assert "Folios cancelados: 3, 5, 8" in capsys.readouterr().out
+
+
+def test_muchos_folios_por_paginas(monkeypatch, capsys):
+    monkeypatch.setattr(PIA, "TAMANO_PAGINA", 2)
+    _respuestas(monkeypatch, "x", "v", "", "EXIT")
+
+    PIA.mostrar_folios_cancelados(list(range(1, 61)))
+
+    salida = capsys.readouterr().out
+    assert "Respuesta no válida" in salida
+    assert "1, 2, 3, 4, 5, 6, 7, 8, 9, 10" in salida
+    assert "31, 32, 33, 34, 35, 36, 37, 38, 39, 40" in salida
+    assert "41, 42" not in salida
+
+
+def test_muchos_folios_a_archivo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _respuestas(monkeypatch, "A")
+
+    PIA.mostrar_folios_cancelados(list(range(100, 125)))
+
+    [archivo] = tmp_path.glob("folios_cancelados_*.csv")
+    with open(archivo, encoding="utf-8", newline="") as archivo_csv:
+        filas = list(csv.reader(archivo_csv))
+    assert filas == [["Folio"]] + [[str(folio)] for folio in range(100, 125)]
@@ -0,0 +1,47 @@
+import sqlite3
+
+import carga_reservas
+import PIA
+
+
+def _espacio(datos, folio):
+    return (folio, datos["dia"].isoformat(), datos["turnos"][0], datos["sala"])
+
+
+def test_cancelar_y_volver_a_reservar_no_es_reserva_doble(datos, base):
+    primero = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    PIA.cancelar_reserva(primero)
+    segundo = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Junta")
+
+    confirmadas = [_espacio(datos, primero), _espacio(datos, segundo)]
+    assert carga_reservas.verificar_reservas_dobles(base, confirmadas, [primero]) == []
+
+
+def test_detecta_un_espacio_activo_dos_veces_aunque_se_cancele_despues(datos, base):
+    primero = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    with PIA.transaccion() as conn:
+        conn.execute("DROP INDEX idx_reserva_espacio_activo")
+    segundo = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Junta")
+    PIA.cancelar_reserva(primero)
+
+    problemas = carga_reservas.verificar_reservas_dobles(
+        base, [_espacio(datos, primero), _espacio(datos, segundo)], [primero]
+    )
+    assert len(problemas) == 1
+    assert f"folio {segundo} se confirmó" in problemas[0] and f"folio {primero} seguía activo" in problemas[0]
+
+
+def test_reintenta_escrituras_bloqueadas(base, monkeypatch):
+    intentos = []
+    monkeypatch.setitem(PIA.REINTENTOS_ESCRITURA, "espera_inicial", 0)
+
+    @PIA.con_reintentos
+    def escribir():
+        intentos.append(1)
+        if len(intentos) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "listo"
+
+    antes = PIA.ESTADISTICAS_REINTENTOS["reintentos"]
+    assert escribir() == "listo"
+    assert len(intentos) == 3 and PIA.ESTADISTICAS_REINTENTOS["reintentos"] - antes == 2
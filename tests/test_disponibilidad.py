@@ -0,0 +1,49 @@
+import datetime
+
+import PIA
+
+
+def _primer_dia_reservable():
+    fecha = datetime.date.today() + datetime.timedelta(days=PIA.DIAS_ANTICIPACION)
+    return fecha + datetime.timedelta(days=1) if fecha.weekday() == 6 else fecha
+
+
+def test_matriz_marca_cada_sala_ocupada(datos):
+    grande = PIA.agregar_sala("Sala grande", 30)
+    PIA.reservar_sala(datos["cliente"], datos["dia"], grande, datos["turnos"][1], "Taller")
+    cancelada = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][1], "Junta")
+    PIA.cancelar_reserva(cancelada)
+
+    disponibilidad = PIA.calcular_disponibilidad(datos["dia"], datos["dia"] + datetime.timedelta(days=1))
+
+    assert len(disponibilidad["ocupacion"]) == 2 * len(datos["turnos"])
+    assert disponibilidad["ocupacion"][1] == 0b10
+    assert sum(disponibilidad["ocupacion"]) == 0b10
+    assert [sala[0] for sala in PIA.salas_libres(disponibilidad, datos["dia"], datos["turnos"][1])] == [datos["sala"]]
+    assert PIA.salas_libres(disponibilidad, datos["dia"], datos["turnos"][1], cupo_minimo=20) == []
+    assert len(PIA.salas_libres(disponibilidad, datos["dia"], datos["turnos"][0], cupo_minimo=20)) == 1
+
+
+def test_proximos_espacios_saltan_ocupados_y_domingos(datos):
+    inicio = _primer_dia_reservable()
+    PIA.reservar_sala(datos["cliente"], inicio, datos["sala"], datos["turnos"][0], "Taller")
+
+    espacios = PIA.buscar_espacios_disponibles(cantidad=7, clave_sala=datos["sala"], dias_por_bloque=2)
+
+    assert espacios[0][:3] == (inicio, datos["turnos"][1], datos["sala"])
+    assert len(espacios) == 7
+    assert all(fecha.weekday() != 6 for fecha, *_ in espacios)
+    assert len(set(espacios)) == 7
+    assert [espacio[:2] for espacio in espacios] == sorted(
+        (espacio[:2] for espacio in espacios), key=lambda espacio: (espacio[0], datos["turnos"].index(espacio[1]))
+    )
+
+
+def test_proximos_espacios_proponen_la_sala_mas_chica_que_cabe(datos):
+    PIA.agregar_sala("Sala grande", 30)
+    mediana = PIA.agregar_sala("Sala mediana", 15)
+
+    espacios = PIA.buscar_espacios_disponibles(cantidad=2, cupo_minimo=12, turno=datos["turnos"][2])
+
+    assert [(turno, clave) for _, turno, clave, _, _ in espacios] == [(datos["turnos"][2], mediana)] * 2
+    assert PIA.buscar_espacios_disponibles(cupo_minimo=100) == []
@@ -0,0 +1,73 @@
+import csv
+import datetime
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+import PIA
+
+
+@pytest.fixture
+def exportables(datos, reservas):
+    """Las reservas del fixture con la primera cancelada, más una reserva al día siguiente."""
+    PIA.cancelar_reserva(reservas[0])
+    siguiente = datos["dia"] + datetime.timedelta(days=1)
+    folio = PIA.reservar_sala(datos["cliente"], siguiente, datos["sala"], datos["turnos"][0], "Curso")
+    return {"activas": [*reservas[1:], folio], "siguiente": siguiente}
+
+
+def _leer(formato, ruta):
+    with open(ruta, encoding="utf-8", newline="") as archivo:
+        if formato == "csv":
+            lector = csv.reader(archivo)
+            encabezados = next(lector)
+            return [dict(zip(encabezados, fila)) for fila in lector]
+        if formato == "json":
+            return json.load(archivo)
+        return [json.loads(linea) for linea in archivo]
+
+
+@pytest.mark.parametrize("formato", ["csv", "json", "ndjson"])
+def test_exporta_solo_las_activas_en_orden(exportables, datos, tmp_path, formato):
+    ruta, total = PIA.exportar_reservas(formato, str(tmp_path / f"reservas.{formato}"))
+
+    registros = _leer(formato, ruta)
+    assert total == len(registros) == 3
+    assert [int(registro["Folio"]) for registro in registros] == exportables["activas"]
+    assert registros[0]["Fecha"] == datos["dia"].isoformat()
+    assert registros[0]["Sala"] == "SALA A" and registros[0]["Cliente"] == "ANA LÓPEZ"
+    assert registros[0]["Turno"] == datos["turnos"][1]
+
+
+def test_excel_tiene_encabezados_y_filas(exportables, tmp_path):
+    ruta, total = PIA.exportar_reservas("excel", str(tmp_path / "reservas.xlsx"))
+
+    filas = list(load_workbook(ruta, read_only=True)["Reservas"].values)
+    assert filas[0] == tuple(PIA.ENCABEZADOS_EXPORTACION)
+    assert total == len(filas) - 1 == 3
+    assert [fila[0] for fila in filas[1:]] == exportables["activas"]
+
+
+def test_rango_de_fechas(exportables, datos, tmp_path):
+    _, total = PIA.exportar_reservas("csv", str(tmp_path / "dia.csv"), datos["dia"], datos["dia"])
+    assert total == 2
+    _, total = PIA.exportar_reservas("csv", str(tmp_path / "siguiente.csv"), exportables["siguiente"])
+    assert total == 1
+
+
+def test_exportadores_consumen_un_iterador(tmp_path):
+    filas = ((numero, None, f"Evento {numero}") for numero in range(3))
+
+    assert PIA.exportar_json(filas, str(tmp_path / "f.json"), ["Folio", "Sala", "Evento"]) == 3
+    with open(tmp_path / "f.json", encoding="utf-8") as archivo:
+        assert json.load(archivo)[2] == {"Folio": 2, "Sala": "", "Evento": "Evento 2"}
+
+    assert PIA.exportar_json(iter(()), str(tmp_path / "vacio.json"), ["Folio"]) == 0
+    with open(tmp_path / "vacio.json", encoding="utf-8") as archivo:
+        assert json.load(archivo) == []
+
+
+def test_formato_desconocido(base):
+    with pytest.raises(ValueError, match="no soportado"):
+        PIA.exportar_reservas("xml")
@@ -0,0 +1,33 @@
+import pytest
+
+import PIA
+
+
+def test_exporta_cancelaciones_archivadas(datos, tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    cancelada = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][1], "Junta")
+    assert PIA.cancelar_reserva(cancelada)
+    assert PIA.archivar_reservas(dias_canceladas=-1) == 1
+
+    ruta, total = PIA.exportar_reservas_columnar(
+        "parquet", str(tmp_path / "reservas.parquet"), columnas=["folio", "estado"], incluir_canceladas=True
+    )
+
+    assert total == 2
+    tabla = pyarrow.parquet.read_table(ruta).to_pydict()
+    assert dict(zip(tabla["folio"], tabla["estado"]))[cancelada] == "CANCELADA"
+
+
+def test_sin_canceladas_exporta_solo_activas(datos, tmp_path):
+    pytest.importorskip("pyarrow")
+
+    cancelada = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][1], "Junta")
+    PIA.cancelar_reserva(cancelada)
+    PIA.archivar_reservas(dias_canceladas=-1)
+
+    _, total = PIA.exportar_reservas_columnar("arrow", str(tmp_path / "reservas.arrow"))
+    assert total == 1
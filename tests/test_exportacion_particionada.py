@@ -0,0 +1,81 @@
+import csv
+import datetime
+import gzip
+import hashlib
+import json
+
+import pytest
+
+import PIA
+
+
+@pytest.fixture
+def reservas_en_dos_salas(datos):
+    """Reservas en dos fechas y dos salas, más una cancelada que no debe exportarse."""
+    otra_sala = PIA.agregar_sala("Sala B", 20)
+    segundo_dia = datos["dia"] + datetime.timedelta(days=1)
+    PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], "Matutino", "Desayuno")
+    PIA.reservar_sala(datos["cliente"], datos["dia"], otra_sala, "Nocturno", "Cena")
+    PIA.reservar_sala(datos["cliente"], segundo_dia, otra_sala, "Vespertino", "Taller")
+    PIA.cancelar_reserva(PIA.reservar_sala(datos["cliente"], segundo_dia, datos["sala"], "Matutino", "Cancelada"))
+    return datos["dia"], segundo_dia
+
+
+def _manifiesto_coincide_con_disco(directorio, manifiesto):
+    with open(directorio / "manifiesto.json", encoding="utf-8") as archivo_json:
+        assert json.load(archivo_json) == manifiesto
+    assert sorted(entrada["archivo"] for entrada in manifiesto["archivos"]) == sorted(
+        ruta.name for ruta in directorio.iterdir() if ruta.name != "manifiesto.json"
+    )
+    for entrada in manifiesto["archivos"]:
+        contenido = (directorio / entrada["archivo"]).read_bytes()
+        assert entrada["bytes"] == len(contenido)
+        assert entrada["sha256"] == hashlib.sha256(contenido).hexdigest()
+
+
+def test_por_fecha(reservas_en_dos_salas, tmp_path):
+    primer_dia, segundo_dia = reservas_en_dos_salas
+    directorio = tmp_path / "por_fecha"
+
+    ruta, manifiesto = PIA.exportar_reportes_particionados(
+        primer_dia, segundo_dia, ["csv", "json"], directorio=str(directorio), trabajadores=2
+    )
+
+    assert ruta == str(directorio)
+    _manifiesto_coincide_con_disco(directorio, manifiesto)
+    assert {(entrada["archivo"], entrada["filas"]) for entrada in manifiesto["archivos"]} == {
+        (f"reporte_{primer_dia.isoformat()}.csv", 2), (f"reporte_{primer_dia.isoformat()}.json", 2),
+        (f"reporte_{segundo_dia.isoformat()}.csv", 1), (f"reporte_{segundo_dia.isoformat()}.json", 1),
+    }
+
+
+def test_por_sala_comprimido(reservas_en_dos_salas, tmp_path):
+    primer_dia, segundo_dia = reservas_en_dos_salas
+    directorio = tmp_path / "por_sala"
+
+    _, manifiesto = PIA.exportar_reportes_particionados(
+        primer_dia, segundo_dia, ["csv", "excel"], particion="sala", directorio=str(directorio), comprimir=True
+    )
+
+    _manifiesto_coincide_con_disco(directorio, manifiesto)
+    assert manifiesto["comprimido"] is True
+    assert sorted(entrada["archivo"] for entrada in manifiesto["archivos"]) == [
+        "reporte_sala_1.csv.gz", "reporte_sala_1.xlsx", "reporte_sala_2.csv.gz", "reporte_sala_2.xlsx"
+    ]
+    with gzip.open(directorio / "reporte_sala_2.csv.gz", "rt", encoding="utf-8", newline="") as archivo_csv:
+        filas = list(csv.reader(archivo_csv))
+    assert filas == [
+        PIA.ENCABEZADOS_REPORTE_SALA,
+        [primer_dia.isoformat(), "ANA LÓPEZ", "Cena", "Nocturno"],
+        [segundo_dia.isoformat(), "ANA LÓPEZ", "Taller", "Vespertino"],
+    ]
+
+
+def test_directorio_existente_y_formato_invalido(reservas_en_dos_salas, tmp_path):
+    primer_dia, segundo_dia = reservas_en_dos_salas
+
+    with pytest.raises(FileExistsError):
+        PIA.exportar_reportes_particionados(primer_dia, segundo_dia, ["csv"], directorio=str(tmp_path))
+    with pytest.raises(ValueError):
+        PIA.exportar_reportes_particionados(primer_dia, segundo_dia, ["pdf"], directorio=str(tmp_path / "nuevo"))
+    assert not (tmp_path / "nuevo").exists()
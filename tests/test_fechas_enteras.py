@@ -0,0 +1,38 @@
+import datetime
+import sqlite3
+
+import pytest
+
+import PIA
+
+
+def test_migra_fechas_de_texto_y_turnos_por_nombre(base_version_1):
+    conn = base_version_1([
+        ("2024-03-04", "matutino", "Taller de ventas", "ACTIVA"),
+        ("2024-03-04 00:00:00", "Nocturno", "Cena", "CANCELADA"),
+    ])
+
+    PIA.aplicar_migraciones(conn)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(PIA.MIGRACIONES)
+    dia = datetime.date(2024, 3, 4).toordinal()
+    assert conn.execute("SELECT folio, fecha, clave_turno, estado, serie FROM reserva ORDER BY folio").fetchall() == [
+        (1, dia, 1, "ACTIVA", None), (2, dia, 3, "CANCELADA", None)
+    ]
+    assert conn.execute("SELECT mes, activas, canceladas FROM ocupacion_clientes").fetchall() == [("2024-03", 1, 1)]
+    assert [reserva[0] for reserva in PIA.buscar_reservas_por_evento("ventas")] == [1]
+    assert PIA.leer_cambios() == []
+
+
+def test_fechas_invalidas_detienen_la_migracion(base_version_1):
+    conn = base_version_1([("no es fecha", "Matutino", "Taller", "ACTIVA")])
+
+    with pytest.raises(sqlite3.Error, match="fecha o turno inválidos"):
+        PIA.aplicar_migraciones(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 5
+
+
+def test_dia_de_fecha_ida_y_vuelta():
+    fecha = datetime.date(2024, 2, 29)
+    assert PIA.fecha_de_dia(PIA.dia_de_fecha(fecha)) == fecha
+    assert PIA.dia_de_fecha(fecha) - PIA.dia_de_fecha(datetime.date(2024, 2, 28)) == 1
@@ -0,0 +1,85 @@
+import csv
+import datetime
+import json
+
+import pytest
+
+import PIA
+
+
+def _escribir(ruta, contenido):
+    ruta.write_text(contenido, encoding="utf-8")
+    return str(ruta)
+
+
+def _proximo_lunes():
+    fecha = datetime.date.today() + datetime.timedelta(days=PIA.DIAS_ANTICIPACION)
+    return fecha + datetime.timedelta(days=(7 - fecha.weekday()) % 7)
+
+
+def test_clientes_csv_con_filas_invalidas(base, tmp_path):
+    ruta = _escribir(tmp_path / "clientes.csv", "Nombre,Apellido\nAna,López\nBeto,\nC4rla,Ruiz\n Dora , Paz \n")
+
+    resultado = PIA.importar_clientes(ruta)
+
+    assert resultado["insertados"] == 2
+    assert resultado["rechazos"] == [(3, "No se puede omitir el dato."), (4, "No se aceptan números ni caracteres especiales.")]
+    assert sorted(PIA.obtener_clientes()) == [(1, "LÓPEZ", "ANA"), (2, "PAZ", "DORA")]
+
+
+def test_salas_json_por_lotes(base, tmp_path, monkeypatch):
+    monkeypatch.setattr(PIA, "TAMANO_LOTE", 2)
+    salas = [{"nombre": f"Sala {numero}", "cupo": numero} for numero in range(1, 6)]
+    salas[2]["cupo"] = "tres"
+    ruta = _escribir(tmp_path / "salas.json", json.dumps(salas))
+
+    resultado = PIA.importar_salas(ruta)
+
+    assert resultado == {"insertados": 4, "rechazos": [(3, "El cupo no es un número entero válido. Intente de nuevo.")]}
+    assert [nombre for _, nombre, _ in PIA.obtener_salas()] == ["SALA 1", "SALA 2", "SALA 4", "SALA 5"]
+
+
+def test_reservas_ndjson_con_rechazos(datos, tmp_path, monkeypatch):
+    monkeypatch.setattr(PIA, "TAMANO_LOTE", 2)
+    lunes = _proximo_lunes()
+    PIA.reservar_sala(datos["cliente"], lunes, datos["sala"], "Nocturno", "Ya estaba")
+    base = {"fecha": lunes.strftime("%m-%d-%Y"), "clave_sala": datos["sala"], "clave_cliente": datos["cliente"]}
+    registros = [
+        {**base, "turno": "matutino", "evento": "taller  de  ventas"},
+        {**base, "turno": "Matutino", "evento": "Repetida en el archivo"},
+        {**base, "turno": "Nocturno", "evento": "Ocupada en la base"},
+        {**base, "fecha": (lunes - datetime.timedelta(days=1)).isoformat(), "turno": "Vespertino", "evento": "Domingo"},
+        {**base, "fecha": "31-31-2030", "turno": "Vespertino", "evento": "Fecha mala"},
+        {**base, "clave_cliente": 99, "turno": "Vespertino", "evento": "Sin cliente"},
+        {**base, "turno": "Madrugada", "evento": "Sin turno"},
+        {**base, "turno": "2", "evento": "   "},
+        {**base, "turno": "2", "evento": "Por clave de turno"},
+    ]
+    ruta = _escribir(tmp_path / "reservas.ndjson", "".join(json.dumps(registro) + "\n" for registro in registros))
+
+    resultado = PIA.importar_reservas(ruta)
+
+    assert resultado["insertados"] == 2
+    assert resultado["rechazos"] == [
+        (2, "La sala ya está reservada para ese turno y fecha."),
+        (3, "La sala ya está reservada para ese turno y fecha."),
+        (4, "No se pueden realizar reservaciones en domingo."),
+        (5, "Formato de fecha incorrecto. Use mm-dd-aaaa."),
+        (6, "No existe el cliente 99."),
+        (7, "Turno inválido."),
+        (8, "El nombre del evento es obligatorio y no puede dejarse vacío."),
+    ]
+    assert PIA.obtener_conexion().execute(
+        "SELECT evento, clave_turno FROM reserva WHERE folio > 1 ORDER BY folio"
+    ).fetchall() == [("Taller de ventas", 1), ("Por clave de turno", 2)]
+
+    reporte = tmp_path / "rechazos.csv"
+    PIA.escribir_rechazos(resultado["rechazos"], str(reporte))
+    with open(reporte, encoding="utf-8", newline="") as archivo:
+        filas = list(csv.reader(archivo))
+    assert filas[0] == ["Registro", "Motivo"] and len(filas) == 8
+
+
+def test_extension_no_soportada(base, tmp_path):
+    with pytest.raises(ValueError, match="no soportado"):
+        PIA.importar_clientes(_escribir(tmp_path / "clientes.txt", "Ana López"))
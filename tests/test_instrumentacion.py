@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import PIA
+
+
+@pytest.fixture
+def instrumentacion(base, tmp_path, monkeypatch):
+    """Instrumentación encendida con métricas vacías, y registro y JSON de métricas en tmp_path."""
+    for llave in ("activa", "umbral_lenta_ms", "registro_lentas", "metricas"):
+        monkeypatch.setitem(PIA.INSTRUMENTACION, llave, PIA.INSTRUMENTACION[llave])
+    monkeypatch.setattr(PIA, "_metricas", {"sentencias": {}, "operaciones": {}})
+    PIA.INSTRUMENTACION["metricas"] = str(tmp_path / "metricas.json")
+    PIA.activar_instrumentacion(umbral_lenta_ms=0, registro_lentas=str(tmp_path / "lentas.log"))
+    yield tmp_path
+    PIA.cerrar_conexion()
+
+
+def test_operaciones_y_sentencias_contadas(instrumentacion, datos):
+    assert isinstance(PIA.obtener_conexion(), PIA.ConexionInstrumentada)
+    for turno in datos["turnos"]:
+        PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], turno, "Evento")
+
+    operaciones = {fila[0]: fila for fila in PIA.resumen_instrumentacion("operaciones")}
+    assert operaciones["reservar_sala"][1] == 3
+    assert operaciones["reservar_sala"][7] >= 1
+    assert operaciones["agregar_cliente"][1] == 1
+    assert any(fila[0].startswith("INSERT INTO reserva") for fila in PIA.resumen_instrumentacion("sentencias"))
+    assert len(PIA.resumen_instrumentacion("sentencias", 2)) == 2
+
+
+def test_registro_de_consultas_lentas_con_plan(instrumentacion, datos):
+    PIA.obtener_conexion().execute("SELECT folio FROM reserva WHERE fecha = ?", (PIA.dia_de_fecha(datos["dia"]),)).fetchall()
+
+    registro = (instrumentacion / "lentas.log").read_text(encoding="utf-8")
+    assert f"SELECT folio FROM reserva WHERE fecha = {PIA.dia_de_fecha(datos['dia'])}" in registro
+    assert "SEARCH reserva" in registro or "SCAN reserva" in registro
+
+
+def test_histogramas_en_json(instrumentacion, datos, capsys):
+    PIA.obtener_salas()
+
+    PIA.mostrar_resumen_instrumentacion()
+
+    assert "Operaciones:" in capsys.readouterr().out
+    with open(instrumentacion / "metricas.json", encoding="utf-8") as archivo_json:
+        metricas = json.load(archivo_json)
+    assert metricas["limites_ms"][-1] == "inf"
+    agregar_sala = metricas["operaciones"]["agregar_sala"]
+    assert agregar_sala["conteo"] == 1
+    assert sum(agregar_sala["histograma"]) == 1
+    assert len(agregar_sala["histograma"]) == len(PIA.LIMITES_HISTOGRAMA_MS)
+
+
+def test_apagada_no_mide(base, monkeypatch):
+    monkeypatch.setitem(PIA.INSTRUMENTACION, "activa", False)
+    monkeypatch.setattr(PIA, "_metricas", {"sentencias": {}, "operaciones": {}})
+
+    PIA.agregar_cliente("Ana", "López")
+
+    assert not isinstance(PIA.obtener_conexion(), PIA.ConexionInstrumentada)
+    assert PIA.resumen_instrumentacion() == []
@@ -0,0 +1,84 @@
+import io
+import json
+
+import pytest
+
+import PIA
+
+
+def _ejecutar(base, *argumentos):
+    return PIA.main(["--bd", base, *argumentos])
+
+
+def test_operaciones_exitosas_y_rechazadas(datos, base, capsys):
+    fecha = datos["dia"].isoformat()
+    reservar = ["reservar", "--cliente", "1", "--sala", "1", "--fecha", fecha, "--turno", "matutino", "--evento", "Taller"]
+
+    assert _ejecutar(base, *reservar) == PIA.SALIDA_EXITO
+    assert json.loads(capsys.readouterr().out) == {"folio": 1}
+
+    assert _ejecutar(base, *reservar) == PIA.SALIDA_RECHAZADA
+    assert "ya está reservada" in capsys.readouterr().err
+
+    assert _ejecutar(base, "cancel", "1") == PIA.SALIDA_EXITO
+    assert _ejecutar(base, "cancel", "1") == PIA.SALIDA_RECHAZADA
+    assert _ejecutar(base, "add-room", "Sala B", "0") == PIA.SALIDA_RECHAZADA
+
+
+def test_errores_de_uso(base, tmp_path, capsys):
+    assert _ejecutar(base, "export", "--formato", "csv", "--incluir-canceladas") == PIA.SALIDA_USO
+    assert "parquet y arrow" in capsys.readouterr().err
+
+    assert _ejecutar(base, "export", "--formato", "json", "--columnas", "folio") == PIA.SALIDA_USO
+    assert _ejecutar(base, "restore", str(tmp_path / "no-existe.db")) == PIA.SALIDA_USO
+    assert _ejecutar(base, "export-reports", "--desde", "2024-02-01", "--hasta", "2024-01-01") == PIA.SALIDA_USO
+
+    with pytest.raises(SystemExit) as salida:
+        _ejecutar(base, "report", "--fecha", "31-31-2024")
+    assert salida.value.code == PIA.SALIDA_USO
+
+
+def test_error_de_base_de_datos(tmp_path, capsys):
+    ruta = tmp_path / "no-es-base.db"
+    ruta.write_text("esto no es una base de datos SQLite" * 10)
+
+    assert PIA.main(["--bd", str(ruta), "add-client", "Ana", "López"]) == PIA.SALIDA_ERROR
+    assert capsys.readouterr().err.startswith("Error de base de datos:")
+    PIA.cerrar_conexion()
+
+
+def test_lote_informa_rechazos(datos, base, capsys, monkeypatch):
+    operaciones = [
+        {"operacion": "agregar-cliente", "nombre": "Beto", "apellido": "Díaz"},
+        {"operacion": "cancelar", "folio": 99},
+    ]
+    monkeypatch.setattr("sys.stdin", io.StringIO("".join(json.dumps(operacion) + "\n" for operacion in operaciones)))
+
+    assert _ejecutar(base, "batch") == PIA.SALIDA_RECHAZADA
+    resultados = [json.loads(linea) for linea in capsys.readouterr().out.splitlines()]
+    assert [resultado["ok"] for resultado in resultados] == [True, False]
+
+    monkeypatch.setattr("sys.stdin", io.StringIO(json.dumps(operaciones[0]) + "\n"))
+    assert _ejecutar(base, "batch") == PIA.SALIDA_EXITO
+
+
+def test_operacion_reservar_rechaza_el_conflicto(datos):
+    reservar = (datos["cliente"], datos["sala"], datos["dia"], datos["turnos"][0].lower(), "Taller")
+    assert PIA.operacion_reservar(*reservar) == {"folio": 1}
+
+    with pytest.raises(PIA.OperacionRechazada, match="ya está reservada"):
+        PIA.operacion_reservar(*reservar)
+    with pytest.raises(PIA.OperacionRechazada, match="obligatorio"):
+        PIA.operacion_reservar(datos["cliente"], datos["sala"], datos["dia"], datos["turnos"][1], "   ")
+
+
+def test_asignar_informa_lineas_invalidas_y_coloca_las_demas(datos, base, capsys, monkeypatch):
+    valida = json.dumps({"asistentes": 4, "fecha": datos["dia"].isoformat(), "turno": "matutino"})
+    sin_turno = json.dumps({"asistentes": 4, "fecha": datos["dia"].isoformat()})
+    monkeypatch.setattr("sys.stdin", io.StringIO(f"{valida}\nnot json\n\n{sin_turno}\n"))
+
+    assert _ejecutar(base, "allocate") == PIA.SALIDA_RECHAZADA
+    resultados = [json.loads(linea) for linea in capsys.readouterr().out.splitlines()]
+    assert resultados[0] == {"solicitud": 1, "clave_sala": datos["sala"], "cupo": 10, "sobrantes": 6}
+    assert resultados[1]["solicitud"] == 2 and resultados[1]["motivo"].startswith("JSON inválido")
+    assert resultados[2] == {"solicitud": 4, "motivo": "No se puede omitir el campo 'turno'."}
@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+
+import PIA
+
+
+def test_base_nueva_queda_en_la_ultima_version(base):
+    conn = PIA.obtener_conexion()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(PIA.MIGRACIONES)
+    tablas = {nombre for (nombre,) in conn.execute("SELECT name FROM sqlite_schema WHERE type = 'table'")}
+    assert {"clientes", "salas", "turno", "reserva", "reserva_archivo", "ocupacion", "ocupacion_clientes",
+            "cambios", "consumidores_cambios"} <= tablas
+    assert PIA.obtener_turnos() == [(1, "Matutino"), (2, "Vespertino"), (3, "Nocturno")]
+
+
+def test_inicializar_solo_trabaja_la_primera_vez(base, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(PIA, "aplicar_migraciones", llamadas.append)
+
+    PIA.inicializar_base_de_datos()
+    assert llamadas == []
+
+    PIA.configurar_base_de_datos(base)
+    PIA.inicializar_base_de_datos()
+    PIA.inicializar_base_de_datos()
+    assert len(llamadas) == 1
+
+
+def test_una_migracion_que_falla_no_deja_cambios(base_version_1, monkeypatch):
+    conn = base_version_1()
+
+    def fallar(cursor):
+        cursor.execute("CREATE TABLE a_medias (x)")
+        raise sqlite3.OperationalError("falla a propósito")
+
+    monkeypatch.setattr(PIA, "MIGRACIONES", [*PIA.MIGRACIONES[:3], fallar])
+    with pytest.raises(sqlite3.OperationalError, match="a propósito"):
+        PIA.aplicar_migraciones(conn)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 3
+    assert conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'a_medias'").fetchone() is None
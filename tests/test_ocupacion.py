@@ -0,0 +1,45 @@
+import PIA
+
+
+def _acumulados():
+    conn = PIA.obtener_conexion()
+    return (
+        conn.execute("SELECT * FROM ocupacion ORDER BY 1, 2, 3, 4").fetchall(),
+        conn.execute("SELECT * FROM ocupacion_clientes ORDER BY 1, 2").fetchall(),
+    )
+
+
+def test_disparadores_mantienen_los_acumulados(datos, reservas):
+    PIA.cancelar_reserva(reservas[0])
+    PIA.actualizar_evento(reservas[1], "Otro nombre")
+
+    mes = datos["dia"].strftime("%Y-%m")
+    ocupacion, clientes = _acumulados()
+    assert clientes == [(mes, datos["cliente"], 2, 1)]
+    assert sum(fila[4] for fila in ocupacion) == 2 and sum(fila[5] for fila in ocupacion) == 1
+
+    PIA.reconstruir_ocupacion()
+    assert _acumulados() == (ocupacion, clientes)
+
+
+def test_archivar_no_cambia_los_acumulados(datos, reservas):
+    PIA.cancelar_reserva(reservas[1])
+    acumulados = _acumulados()
+
+    PIA.archivar_reservas(dias_retencion=-30)
+    assert _acumulados() == acumulados
+
+    PIA.reconstruir_ocupacion()
+    assert _acumulados() == acumulados
+
+
+def test_reporte_de_ocupacion_nombra_a_los_clientes_frecuentes(datos, reservas):
+    beto = PIA.agregar_cliente("Beto", "Díaz")
+    PIA.reservar_sala(beto, datos["dia"], PIA.agregar_sala("Sala B", 4), datos["turnos"][0], "Curso")
+    PIA.archivar_reservas(dias_retencion=-30)
+
+    filas = PIA.obtener_analitica_ocupacion(datos["dia"], datos["dia"], limite_clientes=1)
+
+    assert filas[0][2:4] == (4, 0)
+    assert [fila[1:4] for fila in filas if fila[0] == "Cliente"] == [("ANA LÓPEZ", 3, 0)]
+    assert [fila[1] for fila in filas if fila[0] == "Sala"] == ["SALA A", "SALA B"]
@@ -0,0 +1,46 @@
+import datetime
+
+import PIA
+
+
+def _reservar_en_salas(datos, total_salas, fecha):
+    salas = [datos["sala"]] + [PIA.agregar_sala(f"Sala {numero}", 6) for numero in range(2, total_salas + 1)]
+    return [
+        PIA.reservar_sala(datos["cliente"], fecha, sala, turno, "Taller")
+        for turno in datos["turnos"] for sala in salas
+    ]
+
+
+def test_paginas_sin_huecos_ni_repetidos_con_fechas_iguales(datos):
+    folios = _reservar_en_salas(datos, 3, datos["dia"])
+
+    paginas = list(PIA.paginar_reservas(datos["dia"], datos["dia"], tamano_pagina=4))
+
+    assert [len(pagina) for pagina in paginas] == [4, 4, 1]
+    assert [fila[0] for pagina in paginas for fila in pagina] == sorted(folios)
+    assert {fila[1] for pagina in paginas for fila in pagina} == {datos["dia"]}
+
+
+def test_ordena_por_fecha_y_luego_por_folio(datos):
+    despues = datos["dia"] + datetime.timedelta(days=1)
+    tardio = PIA.reservar_sala(datos["cliente"], despues, datos["sala"], datos["turnos"][0], "Después")
+    temprano = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Antes")
+
+    filas = [fila for pagina in PIA.paginar_reservas(datos["dia"], despues, tamano_pagina=1) for fila in pagina]
+    assert [(fila[0], fila[1]) for fila in filas] == [(temprano, datos["dia"]), (tardio, despues)]
+
+
+def test_pagina_exacta_termina_sin_pagina_vacia(datos):
+    _reservar_en_salas(datos, 2, datos["dia"])
+
+    assert [len(pagina) for pagina in PIA.paginar_reservas(datos["dia"], datos["dia"], tamano_pagina=3)] == [3, 3]
+
+
+def test_filtros_y_archivo(datos, reservas):
+    PIA.cancelar_reserva(reservas[0])
+    ultima = (reservas[2], datos["dia"], "SALA A", "ANA LÓPEZ", "Evento 2", datos["turnos"][2])
+    assert list(PIA.paginar_reservas(datos["dia"], datos["dia"], turno=datos["turnos"][2])) == [[ultima]]
+
+    PIA.archivar_reservas(dias_retencion=-30)
+    assert [len(pagina) for pagina in PIA.paginar_reservas(datos["dia"], datos["dia"])] == [2]
+    assert list(PIA.paginar_reservas(datos["dia"], datos["dia"], incluir_archivo=False)) == [[ultima]]
@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+import PIA
+
+
+def test_espacio_ocupado_no_se_reserva_dos_veces(datos):
+    folio = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+
+    assert folio == 1
+    assert PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Junta") is None
+    assert PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][1], "Junta") == 2
+
+
+def test_cancelar_libera_el_espacio(datos):
+    folio = PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+
+    assert PIA.cancelar_reserva(folio)
+    assert not PIA.cancelar_reserva(folio)
+    assert PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Junta") == folio + 1
+
+
+def test_indice_parcial_rechaza_activas_en_el_mismo_espacio(datos):
+    PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    conn = PIA.obtener_conexion()
+    duplicada = "INSERT INTO reserva (fecha, clave_sala, clave_turno, clave_cliente, evento, creado, estado) " \
+                "SELECT fecha, clave_sala, clave_turno, clave_cliente, 'Otra', creado, ? FROM reserva WHERE folio = 1"
+
+    with pytest.raises(sqlite3.IntegrityError):
+        with PIA.transaccion():
+            conn.execute(duplicada, ("ACTIVA",))
+    with PIA.transaccion():
+        conn.execute(duplicada, ("CANCELADA",))
+    assert conn.execute("SELECT COUNT(*) FROM reserva").fetchone()[0] == 2
+
+
+def test_reservas_duplicadas_detienen_la_migracion(base_version_1):
+    conn = base_version_1([
+        ("2024-03-04", "Matutino", "Taller", "ACTIVA"),
+        ("2024-03-04", "Matutino", "Junta", "ACTIVA"),
+        ("2024-03-04", "Matutino", "Curso", "CANCELADA"),
+    ])
+
+    with pytest.raises(sqlite3.Error, match=r"1 reservas .*\(folios 2\)"):
+        PIA.aplicar_migraciones(conn)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    assert conn.execute("SELECT estado FROM reserva ORDER BY folio").fetchall() == [
+        ("ACTIVA",), ("ACTIVA",), ("CANCELADA",)
+    ]
@@ -0,0 +1,52 @@
+import contextlib
+import os
+import sqlite3
+
+import pytest
+
+import PIA
+
+
+def test_respaldo_verificado_y_rotacion(datos, tmp_path):
+    directorio = str(tmp_path / "respaldos")
+    respaldos = [PIA.respaldar_base(directorio, paginas_por_paso=1, pausa=0) for _ in range(3)]
+
+    assert respaldos[0]["pasos"] >= respaldos[0]["paginas"] > 1
+    with contextlib.closing(sqlite3.connect(respaldos[-1]["ruta"])) as copia:
+        assert copia.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+        assert copia.execute("SELECT nombre FROM salas").fetchall() == [("SALA A",)]
+
+    borrados = PIA.rotar_respaldos(directorio, conservar=1)
+    assert len(borrados) == 2
+    assert os.listdir(directorio) == [os.path.basename(respaldos[-1]["ruta"])]
+
+
+def test_restaurar_devuelve_la_base_al_respaldo(datos, tmp_path):
+    respaldo = PIA.respaldar_base(str(tmp_path / "respaldos"), pausa=0)["ruta"]
+    PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller")
+    PIA.agregar_cliente("Beto", "Díaz")
+
+    resultado = PIA.restaurar_base(respaldo)
+
+    assert resultado["version"] == len(PIA.MIGRACIONES)
+    assert resultado["filas"]["reserva"] == 0 and resultado["filas"]["clientes"] == 1
+    assert PIA.obtener_conexion().execute("SELECT COUNT(*) FROM reserva").fetchone()[0] == 0
+    assert PIA.reservar_sala(datos["cliente"], datos["dia"], datos["sala"], datos["turnos"][0], "Taller") == 1
+
+
+def test_restaurar_en_otro_destino(datos, tmp_path):
+    respaldo = PIA.respaldar_base(str(tmp_path / "respaldos"), pausa=0)["ruta"]
+    destino = str(tmp_path / "copia.db")
+
+    assert PIA.restaurar_base(respaldo, destino)["filas"]["salas"] == 1
+    with contextlib.closing(sqlite3.connect(destino)) as copia:
+        assert copia.execute("SELECT COUNT(*) FROM clientes").fetchone()[0] == 1
+
+
+def test_rechaza_respaldos_de_una_version_mas_nueva(base, tmp_path):
+    respaldo = str(tmp_path / "futuro.db")
+    with contextlib.closing(sqlite3.connect(respaldo)) as conn:
+        conn.execute(f"PRAGMA user_version = {len(PIA.MIGRACIONES) + 1}")
+
+    with pytest.raises(sqlite3.Error, match="versión de esquema más nueva"):
+        PIA.restaurar_base(respaldo)
@@ -0,0 +1,71 @@
+import datetime
+
+import pytest
+
+import PIA
+
+
+def _proximo_lunes():
+    fecha = datetime.date.today() + datetime.timedelta(days=PIA.DIAS_ANTICIPACION)
+    return fecha + datetime.timedelta(days=(7 - fecha.weekday()) % 7)
+
+
+def _reservas_de_serie(serie):
+    return PIA.obtener_conexion().execute(
+        "SELECT fecha, evento, estado FROM reserva WHERE serie = ? ORDER BY fecha", (serie,)
+    ).fetchall()
+
+
+def test_fechas_por_limite_y_por_repeticiones():
+    inicio = datetime.date(2030, 1, 7)
+
+    assert PIA.generar_fechas_serie(inicio, 7, fecha_limite=datetime.date(2030, 1, 28)) == [
+        datetime.date(2030, 1, 7), datetime.date(2030, 1, 14), datetime.date(2030, 1, 21), datetime.date(2030, 1, 28)
+    ]
+    assert PIA.generar_fechas_serie(inicio, 3, fecha_limite=datetime.date(2030, 12, 31), repeticiones=2) == [
+        datetime.date(2030, 1, 7), datetime.date(2030, 1, 10)
+    ]
+    with pytest.raises(ValueError):
+        PIA.generar_fechas_serie(inicio, 0, repeticiones=2)
+    with pytest.raises(ValueError):
+        PIA.generar_fechas_serie(inicio)
+
+
+def test_serie_omite_domingos_y_fechas_ocupadas(datos):
+    lunes = _proximo_lunes()
+    PIA.reservar_sala(datos["cliente"], lunes + datetime.timedelta(days=2), datos["sala"], "Matutino", "Previa")
+
+    resultado = PIA.reservar_serie(datos["cliente"], datos["sala"], "Matutino", "junta diaria", lunes, cada_dias=1, repeticiones=7)
+
+    assert resultado["conflictos"] == [lunes + datetime.timedelta(days=2)]
+    assert resultado["rechazadas"] == [(lunes + datetime.timedelta(days=6), "No se pueden realizar reservaciones en domingo.")]
+    assert len(resultado["folios"]) == 5
+    assert [fila[0] for fila in _reservas_de_serie(resultado["serie"])] == [
+        PIA.dia_de_fecha(lunes + datetime.timedelta(days=desplazamiento)) for desplazamiento in (0, 1, 3, 4, 5)
+    ]
+
+
+def test_serie_sin_fechas_libres_no_crea_clave(datos):
+    lunes = _proximo_lunes()
+    PIA.reservar_sala(datos["cliente"], lunes, datos["sala"], "Nocturno", "Previa")
+
+    resultado = PIA.reservar_serie(datos["cliente"], datos["sala"], "Nocturno", "Cena", lunes, repeticiones=1)
+
+    assert resultado == {"serie": None, "folios": [], "conflictos": [lunes], "rechazadas": []}
+
+
+def test_renombrar_y_cancelar_desde_una_fecha(datos):
+    lunes = _proximo_lunes()
+    primera = PIA.reservar_serie(datos["cliente"], datos["sala"], "Vespertino", "clase", lunes, repeticiones=4)
+    segunda = PIA.reservar_serie(datos["cliente"], datos["sala"], "Matutino", "otra", lunes, repeticiones=2)
+    assert primera["serie"] != segunda["serie"]
+
+    assert PIA.renombrar_serie(primera["serie"], "CLASE DE YOGA") == 4
+    cancelados = PIA.cancelar_serie(primera["serie"], desde=lunes + datetime.timedelta(days=14))
+
+    assert sorted(cancelados) == primera["folios"][2:]
+    assert [(evento, estado) for _, evento, estado in _reservas_de_serie(primera["serie"])] == [
+        ("Clase de yoga", "ACTIVA"), ("Clase de yoga", "ACTIVA"), ("Clase de yoga", "CANCELADA"), ("Clase de yoga", "CANCELADA")
+    ]
+    assert PIA.renombrar_serie(primera["serie"], "Yoga") == 2
+    assert {evento for _, evento, _ in _reservas_de_serie(segunda["serie"])} == {"Otra"}
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+import json
+import sqlite3
+
+import PIA
+import servicio_reservas
+
+
+def _proximo_lunes():
+    fecha = datetime.date.today() + datetime.timedelta(days=PIA.DIAS_ANTICIPACION)
+    return fecha + datetime.timedelta(days=(7 - fecha.weekday()) % 7)
+
+
+async def _peticion(puerto, metodo, ruta, datos=None):
+    """Hace una petición HTTP/1.1 con Connection: close y devuelve (estado, JSON de la respuesta)."""
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+    escritor.write(
+        f"{metodo} {ruta} HTTP/1.1\r\nHost: prueba\r\nConnection: close\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1") + cuerpo
+    )
+    await escritor.drain()
+    respuesta = await lector.read()
+    escritor.close()
+    encabezado, _, contenido = respuesta.partition(b"\r\n\r\n")
+    return int(encabezado.split()[1]), json.loads(contenido)
+
+
+def _con_servicio(prueba, tamano_lote=servicio_reservas.TAMANO_LOTE):
+    """Levanta el servicio en un puerto libre, ejecuta la corrutina prueba(puerto) y lo detiene."""
+    async def ejecutar():
+        escritor = servicio_reservas.EscritorSerializado(tamano_lote)
+        servicio = servicio_reservas.ServicioReservas(escritor)
+        tarea_escritor = asyncio.create_task(escritor.ejecutar())
+        servidor = await asyncio.start_server(servicio.atender, "127.0.0.1", 0)
+        try:
+            async with servidor:
+                return await prueba(servidor.sockets[0].getsockname()[1])
+        finally:
+            tarea_escritor.cancel()
+            escritor.cerrar()
+    return asyncio.run(ejecutar())
+
+
+def test_dos_reservas_simultaneas_del_mismo_espacio(datos):
+    lunes = _proximo_lunes()
+    cuerpo = {"cliente": datos["cliente"], "sala": datos["sala"], "fecha": lunes.isoformat(), "turno": "matutino"}
+
+    async def prueba(puerto):
+        return await asyncio.gather(
+            _peticion(puerto, "POST", "/reservas", {**cuerpo, "evento": "Primera"}),
+            _peticion(puerto, "POST", "/reservas", {**cuerpo, "evento": "Segunda"}),
+        )
+
+    respuestas = sorted(_con_servicio(prueba), key=lambda respuesta: respuesta[0])
+
+    assert [estado for estado, _ in respuestas] == [201, 409]
+    assert respuestas[1][1] == {"error": "La sala ya está reservada para ese turno y fecha."}
+    assert PIA.obtener_conexion().execute(
+        "SELECT folio FROM reserva WHERE estado = 'ACTIVA'"
+    ).fetchall() == [(respuestas[0][1]["folio"],)]
+
+
+def test_errores_de_peticion(datos):
+    lunes = _proximo_lunes()
+
+    async def prueba(puerto):
+        return await asyncio.gather(
+            _peticion(puerto, "POST", "/reservas", {"cliente": datos["cliente"], "sala": datos["sala"],
+                                                     "fecha": "mañana", "turno": "Matutino", "evento": "X"}),
+            _peticion(puerto, "POST", "/reservas", {"cliente": 99, "sala": datos["sala"],
+                                                     "fecha": lunes.isoformat(), "turno": "Matutino", "evento": "X"}),
+            _peticion(puerto, "DELETE", "/reservas/999"),
+            _peticion(puerto, "GET", "/inexistente"),
+        )
+
+    assert [estado for estado, _ in _con_servicio(prueba)] == [400, 422, 404, 404]
+
+
+def test_lote_se_reintenta_completo_si_la_base_esta_ocupada(datos, monkeypatch):
+    monkeypatch.setitem(PIA.REINTENTOS_ESCRITURA, "espera_inicial", 0)
+    lunes = _proximo_lunes()
+    intentos = []
+
+    def bloqueada_la_primera_vez():
+        intentos.append(len(intentos))
+        if len(intentos) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return "ok"
+
+    resultados = servicio_reservas._aplicar_lote([
+        (servicio_reservas._reservar, (datos["cliente"], lunes, datos["sala"], "Matutino", "Antes del bloqueo")),
+        (bloqueada_la_primera_vez, ()),
+        (servicio_reservas._reservar, (datos["cliente"], lunes, datos["sala"], "Matutino", "Repetida")),
+    ])
+
+    assert len(intentos) == 2
+    assert resultados[0][0] and resultados[1] == (True, "ok")
+    assert not resultados[2][0] and resultados[2][1].estado == 409
+    assert PIA.obtener_conexion().execute("SELECT COUNT(*) FROM reserva").fetchone()[0] == 1